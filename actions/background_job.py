@@ -0,0 +1,79 @@
+import threading
+from typing import Any, Callable, Optional
+
+
+#Runs a long task in a background thread so the editor keeps responding while it runs. The task receives the job, through which it reports its
+#progress and checks if it was cancelled. The editor polls "done" every loop and, once the task has finished, calls "on_done" with its result
+#from the main thread, which is the only one that modifies the buffer. Tasks that produce results while they run, like a search, add them with
+#"add_output", the editor passes them to "on_output" every loop.
+class BackgroundJob:
+    def __init__(self, description: str, task: Callable[["BackgroundJob"], Any], on_done: Callable[[Any], None],
+        on_output: Optional[Callable[[list], None]] = None) -> None:
+        #Short description of the task, shown in the prompt while it runs.
+        self.description = description
+        self.task = task
+        self.on_done = on_done
+        self.on_output = on_output
+
+        #Progress of the task, between 0 and 1.
+        self.progress = 0.0
+        #Extra information about the progress, like the number of results found so far.
+        self.status = ""
+
+        #The value returned by the task, or the exception it raised.
+        self.result = None
+        self.error = None
+        self.done = False
+
+        #Results added by the task that the editor hasn't taken yet, they may be added from several threads.
+        self.output = []
+        self.output_lock = threading.Lock()
+
+        self.cancel_event = threading.Event()
+        self.thread = threading.Thread(target = self._run, daemon = True)
+        self.thread.start()
+
+
+    def _run(self) -> None:
+        try:
+            self.result = self.task(self)
+        except Exception as error:
+            self.error = error
+
+        self.done = True
+
+
+    #Asks the task to stop, it stops the next time it checks "is_cancelled".
+    def cancel(self) -> None:
+        self.cancel_event.set()
+
+
+    #Returns whether the job was cancelled, tasks should check it often.
+    def is_cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+
+    #Sets the progress of the task, a number between 0 and 1.
+    def set_progress(self, progress: float) -> None:
+        self.progress = progress
+
+
+    #Adds results to the output of the job, it can be called from any thread.
+    def add_output(self, items: list) -> None:
+        with self.output_lock:
+            self.output.extend(items)
+
+
+    #Returns the results added since the last call and removes them from the output.
+    def take_output(self) -> list:
+        with self.output_lock:
+            items = self.output
+            self.output = []
+
+        return items
+
+
+    #Returns the text shown in the prompt while the job runs.
+    def get_prompt(self) -> str:
+        status = (f" {self.status}" if self.status != "" else "")
+        return f"{self.description}... {self.progress * 100:.0f}%{status} (Esc to cancel)"
@@ -1,10 +1,13 @@
-import curses
-from typing import Any, Optional
+import curses, curses.ascii
+from typing import Any, Callable, Optional
 
 from configuration.config import DisplayColourConfig
+from buffer.columns import build_column_map
 
 
-#Allows for basic singe line input. Returns the entered string or "None" if the escape key was pressed.
+#Allows for basic singe line input. The input is a mode of the editor's main loop, while it's open the pressed keys go to it and only its line is
+#drawn, the editor's handlers and background jobs keep running. Once Enter or Esc is pressed the entered string, or "None" if the escape key was
+#pressed, is passed to the function given when opening it.
 class BasicInput():
     def __init__(self, editor: Any, colour_config: type[DisplayColourConfig]) -> None:
         #####ARGUMENTS#####
@@ -20,36 +23,51 @@ class BasicInput():
         self.text = ""
         #The cursor position in the entered text,
         self.cursor_pos = 0
+        #The prompt shown before the text and the function that receives the entered text.
+        self.prompt = ""
+        self.on_done = None
+        #Whether the rest of the screen has to be drawn again, not only the input line.
+        self.screen_changed = False
 
 
-    def basic_input(self, y_pos: int, x_pos: int, prompt: str) -> None:
+    #Opens the input, the editor sends it the pressed keys until it's closed.
+    def start(self, prompt: str, on_done: Callable[[Optional[str]], None]) -> None:
         #Reset input variables.
         self.text = ""
         self.cursor_pos = 0
+        self.prompt = prompt
+        self.on_done = on_done
+        self.screen_changed = True
 
-        while True:
-            #Clear the screen
-            self.editor.stdscr.clear()
+        #The input is shown in the prompt's line, so the prompt is disabled while it's open.
+        self.editor.prompt.toggle_enabled()
+        self.editor.current_input = self
 
-            #Detect keys that modify the entered string.
-            self.detect_key()
-            #Detect the keys that can cause the program to return.
-            returned_value = self.detect_return_key()
-            #We now check to make sure we aren't returning an empty string directly.
-            if returned_value != "":
-                return returned_value
 
-            #Call the display function.
-            self.editor.display.display()
-            #Call the input's display function.
-            self.display_input(y_pos, x_pos, prompt)
+    #Handles the last pressed key, should be called by the editor's loop instead of its own input handling while the input is open.
+    def input_handler(self) -> None:
+        if self.editor.key == (-1):
+            return
 
-            #Get console size.
-            self.editor.get_size()
-            #Refresh the screen.
-            self.editor.stdscr.refresh()
-            #Gets the pressed key code.
-            self.editor.key = self.editor.stdscr.getch()
+        #Detect keys that modify the entered string.
+        self.detect_key()
+        #Detect the keys that can cause the input to close.
+        returned_value = self.detect_return_key()
+
+        #We now check to make sure we aren't returning an empty string directly.
+        if returned_value != "":
+            self.editor.prompt.toggle_enabled()
+            self.editor.current_input = None
+            #The function may open another input.
+            self.on_done(returned_value)
+
+
+    #Returns whether the rest of the screen has to be drawn again, resetting it.
+    def take_screen_changed(self) -> bool:
+        screen_changed = self.screen_changed
+        self.screen_changed = False
+
+        return screen_changed
 
 
     #Keys that cause the program to return.
@@ -75,13 +93,13 @@ class BasicInput():
         #We use the "key" variable to avoid accessing the class variable repeated times.
         key = self.editor.key
 
-        #Printable ASCII characters
-        if key >= 32 and key <= 253:
+        #Printable characters are returned as strings.
+        if isinstance(key, str):
             #Insert the given char at the current cursor position. Since python strings are immutable we create a new string
             #consisting of the previous string split where the cursor is plus the added character.
             text_before = self.text[:self.cursor_pos]
             text_after = self.text[self.cursor_pos:]
-            self.text = text_before + chr(key) + text_after
+            self.text = text_before + key + text_after
 
             #Move the cursor's position.
             self.cursor_pos += 1
@@ -113,13 +131,27 @@ class BasicInput():
             self.cursor_pos = len(self.text)
 
 
-    #Displays the basic input line.
-    def display_input(self, y_pos, x_pos, prompt) -> None:
+    #Displays the basic input line, in the last line of the console. The line is cleared first, so it can be drawn without drawing the rest of
+    #the screen.
+    def display_input(self) -> None:
+        y_pos = self.editor.y_size - 1
+        prompt = self.prompt
+
+        self.editor.stdscr.move(y_pos, 0)
+        self.editor.stdscr.clrtoeol()
+
         #Print the prompt, entered text and escape key reminder.
-        self.editor.stdscr.addstr(y_pos, x_pos, f"{prompt}{self.text}  (ESC to cancel)", self.editor.get_colour(self.colour_config.text_colour))
+        self.editor.addstrex(y_pos, 0, f"{prompt}{self.text}  (ESC to cancel)", self.editor.get_colour(self.colour_config.text_colour))
+
+        #The cursor's column depends on the width of the characters before it.
+        cursor_column = build_column_map(prompt, 1)[-1] + build_column_map(self.text, 1)[self.cursor_pos]
+
+        #The cursor isn't shown if the prompt and text don't fit in the console.
+        if cursor_column >= self.editor.x_size:
+            return
 
         #Print the cursor, detecting if it's in the last char and reacting accordingly.
         if self.cursor_pos == len(self.text):
-            self.editor.stdscr.addstr(y_pos, self.cursor_pos + len(prompt), " ", self.editor.get_colour(self.colour_config.cursor_colour))
+            self.editor.addstrex(y_pos, cursor_column, " ", self.editor.get_colour(self.colour_config.cursor_colour))
         else:
-            self.editor.stdscr.addstr(y_pos, self.cursor_pos + len(prompt), self.text[self.cursor_pos], self.editor.get_colour(self.colour_config.cursor_colour))
\ No newline at end of file
+            self.editor.addstrex(y_pos, cursor_column, self.text[self.cursor_pos], self.editor.get_colour(self.colour_config.cursor_colour))
\ No newline at end of file
@@ -0,0 +1,137 @@
+import io, locale, os.path, queue, threading
+from typing import BinaryIO, Iterable, Optional, TextIO
+
+
+#Opening and saving of compressed files. The format of a file is detected from its first bytes, or from its extension when it doesn't exist yet.
+#Files are decompressed and compressed in chunks as they are read and written, so the decompressed file is never held in memory at once and no
+#temporary files are used. Zstandard is only available when the "zstandard" module is installed, or with Python's "compression.zstd".
+
+#The magic bytes and extension of each format.
+FORMATS = {"gzip" : (b"\x1f\x8b", ".gz"), "bzip2" : (b"BZh", ".bz2"), "xz" : (b"\xfd7zXZ\x00", ".xz"), "zstd" : (b"\x28\xb5\x2f\xfd", ".zst")}
+#After "BZh" a bzip2 file has its block size, a digit from "1" to "9", and the magic of its first block, or of the end of the stream if it's
+#empty. They are checked too, so a text file that starts with "BZh" isn't taken as compressed.
+BZIP2_BLOCK_MAGICS = (b"1AY&SY", b"\x17rE8P\x90")
+#The size of the chunks of text compressed at once when saving.
+WRITE_CHUNK_SIZE = 1024 * 1024
+
+
+#Returns the format of the given file, "None" if it isn't compressed. Files that don't exist, or can't be read, get the format of their extension.
+def detect_format(filename: str) -> Optional[str]:
+    try:
+        with open(filename, "rb") as file:
+            start = file.read(10)
+    except OSError:
+        return format_from_extension(filename)
+
+    for (format, (magic, extension)) in FORMATS.items():
+        if start.startswith(magic) and (format != "bzip2" or (b"1" <= start[3:4] <= b"9" and start[4:10] in BZIP2_BLOCK_MAGICS)):
+            return format
+
+    return None
+
+
+#Returns the format of the given file's extension, "None" if it isn't one of the compressed formats.
+def format_from_extension(filename: str) -> Optional[str]:
+    extension = os.path.splitext(filename)[1].lower()
+
+    for (format, (magic, format_extension)) in FORMATS.items():
+        if extension == format_extension:
+            return format
+
+    return None
+
+
+#Returns the zstandard module, the one in Python's standard library if there's one, or "None" if neither is installed.
+def get_zstd_module():
+    try:
+        from compression import zstd
+        return zstd
+    except ImportError:
+        pass
+
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+
+#Returns whether files with the given format can be opened and saved.
+def is_supported(format: Optional[str]) -> bool:
+    return format != "zstd" or get_zstd_module() != None
+
+
+#Opens a compressed file in binary mode, "mode" is "rb" or "wb". Raises "OSError" if the file can't be opened or the format isn't supported.
+def open_binary(filename: str, format: str, mode: str) -> BinaryIO:
+    #The compression modules are only imported when they are used, to keep them out of the startup time.
+    if format == "gzip":
+        import gzip
+        #The same level as the "gzip" command, the maximum level is much slower for a slightly smaller file.
+        return gzip.open(filename, mode, compresslevel = 6)
+    elif format == "bzip2":
+        import bz2
+        return bz2.open(filename, mode)
+    elif format == "xz":
+        import lzma
+        return lzma.open(filename, mode)
+
+    zstd = get_zstd_module()
+
+    if zstd == None:
+        raise OSError("zstandard isn't installed")
+
+    return zstd.open(filename, mode)
+
+
+#Opens a file with the given format, "None" if it isn't compressed, for reading as text. Lines are read the same way as from a file opened with
+#"open(filename, "r")", the decompressed text is read in chunks as the lines are iterated.
+def open_text(filename: str, format: Optional[str]) -> TextIO:
+    if format == None:
+        return open(filename, "r")
+
+    return io.TextIOWrapper(open_binary(filename, format, "rb"))
+
+
+#Writes the given lines, which must include their line endings, to a compressed file. The lines are joined and encoded in chunks in the calling
+#thread while a worker thread compresses and writes them, the compression modules release the GIL while compressing so both run at the same time.
+#Raises "OSError" if the file can't be written.
+def write_lines(filename: str, format: str, lines: Iterable[str]) -> None:
+    file = open_binary(filename, format, "wb")
+    #Only a few chunks are queued, so the encoded text doesn't pile up in memory when compressing is slower than encoding.
+    chunks = queue.Queue(4)
+    errors = []
+
+    def write() -> None:
+        while (chunk := chunks.get()) != None:
+            if errors == []:
+                try:
+                    file.write(chunk)
+                except Exception as error:
+                    errors.append(error)
+
+    worker = threading.Thread(target = write, daemon = True)
+    worker.start()
+
+    encoding = locale.getpreferredencoding(False)
+    chunk = []
+    chunk_size = 0
+
+    try:
+        for line in lines:
+            chunk.append(line)
+            chunk_size += len(line)
+
+            if chunk_size >= WRITE_CHUNK_SIZE:
+                chunks.put("".join(chunk).encode(encoding))
+                chunk = []
+                chunk_size = 0
+
+        chunks.put("".join(chunk).encode(encoding))
+    finally:
+        #The worker stops when it gets "None", even if encoding failed.
+        chunks.put(None)
+        worker.join()
+        file.close()
+
+    if errors != []:
+        raise OSError(f"failed to write {filename}") from errors[0]
@@ -0,0 +1,90 @@
+import curses, curses.ascii, os.path
+from typing import Any, Callable, Optional
+
+from actions.basic_input import BasicInput
+from actions.file_index import FileIndex
+from configuration.config import DisplayColourConfig
+
+
+#Input for choosing a file to open. While the text is typed the indexed files that best match it are listed above the status-bar, the up and
+#down keys select one of them and Enter returns it. An existing path typed exactly is returned as is, so files outside the index can still be
+#opened. The index is refreshed in the background every time the finder is opened.
+class FileFinder(BasicInput):
+    #The maximum number of files listed.
+    MAX_RESULTS = 10
+
+    def __init__(self, editor: Any, colour_config: type[DisplayColourConfig], file_index: type[FileIndex]) -> None:
+        super().__init__(editor, colour_config)
+        self.file_index = file_index
+
+        #The listed files and the selected one.
+        self.results = []
+        self.selected = 0
+        #The text and index version the results were found for, they are only found again when one of them changes.
+        self.results_key = None
+
+
+    def start(self, prompt: str, on_done: Callable[[Optional[str]], None]) -> None:
+        self.results = []
+        self.selected = 0
+        self.results_key = None
+        self.file_index.refresh()
+
+        super().start(prompt, on_done)
+
+
+    #Keys that cause the finder to return, Enter returns the selected file.
+    def detect_return_key(self) -> Optional[str]:
+        key = self.editor.key
+
+        if (key == curses.ascii.CR or key == curses.ascii.LF) and self.results != []:
+            if self.selected == 0 and os.path.isfile(self.text):
+                return self.text
+
+            return self.results[self.selected]
+
+        return super().detect_return_key()
+
+
+    #Input key detection, the up and down keys change the selected file.
+    def detect_key(self) -> None:
+        key = self.editor.key
+
+        if key == curses.KEY_UP:
+            self.selected = max(self.selected - 1, 0)
+        elif key == curses.KEY_DOWN:
+            self.selected = min(self.selected + 1, max(len(self.results) - 1, 0))
+        else:
+            super().detect_key()
+
+
+    #The listed files are drawn over the buffer, when they change the screen has to be drawn again to remove the ones that are no longer listed.
+    def take_screen_changed(self) -> bool:
+        results_key = (self.text, self.file_index.version)
+
+        if results_key != self.results_key:
+            self.results = self.file_index.find(self.text, self.MAX_RESULTS)
+            self.selected = 0
+            self.results_key = results_key
+            self.screen_changed = True
+
+        return super().take_screen_changed()
+
+
+    #Displays the listed files above the status-bar, the best match is the closest one to the input, and then the input itself.
+    def display_input(self) -> None:
+        #The status-bar is right above the input.
+        first_y = self.editor.y_size - 3
+        x_size = self.editor.x_size
+
+        if not self.file_index.ready:
+            self.editor.stdscr.addstr(first_y, 0, "Indexing files...".ljust(x_size), self.editor.get_colour(self.colour_config.text_colour))
+
+        for (i, path) in enumerate(self.results):
+            if first_y - i < 0:
+                break
+
+            colour = (self.colour_config.highlight_colour if i == self.selected else self.colour_config.text_colour)
+            self.editor.stdscr.addstr(first_y - i, 0, path[:x_size - 1].ljust(x_size - 1), self.editor.get_colour(colour))
+
+        super().display_input()
@@ -0,0 +1,324 @@
+import hashlib, itertools, marshal, os, os.path, re, threading
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from actions.file_search import FileSearch
+
+
+#The indexed paths, sorted by length, and the information used to search them. The paths and their file names are also joined, in lowercase, in a
+#single string each, so a query can be searched in all of them at once by "str.find", which runs in C.
+@dataclass
+class PathIndex:
+    paths: list[str] = field(default_factory = list)
+    #The bitsets of the characters in each path and in each file name.
+    path_bits: dict[str, int] = field(default_factory = dict)
+    name_bits: dict[str, int] = field(default_factory = dict)
+
+    joined_paths: str = ""
+    joined_names: str = ""
+    #Where each path and file name starts in the joined strings.
+    path_starts: list[int] = field(default_factory = list)
+    name_starts: list[int] = field(default_factory = list)
+
+
+#Keeps an index of the paths of every file in a folder and its subfolders, used to find files by typing some of the characters of their path.
+#The index is built in a background thread with "os.scandir" and cached on disk between sessions. When it's refreshed only the folders whose
+#modification time changed are read again, since a folder's modification time changes whenever a file is added, removed or renamed in it.
+#
+#To rank the paths quickly, for every character there's a bitset, a Python integer, with a bit set for each path that contains that character.
+#The paths containing every character of a query are found with a few "and" operations, and since paths are sorted by length walking the bits
+#in order gives the shortest paths first. Only those paths are checked for the characters being in the right order, so a query takes about the
+#same time with any number of files.
+class FileIndex:
+    #Increased when the format of the cache changes.
+    CACHE_VERSION = 1
+    #How many paths that contain the query's characters are checked at most, it bounds the time of a query that matches many paths.
+    MAX_CHECKS = 2000
+    #How many characters of the joined paths are searched for the whole query at most, when many paths contain its characters.
+    MAX_SEARCH_SIZE = 1000000
+    NONZERO_BYTE = re.compile(rb"[^\x00]")
+
+    def __init__(self, folder: str, ignore_patterns: list[str], cache_folder: str) -> None:
+        self.folder = folder
+        self.ignore_patterns = ignore_patterns + FileSearch.read_gitignore(folder)
+
+        #Each indexed folder has its own cache file, named after the hash of its absolute path.
+        self.cache_path = os.path.join(cache_folder, hashlib.sha1(os.path.abspath(folder).encode(errors = "replace")).hexdigest() + ".index")
+
+        #The contents of every folder, by path relative to "folder", as tuples of its modification time, its files and its subfolders.
+        self.folders = {}
+        #The index is replaced as a whole, so a query never sees parts from different versions of it.
+        self.index = PathIndex()
+        #Whether the index has been built or loaded from the cache, and whether it's being refreshed.
+        self.ready = False
+        self.refreshing = False
+        #Incremented every time the index changes.
+        self.version = 0
+
+        self.thread = None
+
+
+    #Refreshes the index in a background thread, the first time the cached index is loaded first. Does nothing if it's already being refreshed.
+    def refresh(self) -> None:
+        if self.refreshing:
+            return
+
+        self.refreshing = True
+        self.thread = threading.Thread(target = self._refresh, daemon = True)
+        self.thread.start()
+
+
+    #Returns the number of indexed files.
+    def get_file_count(self) -> int:
+        return len(self.index.paths)
+
+
+    def _refresh(self) -> None:
+        try:
+            if not self.ready:
+                self.load_cache()
+
+            if self.walk():
+                self.build_index()
+                self.save_cache()
+
+            self.ready = True
+        finally:
+            self.refreshing = False
+
+
+    #Walks the folder, reading only the folders that changed since the last walk. Returns "True" if any folder changed.
+    def walk(self) -> bool:
+        new_folders = {}
+        changed = False
+        pending = [""]
+
+        while pending != []:
+            relative_folder = pending.pop()
+
+            try:
+                mtime = os.stat(os.path.join(self.folder, relative_folder)).st_mtime_ns
+            except OSError:
+                changed = True
+                continue
+
+            contents = self.folders.get(relative_folder)
+
+            if contents == None or contents[0] != mtime:
+                contents = self.read_folder(relative_folder, mtime)
+                changed = True
+
+            new_folders[relative_folder] = contents
+            pending.extend(os.path.join(relative_folder, name) for name in contents[2])
+
+        #Folders that were removed.
+        if len(new_folders) != len(self.folders):
+            changed = True
+
+        self.folders = new_folders
+        return changed
+
+
+    #Reads the files and subfolders of a folder, skipping the ignored ones.
+    def read_folder(self, relative_folder: str, mtime: int) -> tuple[int, list[str], list[str]]:
+        files = []
+        subfolders = []
+
+        try:
+            entries = list(os.scandir(os.path.join(self.folder, relative_folder)))
+        except OSError:
+            entries = []
+
+        for entry in entries:
+            if FileSearch.is_ignored(entry.name, os.path.join(relative_folder, entry.name), self.ignore_patterns):
+                continue
+
+            try:
+                #Links to folders aren't followed, they could create loops.
+                if entry.is_dir(follow_symlinks = False):
+                    subfolders.append(entry.name)
+                elif entry.is_file():
+                    files.append(entry.name)
+            except OSError:
+                pass
+
+        return (mtime, files, subfolders)
+
+
+    #Builds the sorted paths and the bitsets from the folders.
+    def build_index(self) -> None:
+        paths = sorted(os.path.join(folder, name) for (folder, (mtime, files, subfolders)) in self.folders.items() for name in files)
+        paths.sort(key = len)
+
+        path_indexes = {}
+        name_indexes = {}
+
+        for (i, path) in enumerate(paths):
+            path = path.lower()
+
+            for char in set(path):
+                path_indexes.setdefault(char, []).append(i)
+
+            for char in set(path[path.rfind(os.sep) + 1:]):
+                name_indexes.setdefault(char, []).append(i)
+
+        path_bits = {char : self.to_bitset(indexes, len(paths)) for (char, indexes) in path_indexes.items()}
+        name_bits = {char : self.to_bitset(indexes, len(paths)) for (char, indexes) in name_indexes.items()}
+
+        self.set_index(paths, path_bits, name_bits)
+
+
+    #Replaces the index with the given paths and bitsets, joining the paths and names.
+    def set_index(self, paths: list[str], path_bits: dict[str, int], name_bits: dict[str, int]) -> None:
+        names = [path[path.rfind(os.sep) + 1:] for path in paths]
+        index = PathIndex(paths, path_bits, name_bits)
+
+        #Each path is followed by a newline, which can't be part of a query.
+        index.joined_paths = "\n".join(paths).lower()
+        index.joined_names = "\n".join(names).lower()
+        index.path_starts = [0] + list(itertools.accumulate(len(path) + 1 for path in paths))[:-1]
+        index.name_starts = [0] + list(itertools.accumulate(len(name) + 1 for name in names))[:-1]
+
+        self.index = index
+        self.version += 1
+
+
+    #Returns an integer with the bits in the given indexes set.
+    @staticmethod
+    def to_bitset(indexes: list[int], size: int) -> int:
+        data = bytearray((size + 7) // 8)
+
+        for i in indexes:
+            data[i >> 3] |= 1 << (i & 7)
+
+        return int.from_bytes(data, "little")
+
+
+    #Returns the indexes of the bits set in the bitset, in increasing order. Bytes without bits set are skipped by a regex, which runs in C.
+    def set_bits(self, bits: int) -> Iterator[int]:
+        data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+
+        for match in self.NONZERO_BYTE.finditer(data):
+            byte = data[match.start()]
+            base = match.start() * 8
+
+            while byte != 0:
+                lowest = byte & -byte
+                yield base + lowest.bit_length() - 1
+                byte ^= lowest
+
+
+    #Returns at most "limit" paths that contain the characters of the query in the same order, ignoring case and spaces. Paths whose file name
+    #contains the query come first, then the ones whose path contains it, then the ones whose file name contains its characters and finally the
+    #ones whose path does. In each group shorter paths come first.
+    def find(self, query: str, limit: int) -> list[str]:
+        index = self.index
+        query = query.replace(" ", "").lower()
+
+        if query == "":
+            return index.paths[:limit]
+
+        #The characters have to appear in order, with anything between them.
+        order = re.compile(".*?".join(re.escape(char) for char in query), re.IGNORECASE | re.DOTALL)
+
+        bits = -1
+        for char in set(query):
+            bits &= index.path_bits.get(char, 0)
+
+        #If few paths contain the characters of the query every one of them is checked.
+        if bits.bit_count() <= self.MAX_CHECKS:
+            groups = ([], [], [], [])
+
+            for i in self.set_bits(bits):
+                path = index.paths[i].lower()
+                name = path[path.rfind(os.sep) + 1:]
+
+                if query in name:
+                    groups[0].append(index.paths[i])
+                elif query in path:
+                    groups[1].append(index.paths[i])
+                elif order.search(name) != None:
+                    groups[2].append(index.paths[i])
+                elif order.search(path) != None:
+                    groups[3].append(index.paths[i])
+
+            return (groups[0] + groups[1] + groups[2] + groups[3])[:limit]
+
+        #Otherwise only the shortest paths are looked at, the matches are common so they are enough to fill the results.
+        results = []
+        found = set()
+
+        def add(i: int) -> bool:
+            if i not in found:
+                results.append(index.paths[i])
+                found.add(i)
+
+            return len(results) >= limit
+
+        #Paths that contain the whole query, found by searching the start of the joined strings, where the shortest paths are.
+        for (joined, starts) in ((index.joined_names, index.name_starts), (index.joined_paths, index.path_starts)):
+            position = joined.find(query, 0, self.MAX_SEARCH_SIZE)
+
+            while position >= 0:
+                i = bisect_right(starts, position) - 1
+                if add(i):
+                    return results
+
+                #The search continues from the next path.
+                position = (joined.find(query, starts[i + 1], self.MAX_SEARCH_SIZE) if i + 1 < len(starts) else -1)
+
+        #Paths that contain the characters of the query in order.
+        checks = 0
+
+        for (bitsets, only_name) in ((index.name_bits, True), (index.path_bits, False)):
+            bits = -1
+            for char in set(query):
+                bits &= bitsets.get(char, 0)
+
+            for i in self.set_bits(bits):
+                if i in found:
+                    continue
+
+                path = index.paths[i]
+                if order.search(path[path.rfind(os.sep) + 1:] if only_name else path) != None and add(i):
+                    return results
+
+                checks += 1
+                if checks >= self.MAX_CHECKS:
+                    return results
+
+        return results
+
+
+    #Loads the index from the cache, if it was made with the same ignore patterns.
+    def load_cache(self) -> None:
+        try:
+            with open(self.cache_path, "rb") as file:
+                cache = marshal.load(file)
+        except:
+            return
+
+        if not isinstance(cache, dict) or cache.get("version") != self.CACHE_VERSION or cache.get("ignore") != self.ignore_patterns:
+            return
+
+        self.folders = cache["folders"]
+        self.set_index(cache["paths"], cache["path bits"], cache["name bits"])
+        self.ready = True
+
+
+    #Stores the index in the cache, failing to write it isn't an error, the index will simply be built again next time.
+    def save_cache(self) -> None:
+        index = self.index
+        cache = {"version" : self.CACHE_VERSION, "ignore" : self.ignore_patterns, "folders" : self.folders, "paths" : index.paths,
+            "path bits" : index.path_bits, "name bits" : index.name_bits}
+
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok = True)
+
+            #The cache is written to a temporary file first, so an editor reading it at the same time never sees half of it.
+            with open(self.cache_path + ".tmp", "wb") as file:
+                marshal.dump(cache, file)
+            os.replace(self.cache_path + ".tmp", self.cache_path)
+        except:
+            pass
@@ -0,0 +1,155 @@
+import fnmatch, os, os.path, re, threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from actions.background_job import BackgroundJob
+
+
+#Searches every file in a folder and its subfolders for a regex, with the same semantics as "FindInBuffer": the regex is matched against each
+#line. The folder is walked with "os.scandir" in the job's thread while a pool of threads searches the files, each result is added to the job's
+#output as soon as it's found. Results are lines with the format "<path>:<line number>:<line>", like the ones given by "grep -n".
+class FileSearch:
+    #How many bytes at the start of a file are checked for null bytes to know if it's binary.
+    BINARY_CHECK_SIZE = 8192
+    #Results longer than this are shortened, minified files can have huge lines.
+    MAX_RESULT_LENGTH = 500
+    RESULT_FORMAT = re.compile(r"(.*?):(\d+):")
+    #Patterns containing these, the start or end of the text and lookarounds, aren't checked with the prefilter, see "get_prefilter".
+    PREFILTER_TOKENS = ("\\A", "\\Z", "(?=", "(?!", "(?<=", "(?<!")
+
+    def __init__(self, ignore_patterns: list[str], thread_count: int) -> None:
+        #Files and folders whose name, or path from the searched folder, matches one of these patterns are skipped.
+        self.ignore_patterns = ignore_patterns
+        self.thread_count = max(thread_count, 1)
+
+        #The lines of the last results, kept so they can be shown again after opening one of them.
+        self.results = None
+
+
+    #Starts searching the given folder for the regex in a background job. The results are passed to "on_output" as they are found and "on_done"
+    #receives the number of matching lines. Returns the error message if the regex is invalid.
+    def start(self, regex: str, folder: str, on_output: Callable[[list[str]], None], on_done: Callable[[Optional[int]], None]) -> BackgroundJob | str:
+        try:
+            pattern = re.compile(regex)
+        except re.error as error:
+            return f"Invalid regex: {error}"
+
+        prefilter = self.get_prefilter(regex)
+        ignore_patterns = self.ignore_patterns + self.read_gitignore(folder)
+
+        return BackgroundJob("Searching files", lambda job: self.search_folder(folder, pattern, prefilter, ignore_patterns, job), on_done, on_output)
+
+
+    #Returns the pattern files are first checked with, a single search of their whole contents, with "MULTILINE" so "^" and "$" still match at
+    #every line. Patterns that use the start or end of the text can't be checked this way, and neither can lookarounds, which see the newlines
+    #around a line, so "foo(?!\s)" doesn't match a "foo" at the end of a line in the whole contents but does in the line. Returns "None" for them.
+    def get_prefilter(self, regex: str) -> Optional[re.Pattern]:
+        return (re.compile(regex, re.MULTILINE) if not any(token in regex for token in self.PREFILTER_TOKENS) else None)
+
+
+    #Returns the patterns in the ".gitignore" file of the searched folder, only the simple ones are supported.
+    @staticmethod
+    def read_gitignore(folder: str) -> list[str]:
+        try:
+            with open(os.path.join(folder, ".gitignore"), "r", errors = "replace") as file:
+                lines = [line.strip() for line in file]
+        except OSError:
+            return []
+
+        return [line.strip("/") for line in lines if line != "" and not line.startswith(("#", "!"))]
+
+
+    #Returns whether a file or folder has to be skipped, "path" is relative to the searched folder.
+    @staticmethod
+    def is_ignored(name: str, path: str, ignore_patterns: list[str]) -> bool:
+        return any(fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(path, pattern) for pattern in ignore_patterns)
+
+
+    #Walks the folder and searches every file that isn't ignored, runs in the job's thread. Returns the number of matching lines.
+    def search_folder(self, folder: str, pattern: re.Pattern, prefilter: Optional[re.Pattern], ignore_patterns: list[str], job: BackgroundJob) -> int:
+        #Shared with the search threads.
+        counts = {"found" : 0, "searched" : 0, "matches" : 0}
+        lock = threading.Lock()
+
+        def search(path: str) -> None:
+            if job.is_cancelled():
+                return
+
+            results = self.search_file(folder, path, pattern, prefilter)
+            job.add_output(results)
+
+            with lock:
+                counts["searched"] += 1
+                counts["matches"] += len(results)
+                job.set_progress(counts["searched"] / counts["found"])
+                job.status = f"{counts['matches']} matches"
+
+        with ThreadPoolExecutor(self.thread_count) as executor:
+            folders = [""]
+
+            while folders != [] and not job.is_cancelled():
+                relative_folder = folders.pop()
+
+                try:
+                    entries = list(os.scandir(os.path.join(folder, relative_folder)))
+                except OSError:
+                    continue
+
+                for entry in sorted(entries, key = lambda entry: entry.name):
+                    path = os.path.join(relative_folder, entry.name)
+
+                    if self.is_ignored(entry.name, path, ignore_patterns):
+                        continue
+
+                    try:
+                        #Links to folders aren't followed, they could create loops.
+                        if entry.is_dir(follow_symlinks = False):
+                            folders.append(path)
+                        elif entry.is_file():
+                            with lock:
+                                counts["found"] += 1
+                            executor.submit(search, path)
+                    except OSError:
+                        pass
+
+        return counts["matches"]
+
+
+    #Searches a single file, returns its results. Binary files and files that can't be read have no results.
+    def search_file(self, folder: str, path: str, pattern: re.Pattern, prefilter: Optional[re.Pattern]) -> list[str]:
+        try:
+            with open(os.path.join(folder, path), "rb") as file:
+                data = file.read()
+        except OSError:
+            return []
+
+        if b"\0" in data[:self.BINARY_CHECK_SIZE]:
+            return []
+
+        #The lines are split the same way the editor splits them when opening the file, the prefilter searches the same text so "$" matches at
+        #the end of lines that end with "\r\n".
+        text = data.decode("utf-8", "replace").replace("\r\n", "\n")
+
+        if prefilter != None and prefilter.search(text) == None:
+            return []
+
+        lines = text.split("\n")
+        if lines[-1] == "":
+            lines.pop()
+
+        results = []
+        for (y, line) in enumerate(lines):
+            if pattern.search(line) != None:
+                results.append(f"{path}:{y + 1}:{line[:self.MAX_RESULT_LENGTH]}")
+
+        return results
+
+
+    #Returns the path and the line number, starting at one, of a result line, or "None" if the line isn't a result.
+    def parse_result(self, line: str) -> Optional[tuple[str, int]]:
+        match = self.RESULT_FORMAT.match(line)
+
+        if match == None:
+            return None
+
+        return (match.group(1), int(match.group(2)))
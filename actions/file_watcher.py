@@ -0,0 +1,197 @@
+import os, os.path, struct, time
+from typing import Optional
+
+from buffer.buffer import TextBuffer
+from actions.input_output import IOHandler
+from actions.compression import detect_format, open_text
+
+
+#Uses Linux's inotify, through "ctypes", to be notified when a file in a folder changes. If inotify isn't available, or the folder can't be
+#watched, "available" is "False".
+class Inotify:
+    #Events of the watched folder that may mean the file was changed: modified, written and closed, moved in or out, created and deleted. Programs
+    #that keep the file open, like the ones writing logs, only cause modify events.
+    WATCH_MASK = 0x2 | 0x8 | 0x40 | 0x80 | 0x100 | 0x200
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self) -> None:
+        self.fd = -1
+        self.watch = -1
+        self.libc = None
+
+        try:
+            import ctypes, ctypes.util
+
+            self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno = True)
+            #The flag for a non-blocking inotify file descriptor has the same value as "O_NONBLOCK".
+            self.fd = self.libc.inotify_init1(os.O_NONBLOCK)
+        except:
+            self.fd = -1
+
+        self.available = self.fd >= 0
+
+
+    #Starts watching the folder that contains the given file, replacing the previous one.
+    def watch_file(self, filename: str) -> None:
+        if not self.available:
+            return
+
+        if self.watch >= 0:
+            self.libc.inotify_rm_watch(self.fd, self.watch)
+
+        self.watch = self.libc.inotify_add_watch(self.fd, os.path.dirname(os.path.abspath(filename)).encode(), self.WATCH_MASK)
+
+        #The folder can't be watched, like when the limit of watches is reached, no events would arrive so inotify isn't used anymore.
+        if self.watch < 0:
+            os.close(self.fd)
+            self.fd = -1
+            self.available = False
+
+
+    #Returns "True" if there was an event for a file with the given name since the last call, without blocking.
+    def has_event(self, name: str) -> bool:
+        found = False
+
+        while True:
+            try:
+                data = os.read(self.fd, 4096)
+            except OSError:
+                return found
+
+            position = 0
+            while position + self.EVENT.size <= len(data):
+                _, _, _, length = self.EVENT.unpack_from(data, position)
+                position += self.EVENT.size
+                event_name = data[position:position + length].rstrip(b"\0").decode(errors = "replace")
+                position += length
+
+                if event_name == name:
+                    found = True
+
+
+#Detects when the open file is changed by another program, and reloads only the parts of it that changed. The file is checked with "os.stat"
+#every "check_time" seconds, if inotify is available it's also checked as soon as there's an event for it.
+class FileWatcher:
+    #The number of lines in each block, the hash of each block of the loaded file is kept to find which blocks changed.
+    BLOCK_SIZE = 256
+
+    def __init__(self, check_time: float) -> None:
+        self.check_time = check_time
+        self.last_check_time = 0
+        self.inotify = Inotify()
+
+        #The watched file, its "(mtime, size)" when it was loaded and the hashes of its blocks, aligned both from the start and the end of the file.
+        self.filename = None
+        self.file_stat = None
+        self.start_hashes = []
+        self.end_hashes = []
+
+
+    #Returns the modification time and size of the watched file, or "None" if it doesn't exist.
+    def _stat(self) -> Optional[tuple[int, int]]:
+        try:
+            stat = os.stat(self.filename)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+
+    #Returns the hashes of each block of lines, the blocks start at the beginning of the list if "from_end" is "False", otherwise at the end.
+    def _block_hashes(self, lines: list[str], from_end: bool) -> list[int]:
+        size = self.BLOCK_SIZE
+        count = len(lines)
+
+        if from_end:
+            return [hash("\n".join(lines[max(count - end - size, 0):count - end])) for end in range(0, count, size)]
+
+        return [hash("\n".join(lines[start:start + size])) for start in range(0, count, size)]
+
+
+    #Starts watching the given file, whose contents must be the ones in the buffer, like after loading or saving it.
+    def watch(self, filename: str, buffer: type[TextBuffer]) -> None:
+        self.filename = filename
+        self.file_stat = self._stat()
+
+        lines = [buffer.get_line(y) for y in range(buffer.get_line_count())]
+        self.start_hashes = self._block_hashes(lines, False)
+        self.end_hashes = self._block_hashes(lines, True)
+
+        self.inotify.watch_file(filename)
+
+
+    #Returns the "(mtime, size)" the watched file had when the buffer last matched it, or "None" if no file is watched.
+    def get_file_stat(self) -> Optional[tuple[int, int]]:
+        return (self.file_stat if self.filename != None else None)
+
+
+    #Stops watching the file, used when the buffer no longer contains it.
+    def unwatch(self) -> None:
+        self.filename = None
+
+
+    #Should be called every editor loop, returns "True" if the watched file changed since it was loaded or since the last call to "acknowledge".
+    def check(self) -> bool:
+        if self.filename == None:
+            return False
+
+        #With inotify the file is checked as soon as there's an event. It's still checked every "check_time" seconds, since some changes cause no
+        #events, like the ones made in another machine to a network file system.
+        event = self.inotify.available and self.inotify.has_event(os.path.basename(self.filename))
+
+        if not event and time.time() < self.last_check_time + self.check_time:
+            return False
+
+        self.last_check_time = time.time()
+
+        return self._stat() != self.file_stat
+
+
+    #Accepts the current version of the file without reloading it, so the change isn't reported again.
+    def acknowledge(self) -> None:
+        self.file_stat = self._stat()
+
+
+    #Reloads the watched file into the buffer, which must contain the file as it was loaded. Only the lines between the first and last changed
+    #blocks are compared and replaced. Returns the number of lines replaced, or "(-1)" if the file couldn't be read.
+    def reload(self, buffer: type[TextBuffer]) -> int:
+        try:
+            with open_text(self.filename, detect_format(self.filename)) as file:
+                new_lines = IOHandler.read_lines(file)
+        except:
+            return -1
+
+        self.file_stat = self._stat()
+        new_start_hashes = self._block_hashes(new_lines, False)
+        new_end_hashes = self._block_hashes(new_lines, True)
+
+        old_count = buffer.get_line_count()
+        new_count = len(new_lines)
+
+        #We find how many blocks at the start and at the end are the same, without looking at their lines.
+        prefix = 0
+        while prefix < min(len(self.start_hashes), len(new_start_hashes)) and self.start_hashes[prefix] == new_start_hashes[prefix]:
+            prefix += 1
+
+        suffix = 0
+        while suffix < min(len(self.end_hashes), len(new_end_hashes)) and self.end_hashes[suffix] == new_end_hashes[suffix]:
+            suffix += 1
+
+        prefix = min(prefix * self.BLOCK_SIZE, old_count, new_count)
+        suffix = min(suffix * self.BLOCK_SIZE, old_count - prefix, new_count - prefix)
+
+        #Inside the first and last changed blocks we compare line by line, to replace only the lines that actually changed.
+        while prefix < min(old_count, new_count) - suffix and buffer.get_line(prefix) == new_lines[prefix]:
+            prefix += 1
+
+        while suffix < min(old_count, new_count) - prefix and buffer.get_line(old_count - suffix - 1) == new_lines[new_count - suffix - 1]:
+            suffix += 1
+
+        self.start_hashes = new_start_hashes
+        self.end_hashes = new_end_hashes
+
+        if prefix + suffix == old_count == new_count:
+            return 0
+
+        buffer.replace_lines(prefix, old_count - prefix - suffix, new_lines[prefix:new_count - suffix])
+
+        return max(old_count, new_count) - prefix - suffix
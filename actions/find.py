@@ -1,33 +1,101 @@
-from dataclasses import dataclass
-from typing import Optional
-import re
+import os.path, re, subprocess, sys, threading, time
+from typing import Callable, Optional
 
 from buffer.buffer import TextBuffer
+from actions.background_job import BackgroundJob
+from actions.find_worker import read_frame, write_frame
 
 
+#Finds the matches of a regex in every line of the buffer. The search runs in a separate process, see "find_worker.py", managed by a background
+#job, so the editor keeps responding. The matches of each chunk of lines are added to the job's output as soon as the chunk is searched. Since
+#the process can be killed at any moment the search can always be cancelled, and it's stopped after "time_limit" seconds, so a regex with
+#catastrophic backtracking can't block the editor.
 class FindInBuffer:
-    def __init__(self, buffer: type[TextBuffer]) -> None:
+    #The number of lines sent to the search process at once.
+    CHUNK_LINES = 5000
+    WORKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "find_worker.py")
+
+    def __init__(self, buffer: type[TextBuffer], time_limit: float) -> None:
         self.buffer = buffer
+        self.time_limit = time_limit
+
+
+    #Starts finding the regex in a background job, "on_output" receives lists of "(y_pos, spans)" tuples as they are found and "on_done" the
+    #number of matches. If the regex is invalid returns the error message instead.
+    def start(self, regex: str, on_output: Callable[[list[tuple[int, list[tuple[int, int]]]]], None], on_done: Callable[[Optional[int]], None]) -> BackgroundJob | str:
+        try:
+            re.compile(regex)
+        except re.error as error:
+            return f"Invalid regex: {error}"
+
+        lines = [self.buffer.get_line(y) for y in range(self.buffer.get_line_count())]
+
+        return BackgroundJob("Finding", lambda job: self.find_in_lines(lines, regex, job), on_done, on_output)
+
+
+    #Finds the regex in the lines, runs in the job's thread. A thread writes the lines to the search process, another kills it if the job is
+    #cancelled or the time limit is reached, and this one reads the matches. Returns the number of matches.
+    def find_in_lines(self, lines: list[str], regex: str, job: BackgroundJob) -> Optional[int]:
+        process = subprocess.Popen([sys.executable, self.WORKER_PATH], stdin = subprocess.PIPE, stdout = subprocess.PIPE, stderr = subprocess.DEVNULL)
+        finished = threading.Event()
+        deadline = time.time() + self.time_limit
+        timed_out = []
+
+        def write_lines() -> None:
+            try:
+                write_frame(process.stdin, regex)
+
+                for start in range(0, len(lines), self.CHUNK_LINES):
+                    write_frame(process.stdin, (start, lines[start:start + self.CHUNK_LINES]))
+
+                process.stdin.close()
+            #The process was killed.
+            except OSError:
+                pass
+
+        def watch_process() -> None:
+            while not finished.is_set():
+                cancelled = job.cancel_event.wait(0.1)
+
+                if cancelled or time.time() > deadline:
+                    if not cancelled:
+                        timed_out.append(True)
+
+                    process.kill()
+                    return
+
+        threads = [threading.Thread(target = function, daemon = True) for function in (write_lines, watch_process)]
+        for thread in threads:
+            thread.start()
+
+        match_count = 0
+
+        try:
+            while True:
+                answer = read_frame(process.stdout)
+                if answer == None:
+                    break
+
+                end, matches = answer
+                match_count += sum(len(spans) for (y, spans) in matches)
+                job.add_output(matches)
+                job.set_progress(end / len(lines))
+                job.status = f"{match_count} matches"
 
+            return_code = process.wait()
 
-    #Finds all instances of the given regex, then returns them, if none were found returns "None".
-    def find_in_buffer(self, regex_to_find: str) -> Optional[dict[int, list[tuple[int, int]]]]:
-        matches = {}
+        finally:
+            finished.set()
+            for thread in threads:
+                thread.join()
 
-        #Gets all matches from all lines.
-        for a in range(self.buffer.get_line_count()):
-            line_matches = []
+        if timed_out != []:
+            raise RuntimeError(f"stopped after {self.time_limit} seconds, the matches found until then are highlighted")
 
-            for m in re.finditer(regex_to_find, self.buffer.get_line(a)):
-                #The "finditer" function returns a match object with information about the match. We store the span of each match in case they
-                #have different lengths.
-                line_matches.append(m.span())
+        if job.is_cancelled():
+            return None
 
-            #If a line contains matches we add them to the matches dictionary.
-            if line_matches != []:
-                matches[a] = line_matches
+        if return_code != 0:
+            raise RuntimeError("the search process stopped unexpectedly")
 
-        if matches != {}:
-            return matches
-        else:
-            return None
\ No newline at end of file
+        return match_count
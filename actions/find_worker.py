@@ -0,0 +1,52 @@
+import marshal, re, struct, sys
+from typing import Any, BinaryIO
+
+
+#The search of "FindInBuffer" runs in a separate process running this file, that way it can be stopped at any moment by killing the process, even
+#in the middle of matching a regex, which can't be interrupted inside the editor. The process receives the regex and then chunks of lines, and
+#answers each chunk with the matches found in it. Every message is a frame made of the length of the data followed by the data, in "marshal"
+#format.
+FRAME_HEADER = struct.Struct("<I")
+
+
+#Reads a frame from the file, returns "None" when the file ends.
+def read_frame(file: BinaryIO) -> Any:
+    header = file.read(FRAME_HEADER.size)
+
+    if len(header) < FRAME_HEADER.size:
+        return None
+
+    return marshal.loads(file.read(FRAME_HEADER.unpack(header)[0]))
+
+
+#Writes a frame to the file.
+def write_frame(file: BinaryIO, value: Any) -> None:
+    data = marshal.dumps(value)
+    file.write(FRAME_HEADER.pack(len(data)) + data)
+    file.flush()
+
+
+#Each chunk is a tuple of the index of its first line and the lines, the answer is a tuple of the index after its last line and a list with a
+#"(y_pos, spans)" tuple for each line with matches.
+def main() -> None:
+    pattern = re.compile(read_frame(sys.stdin.buffer))
+
+    while True:
+        chunk = read_frame(sys.stdin.buffer)
+        if chunk == None:
+            break
+
+        start, lines = chunk
+        matches = []
+
+        for (y, line) in enumerate(lines):
+            spans = [match.span() for match in pattern.finditer(line)]
+
+            if spans != []:
+                matches.append((start + y, spans))
+
+        write_frame(sys.stdout.buffer, (start + len(lines), matches))
+
+
+if __name__ == "__main__":
+    main()
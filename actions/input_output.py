@@ -1,34 +1,65 @@
 import os.path
 from dataclasses import dataclass
-from typing import Optional
+from typing import Iterator, Optional, TextIO
 
+from actions.compression import detect_format, format_from_extension, open_text, write_lines
 from buffer.buffer import Line, TextBuffer
+from buffer.line_changes import LineChanges
 
 
 @dataclass
 class IOHandler:
     filename: str = None
-    #Determines whether the buffer has been modified or not.
-    dirty: bool = False
+    #Keeps track of the lines that differ from the saved file, the buffer is "dirty" if any of them does.
+    line_changes: LineChanges = None
+    #The compression format of the file, like "gzip", or "None" if it isn't compressed. Compressed files are saved in the same format.
+    compression: str = None
 
 
-    #Sets the dirty flag to "True".
-    def set_dirty(self) -> None:
-        self.dirty = True
+    #Returns whether the buffer is "dirty" or not, it stops being dirty if the edits are undone.
+    def get_dirty(self) -> bool:
+        return self.line_changes.is_dirty()
 
 
-    #Returns whether the buffer is "dirty" or not.
-    def get_dirty(self) -> bool:
-        return self.dirty
+    #Returns whether the line in the specified position differs from the saved file.
+    def is_line_changed(self, y_pos: int) -> bool:
+        return self.line_changes.is_changed(y_pos)
+
+
+    #Makes the current buffer the saved version of the file, used when the buffer is updated to match the file on disk.
+    def set_saved(self) -> None:
+        self.line_changes.mark_saved()
+
+
+    #While enabled, lines added to the end of the buffer are also added to the saved file, see "LineChanges.set_appending_saved".
+    def set_appending_saved(self, enabled: bool) -> None:
+        self.line_changes.set_appending_saved(enabled)
 
 
     def get_filename(self) -> str:
         return self.filename
 
 
+    def get_compression(self) -> Optional[str]:
+        return self.compression
+
+
+    #Sets the name of the file the buffer is saved to, "None" if the buffer isn't a file.
+    def set_filename(self, filename: Optional[str]) -> None:
+        self.filename = filename
+
+
     #Takes a buffer and saves it to the specified "filename", returns the number of bytes written if no errors occurred. If an error occurred it
     #returns "-1".
     def save_file(self, buffer: type[TextBuffer], filename: str, line_ending: str = "\n") -> int:
+        #Files with the extension of a compressed format are compressed, as is the file the buffer was loaded from if it was compressed.
+        compression = format_from_extension(filename)
+        if compression == None and filename == self.filename:
+            compression = self.compression
+
+        if compression != None:
+            return self.save_compressed_file(buffer, filename, compression, line_ending)
+
         #This try block is to avoid creating a security hole that might allow a user to access files without permission.
         try:
             path = os.path.join(os.getcwd(), filename)
@@ -40,6 +71,7 @@ class IOHandler:
         else:   
             #If the file could be opened/created set the filename.
             self.filename = filename
+            self.compression = None
 
             #We read each line in the buffer and write it to the file, adding the corresponding line ending.
             for y in range(0, buffer.get_line_count()):
@@ -49,39 +81,87 @@ class IOHandler:
 
             #If the file was closed successfully that means that it was saved correctly, therefore the buffer is no longer different from the
             #file
-            self.dirty = False
+            self.line_changes.mark_saved()
 
             #No errors occurred, return the number of bytes written to disk.
             return os.path.getsize(path)
 
 
+    #Saves the buffer to a compressed file, the lines are compressed as they are written. Returns the number of bytes written or "-1" if an error
+    #occurred.
+    def save_compressed_file(self, buffer: type[TextBuffer], filename: str, compression: str, line_ending: str) -> int:
+        try:
+            write_lines(filename, compression, (buffer.get_line(y) + line_ending for y in range(buffer.get_line_count())))
+        except Exception:
+            return -1
+
+        self.filename = filename
+        self.compression = compression
+        self.line_changes.mark_saved()
+
+        return os.path.getsize(filename)
+
+
+    #Reads every line of an open file, without newlines. A file always has at least one line, even if it's empty.
+    @staticmethod
+    def read_lines(file: TextIO) -> list[str]:
+        return list(IOHandler.iter_lines(file))
+
+
+    #Yields every line of an open file as it's read, without newlines, so a file can be loaded without first reading all of it into memory. A
+    #file always has at least one line, even if it's empty.
+    @staticmethod
+    def iter_lines(file: TextIO) -> Iterator[str]:
+        empty = True
+
+        for line in file:
+            empty = False
+            yield line.replace("\n", "")
+
+        if empty:
+            yield ""
+
+
     #Takes a buffer and a filename, it then stores the file in the buffer, returns the number of bytes read if no errors occurred. If an error
     #occurred it returns "-1".
     def load_file(self, buffer: type[TextBuffer], filename: str) -> list[Line] | int:
         #This try block is to avoid creating a security hole that might allow a user to access files without permission.
         try:
             path = os.path.join(os.getcwd(), filename)
-            file = open(filename, "r")
+            #Compressed files are decompressed as they are read.
+            compression = detect_format(filename)
+            file = open_text(filename, compression)
 
         #In case an error occurred.
         except:
             return -1
         else:
-            #If the file could be opened set the filename.
-            self.filename = filename
-            file_contents = []
+            #The lines are added to the buffer as they are read, without keeping a copy of the whole file.
+            try:
+                file_contents = [Line(line) for line in self.iter_lines(file)]
+            except:
+                return -1
+            finally:
+                file.close()
 
-            for line in file.readlines():
-                #We remove newlines from the file in case there are any.
-                line = line.replace("\n", "")
-                #We add the line to the temporary buffer.
-                file_contents.append(Line(line))
+            #If the file was closed successfully that means that it was opened and read correctly.
+            return self.load_lines(buffer, filename, file_contents, compression)
 
-            #We set the editor buffer to the loaded buffer.
-            buffer.set_buffer(file_contents)    
 
-            #Since we've just loaded a file it's unmodified, it's no longer dirty.
-            self.dirty = False
+    #Sets the buffer to the lines of a file that were already read, with the file's compression format. Returns the size of the file, or "-1" if
+    #it no longer exists.
+    def load_lines(self, buffer: type[TextBuffer], filename: str, lines: list[Line], compression: Optional[str]) -> int:
+        #Set the filename.
+        self.filename = filename
+        self.compression = compression
 
-            #If the file was closed successfully that means that it was opened and read correctly, return the number of bytes read.
-            return os.path.getsize(path)
\ No newline at end of file
+        #We set the editor buffer to the loaded buffer.
+        buffer.set_buffer(lines)
+
+        #Since we've just loaded a file it's unmodified, it's no longer dirty.
+        self.line_changes.mark_saved()
+
+        try:
+            return os.path.getsize(filename)
+        except OSError:
+            return -1
\ No newline at end of file
@@ -0,0 +1,228 @@
+import os, os.path, struct, threading
+
+from buffer.buffer import Line, TextBuffer
+
+
+#Keeps an append-only journal of every edit done to the buffer in a small binary file next to the edited file, so unsaved changes can be
+#recovered if the editor dies. Edits are only stored in memory when they happen, a background thread writes them to disk periodically, so
+#editing never waits on the disk.
+class EditJournal:
+    #The journal starts with a header identifying the version of the file the edits apply to: a magic string, the file's modification time and
+    #its size. Each record after it is the start line, the number of replaced lines, the number of new lines, the length of the text and the new
+    #lines joined by newlines.
+    MAGIC = b"CEJ1"
+    HEADER = struct.Struct("<4sqq")
+    RECORD = struct.Struct("<IIII")
+
+    def __init__(self, buffer: type[TextBuffer], flush_time: float) -> None:
+        self.buffer = buffer
+        #How often, in seconds, the pending edits are written to disk.
+        self.flush_time = flush_time
+
+        #The path of the journal being written and the header for it, "None" when no file is being journaled.
+        self.journal_path = None
+        self.header = None
+        #The open journal file, it's opened by the background thread when the first edit has to be written.
+        self.journal_file = None
+        #Edits waiting to be written, as tuples of "(start, old_count, lines)".
+        self.pending = []
+        #While "True" edits aren't journaled, used for lines that are already in the file, see "file_grew".
+        self.paused = False
+
+        #The variables above are shared with the background thread. "lock" protects the path and the pending edits, it's only held for a moment
+        #so editing never waits for it, "file_lock" protects the file and header and is held while writing. When both are needed "file_lock" is
+        #always acquired first.
+        self.lock = threading.Lock()
+        self.file_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+
+    #Returns the path of the journal for the given file.
+    def get_journal_path(self, filename: str) -> str:
+        directory, name = os.path.split(os.path.abspath(filename))
+        return os.path.join(directory, f".{name}.journal")
+
+
+    #Returns the header for the current version of the given file.
+    def _make_header(self, filename: str) -> bytes:
+        stat = os.stat(filename)
+        return self.HEADER.pack(self.MAGIC, stat.st_mtime_ns, stat.st_size)
+
+
+    #Returns "True" if there's a journal with edits for the current version of the given file.
+    def has_journal(self, filename: str) -> bool:
+        try:
+            with open(self.get_journal_path(filename), "rb") as file:
+                header = file.read(self.HEADER.size)
+                return header == self._make_header(filename) and file.read(1) != b""
+        except OSError:
+            return False
+
+
+    #Applies the edits stored in the journal of the given file to the buffer, which must contain the file. Returns "True" if any edit was applied.
+    #A record that was only partially written when the editor died is ignored.
+    def replay(self, filename: str) -> bool:
+        try:
+            with open(self.get_journal_path(filename), "rb") as file:
+                contents = file.read()
+        except OSError:
+            return False
+
+        lines = self.buffer.get_buffer().copy()
+        position = self.HEADER.size
+        replayed = False
+
+        while position + self.RECORD.size <= len(contents):
+            start, old_count, new_count, length = self.RECORD.unpack_from(contents, position)
+            position += self.RECORD.size
+
+            if position + length > len(contents):
+                break
+
+            text = contents[position:position + length].decode("utf-8", "surrogatepass")
+            position += length
+
+            new_lines = (text.split("\n") if new_count > 0 else [])
+            lines[start:start + old_count] = [Line(line) for line in new_lines]
+            replayed = True
+
+        #The replayed edits are already in the journal, they aren't journaled again.
+        if replayed:
+            paused = self.paused
+            self.paused = True
+            self.buffer.set_buffer(lines)
+            self.paused = paused
+
+        return replayed
+
+
+    #Starts journaling the edits to the given file, the current buffer must match the file on disk. If "keep" is "True" the existing journal is
+    #kept and new edits are appended to it, which is used after replaying it, otherwise it's deleted. The journal of another file that was
+    #being written is left as it is, its pending edits are dropped, they may be for the new file.
+    def start(self, filename: str, keep: bool = False) -> None:
+        journal_path = self.get_journal_path(filename)
+
+        with self.lock:
+            same_journal = self.journal_path == journal_path
+            if not same_journal:
+                self.pending = []
+
+        self.stop(not keep and same_journal)
+
+        with self.file_lock, self.lock:
+            if not keep:
+                try:
+                    os.remove(journal_path)
+                except OSError:
+                    pass
+
+            self.header = (None if keep else self._make_header(filename))
+            self.journal_path = journal_path
+
+        self.buffer.add_change_callback(self.buffer_changed)
+
+        if self.thread == None:
+            self.stop_event.clear()
+            self.thread = threading.Thread(target = self._flush_loop, daemon = True)
+            self.thread.start()
+
+
+    #Stops journaling, the pending edits are written first. If "delete" is "True" the journal is deleted, used when the edits no longer need to
+    #be recovered, like after saving.
+    def stop(self, delete: bool) -> None:
+        self.buffer.remove_change_callback(self.buffer_changed)
+
+        if not delete:
+            self.flush()
+
+        with self.file_lock, self.lock:
+            if self.journal_file != None:
+                self.journal_file.close()
+                self.journal_file = None
+
+            if delete and self.journal_path != None:
+                try:
+                    os.remove(self.journal_path)
+                except OSError:
+                    pass
+
+            self.journal_path = None
+            self.pending = []
+
+
+    def set_paused(self, paused: bool) -> None:
+        self.paused = paused
+
+
+    #Called when lines appended to the given file were added to the buffer while the journal was paused, the buffer must match the file again.
+    #If no edit was journaled yet only the header is updated to the new version of the file, otherwise the journal is started again.
+    def file_grew(self, filename: str) -> None:
+        with self.file_lock, self.lock:
+            if self.journal_path == None:
+                return
+
+            if self.journal_file == None and self.header != None and self.pending == []:
+                try:
+                    self.header = self._make_header(filename)
+                    return
+                except OSError:
+                    pass
+
+        self.start(filename)
+
+
+    #Change callback for the buffer, it only stores the edit, which is cheap. When the whole buffer is replaced, like when undoing, the pending
+    #edits are dropped since the new lines replace their result, so they are never written.
+    def buffer_changed(self, start: int, old_count: int, new_count: int) -> None:
+        if self.paused:
+            return
+
+        lines = [self.buffer.get_line(y) for y in range(start, start + new_count)]
+
+        with self.lock:
+            if self.journal_path != None:
+                if start == 0 and new_count == self.buffer.get_line_count():
+                    self.pending = []
+                self.pending.append((start, old_count, lines))
+
+
+    #Writes every pending edit to the journal.
+    def flush(self) -> None:
+        with self.file_lock:
+            with self.lock:
+                pending = self.pending
+                self.pending = []
+
+                if pending == [] or self.journal_path == None:
+                    return
+
+            try:
+                if self.journal_file == None:
+                    #If there's a header the journal is new, any old journal is overwritten.
+                    if self.header != None:
+                        self.journal_file = open(self.journal_path, "wb")
+                        self.journal_file.write(self.header)
+                        self.header = None
+                    else:
+                        self.journal_file = open(self.journal_path, "ab")
+
+                records = []
+                for (start, old_count, lines) in pending:
+                    text = "\n".join(lines).encode("utf-8", "surrogatepass")
+                    records.append(self.RECORD.pack(start, old_count, len(lines), len(text)) + text)
+
+                self.journal_file.write(b"".join(records))
+                self.journal_file.flush()
+                os.fsync(self.journal_file.fileno())
+
+            #If the journal can't be written, for example because the folder is read-only, we stop journaling instead of failing every time.
+            except OSError:
+                with self.lock:
+                    self.journal_path = None
+
+
+    #Runs in the background thread, writing the pending edits every "flush_time" seconds.
+    def _flush_loop(self) -> None:
+        while not self.stop_event.wait(self.flush_time):
+            self.flush()
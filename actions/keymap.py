@@ -0,0 +1,162 @@
+import curses, curses.ascii, itertools, time
+from typing import Optional
+
+
+#Maps keys to the names of the actions they run. The bindings are read from the configuration, each action has one or more key sequences, a
+#sequence of several keys, like "Ctrl+X Ctrl+S", is a chord whose keys are pressed one after another. The sequences are stored in a prefix trie
+#of dictionaries, every node maps a key to the next node or to the name of an action, so each key is looked up with a single dictionary access.
+#If the next key of a chord isn't pressed before the chord timeout the chord is forgotten.
+class Keymap:
+    #The keys that have a name, some names have several key codes, like "Enter" which is sent as a carriage return or a line feed.
+    KEY_NAMES = {"esc" : [curses.ascii.ESC], "enter" : [curses.ascii.CR, curses.ascii.LF], "tab" : [curses.ascii.TAB],
+        "backspace" : [curses.ascii.BS], "delete" : [curses.KEY_DC], "insert" : [curses.KEY_IC], "up" : [curses.KEY_UP],
+        "down" : [curses.KEY_DOWN], "left" : [curses.KEY_LEFT], "right" : [curses.KEY_RIGHT], "home" : [curses.KEY_HOME], "end" : [curses.KEY_END],
+        "pageup" : [curses.KEY_PPAGE], "pagedown" : [curses.KEY_NPAGE], "space" : [" "]}
+    KEY_NAMES.update({f"f{number}" : [curses.KEY_F0 + number] for number in range(1, 13)})
+
+    def __init__(self, bindings: dict[str, str | list[str]], actions: set[str], chord_timeout: float) -> None:
+        self.chord_timeout = chord_timeout
+
+        #The root of the trie.
+        self.root = {}
+        #The key sequences of each action, as written in the configuration.
+        self.action_keys = {}
+        #The descriptions of the bindings that couldn't be added.
+        self.errors = []
+
+        #The keys pressed so far of an unfinished chord, the node they lead to and when the last one was pressed.
+        self.pending_keys = []
+        self.pending_node = None
+        self.pending_time = 0
+
+        for (action, sequences) in bindings.items():
+            if action not in actions:
+                self.errors.append(f"Unknown action \"{action}\" in the key bindings")
+                continue
+
+            for sequence in ([sequences] if isinstance(sequences, str) else sequences):
+                self.bind(action, sequence)
+
+
+    #Adds a key sequence to the trie, if the sequence is invalid or conflicts with another binding an error is stored instead.
+    def bind(self, action: str, sequence: str) -> None:
+        try:
+            alternatives = [self.parse_key(name) for name in sequence.split()]
+        except ValueError as error:
+            self.errors.append(f"Invalid key binding \"{sequence}\" for \"{action}\": {error}")
+            return
+
+        if alternatives == []:
+            self.errors.append(f"Empty key binding for \"{action}\"")
+            return
+
+        #Every combination of the codes of the keys is added, so "Enter" works both as a carriage return and as a line feed. They are all checked
+        #before adding any, so a binding that conflicts is never partially added.
+        combinations = list(itertools.product(*alternatives))
+
+        for keys in combinations:
+            node = self.root
+
+            #Keys that aren't in the trie yet lead to an empty node, nothing after them can conflict.
+            for key in keys[:-1]:
+                node = node.get(key, {})
+
+                if not isinstance(node, dict):
+                    self.errors.append(f"Key binding \"{sequence}\" for \"{action}\" starts with the keys of \"{node}\"")
+                    return
+
+            if keys[-1] in node:
+                self.errors.append(f"Key binding \"{sequence}\" for \"{action}\" is already used")
+                return
+
+        for keys in combinations:
+            node = self.root
+
+            for key in keys[:-1]:
+                node = node.setdefault(key, {})
+
+            node[keys[-1]] = action
+
+        self.action_keys.setdefault(action, []).append(sequence)
+
+
+    #Returns the key codes a key name can be sent as. Names are case insensitive, "Ctrl+<letter>" is a key pressed with "Ctrl" and a single
+    #character is that character.
+    def parse_key(self, name: str) -> list[int | str]:
+        if len(name) == 1:
+            return [name]
+
+        lowercase_name = name.lower()
+
+        if lowercase_name.startswith("ctrl+") and len(name) == 6 and name[5].isascii() and name[5].isalpha():
+            return [ord(name[5].upper()) - 64]
+
+        if lowercase_name in self.KEY_NAMES:
+            return self.KEY_NAMES[lowercase_name]
+
+        raise ValueError(f"unknown key \"{name}\"")
+
+
+    #Returns the name of a key code, for showing unfinished chords.
+    def get_key_name(self, key: int | str) -> str:
+        if isinstance(key, str):
+            return key
+
+        for (name, keys) in self.KEY_NAMES.items():
+            if key in keys:
+                return name.capitalize()
+
+        if 1 <= key <= 26:
+            return f"Ctrl+{chr(key + 64)}"
+
+        return str(key)
+
+
+    #Looks up a pressed key. Returns the name of the action if it completes a key sequence, otherwise returns "None", either because the key
+    #isn't bound, or because it's part of an unfinished chord.
+    def feed(self, key: int | str) -> Optional[str]:
+        node = (self.root if self.pending_node == None else self.pending_node).get(key)
+
+        if isinstance(node, dict):
+            self.pending_keys.append(key)
+            self.pending_node = node
+            self.pending_time = time.time()
+            return None
+
+        self.pending_keys = []
+        self.pending_node = None
+        return node
+
+
+    #Returns the keys pressed so far of an unfinished chord.
+    def get_pending_keys(self) -> list[int | str]:
+        return self.pending_keys
+
+
+    #Returns the keys of a sequence as text, like "Ctrl+X Ctrl+S".
+    def get_sequence_name(self, keys: list[int | str]) -> str:
+        return " ".join(self.get_key_name(key) for key in keys)
+
+
+    #Returns whether an action has any keys.
+    def is_bound(self, action: str) -> bool:
+        return action in self.action_keys
+
+
+    #Returns the first key sequence of an action as written in the configuration, or the action's name in quotes if it has no keys.
+    def describe(self, action: str) -> str:
+        if action not in self.action_keys:
+            return f"\"{action}\""
+
+        return self.action_keys[action][0]
+
+
+    def get_errors(self) -> list[str]:
+        return self.errors
+
+
+    #Forgets an unfinished chord if its next key wasn't pressed in time, should be called every editor loop.
+    def chord_handler(self) -> None:
+        if self.pending_node != None and time.time() >= self.pending_time + self.chord_timeout:
+            self.pending_keys = []
+            self.pending_node = None
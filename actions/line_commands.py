@@ -0,0 +1,200 @@
+import codecs, os, re, signal, subprocess, threading
+from typing import Callable, Optional
+
+from actions.background_job import BackgroundJob
+
+
+#Commands that transform whole lines: sort, unique, keep, drop and filter, which pipes the lines through a shell command. They run on a copy of
+#the lines in a background job and return the new lines, the editor then replaces the original lines with them. Lines are only copied as
+#references, the strings themselves are shared.
+class LineCommands:
+    #How many lines are processed between progress updates and cancellation checks.
+    CHECK_LINES = 10000
+    #The maximum number of bytes read at once from a filter command.
+    READ_SIZE = 65536
+
+    def __init__(self) -> None:
+        #The available commands, their description and whether they need an argument.
+        self.commands = {
+            "sort" : ("Sorting", self.sort_lines, False),
+            "unique" : ("Removing duplicates", self.unique_lines, False),
+            "keep" : ("Keeping matching lines", self.keep_lines, True),
+            "drop" : ("Dropping matching lines", self.drop_lines, True),
+            "filter" : ("Filtering through command", self.filter_lines, True)
+        }
+
+
+    #Returns the names of every command.
+    def get_command_names(self) -> list[str]:
+        return list(self.commands)
+
+
+    #Parses a command with the format "[<start>,<end>] <command> [<argument>]", where the range is optional and uses line numbers starting at one.
+    #Returns a tuple with the first line index, the number of lines, the command name and its argument. If the command is invalid returns an error
+    #message instead.
+    def parse_command(self, text: str, line_count: int) -> tuple[int, int, str, str] | str:
+        words = text.strip().split(" ", 1)
+        start, end = 1, line_count
+
+        #The first word is a range if it contains a comma.
+        if words[0] != "" and "," in words[0]:
+            try:
+                start, end = [int(number) for number in words[0].split(",")]
+            except ValueError:
+                return f"Invalid line range \"{words[0]}\""
+
+            if not (1 <= start <= end <= line_count):
+                return f"Line range out of bounds, the file has {line_count} lines"
+
+            words = (words[1].strip().split(" ", 1) if len(words) > 1 else [""])
+
+        name = words[0]
+        argument = (words[1].strip() if len(words) > 1 else "")
+
+        #"!<command>" is a shorter way of writing "filter <command>".
+        if name.startswith("!"):
+            argument = (name[1:] + " " + argument).strip()
+            name = "filter"
+
+        if name not in self.commands:
+            return f"Unknown command \"{name}\", the available ones are: {', '.join(self.commands)}"
+
+        if self.commands[name][2] and argument == "":
+            return f"The command \"{name}\" needs an argument"
+
+        return (start - 1, end - start + 1, name, argument)
+
+
+    #Starts the given command on the lines in a background job, "on_done" receives the new lines. The job's result is "None" if it was
+    #cancelled.
+    def start(self, name: str, argument: str, lines: list[str], on_done: Callable[[Optional[list[str]]], None]) -> BackgroundJob:
+        description, function, _ = self.commands[name]
+
+        return BackgroundJob(description, lambda job: function(lines, argument, job), on_done)
+
+
+    #Sorts the lines. The lines are already in memory in the buffer and the sorted list only has references to them, so it's done in memory,
+    #writing sorted runs to temporary files wouldn't lower the memory used.
+    def sort_lines(self, lines: list[str], argument: str, job: BackgroundJob) -> Optional[list[str]]:
+        return sorted(lines)
+
+
+    #Removes repeated lines, keeping the first appearance of each line.
+    def unique_lines(self, lines: list[str], argument: str, job: BackgroundJob) -> Optional[list[str]]:
+        seen = set()
+        result = []
+
+        for i, line in enumerate(lines):
+            if line not in seen:
+                seen.add(line)
+                result.append(line)
+
+            if i % self.CHECK_LINES == 0:
+                job.set_progress(i / len(lines))
+                if job.is_cancelled():
+                    return None
+
+        return result
+
+
+    #Keeps only the lines that match the regex in "argument".
+    def keep_lines(self, lines: list[str], argument: str, job: BackgroundJob) -> Optional[list[str]]:
+        return self._filter_lines(lines, argument, True, job)
+
+
+    #Removes the lines that match the regex in "argument".
+    def drop_lines(self, lines: list[str], argument: str, job: BackgroundJob) -> Optional[list[str]]:
+        return self._filter_lines(lines, argument, False, job)
+
+
+    #Keeps the lines that match, or don't match, the regex depending on "keep".
+    def _filter_lines(self, lines: list[str], regex: str, keep: bool, job: BackgroundJob) -> Optional[list[str]]:
+        pattern = re.compile(regex)
+        result = []
+
+        for start in range(0, len(lines), self.CHECK_LINES):
+            result.extend(line for line in lines[start:start + self.CHECK_LINES] if (pattern.search(line) != None) == keep)
+
+            job.set_progress(start / len(lines))
+            if job.is_cancelled():
+                return None
+
+        return result
+
+
+    #Pipes the lines through the shell command in "argument" and returns its output lines. The lines are written to the command in chunks by one
+    #thread while its output is read in chunks by this one, so neither the input nor the output is ever held as a single string, and a command
+    #that produces output while it reads doesn't block.
+    def filter_lines(self, lines: list[str], argument: str, job: BackgroundJob) -> Optional[list[str]]:
+        #The command runs in its own process group, so cancelling also kills any process started by the shell.
+        process = subprocess.Popen(argument, shell = True, stdin = subprocess.PIPE, stdout = subprocess.PIPE, stderr = subprocess.PIPE,
+            start_new_session = True)
+        finished = threading.Event()
+        errors = []
+
+        def write_input() -> None:
+            try:
+                for start in range(0, len(lines), self.CHECK_LINES):
+                    if job.is_cancelled():
+                        break
+
+                    process.stdin.write(("\n".join(lines[start:start + self.CHECK_LINES]) + "\n").encode("utf-8", "surrogatepass"))
+                    job.set_progress(start / len(lines))
+
+                process.stdin.close()
+            #The command may exit without reading all its input.
+            except OSError:
+                pass
+
+        def read_errors() -> None:
+            errors.append(process.stderr.read())
+
+        #The command may block without producing output, so cancelling kills it from another thread.
+        def watch_cancel() -> None:
+            while not finished.is_set():
+                if job.cancel_event.wait(0.1):
+                    try:
+                        os.killpg(process.pid, signal.SIGKILL)
+                    except OSError:
+                        pass
+                    return
+
+        threads = [threading.Thread(target = function, daemon = True) for function in (write_input, read_errors, watch_cancel)]
+        for thread in threads:
+            thread.start()
+
+        decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        result = []
+        partial_line = ""
+
+        try:
+            #Only complete lines are added to the result, the last part of each chunk is kept until its newline arrives.
+            while True:
+                chunk = process.stdout.read1(self.READ_SIZE)
+                if chunk == b"":
+                    break
+
+                new_lines = (partial_line + decoder.decode(chunk)).split("\n")
+                partial_line = new_lines.pop()
+                result.extend(new_lines)
+                job.status = f"{len(result)} lines read"
+
+            partial_line += decoder.decode(b"", True)
+            if partial_line != "":
+                result.append(partial_line)
+
+            return_code = process.wait()
+
+        finally:
+            finished.set()
+            for thread in threads:
+                thread.join()
+
+        if job.is_cancelled():
+            return None
+
+        if return_code != 0:
+            error_lines = b"".join(errors).decode(errors = "replace").strip().splitlines()
+            raise RuntimeError(error_lines[-1] if error_lines != [] else f"exit status {return_code}")
+
+        return result
@@ -0,0 +1,38 @@
+#Records a sequence of keys so it can be replayed later. Only the keys of editing and movement actions are recorded, actions that open a prompt,
+#like find, would stop the replay waiting for input, so they are left out.
+class Macro:
+    #The actions whose keys are recorded, besides typed characters. "cursor below" adds a cursor and "cancel" removes the additional cursors.
+    RECORDED_ACTIONS = {"backspace", "delete", "newline", "indent", "cursor right", "cursor left", "cursor up", "cursor down", "line start",
+        "line end", "page up", "page down", "cursor below", "cancel"}
+
+    def __init__(self) -> None:
+        self.recording = False
+        #The recorded keys.
+        self.keys = []
+
+
+    #Starts recording a new macro, the previous one is discarded.
+    def start_recording(self) -> None:
+        self.recording = True
+        self.keys = []
+
+
+    #Stops recording, returns the number of recorded keys.
+    def stop_recording(self) -> int:
+        self.recording = False
+        return len(self.keys)
+
+
+    #Records the keys of an action, or of a typed character if the action is "None", if a macro is being recorded and it's one of the recorded
+    #actions. The keys are stored instead of the action so replaying them goes through the same key bindings.
+    def record(self, keys: list[int | str], action: str | None) -> None:
+        if self.recording and (action == None or action in self.RECORDED_ACTIONS):
+            self.keys.extend(keys)
+
+
+    def get_recording(self) -> bool:
+        return self.recording
+
+
+    def get_keys(self) -> list[int | str]:
+        return self.keys
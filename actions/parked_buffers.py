@@ -0,0 +1,49 @@
+import os
+from typing import Optional
+
+from buffer.buffer import Line
+
+
+#Keeps the lines of unmodified files after another file is opened, used in server mode so opening one of them again doesn't read it. A parked
+#file is only used if its modification time and size are the ones it had when it was loaded, the lines are given back to the buffer as they are,
+#with their column maps. When there are too many parked files the one parked first is dropped.
+class ParkedBuffers:
+    def __init__(self, max_count: int) -> None:
+        self.max_count = max_count
+        #The parked files by absolute path, as tuples of their "(mtime, size)", their lines and their compression format. Dictionaries keep their
+        #insertion order, so the first one is the oldest.
+        self.parked = {}
+
+
+    #Returns the "(mtime, size)" of a file, or "None" if it can't be read.
+    @staticmethod
+    def stat_file(filename: str) -> Optional[tuple[int, int]]:
+        try:
+            stat = os.stat(filename)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+
+    #Parks the lines of a file, "file_stat" is the "(mtime, size)" of the file the lines were loaded from. The lines must no longer be used by the
+    #buffer.
+    def park(self, filename: str, file_stat: tuple[int, int], lines: list[Line], compression: Optional[str]) -> None:
+        if self.max_count <= 0:
+            return
+
+        filename = os.path.abspath(filename)
+        self.parked.pop(filename, None)
+        self.parked[filename] = (file_stat, lines, compression)
+
+        while len(self.parked) > self.max_count:
+            del self.parked[next(iter(self.parked))]
+
+
+    #Takes the parked lines of a file out, with its compression format, returns "None" if the file isn't parked or changed since it was loaded.
+    def take(self, filename: str) -> Optional[tuple[list[Line], Optional[str]]]:
+        parked = self.parked.pop(os.path.abspath(filename), None)
+
+        if parked == None or parked[0] != self.stat_file(filename):
+            return None
+
+        return (parked[1], parked[2])
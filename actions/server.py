@@ -0,0 +1,147 @@
+import curses, json, os, os.path, socket
+from typing import Optional
+
+
+#Server mode, the editor runs as a long-lived process that terminals attach to with "console_client.py". The client sends the file descriptors of
+#its terminal over a Unix domain socket, they replace the server's standard input and output, so curses draws on the client's terminal and reads
+#its keys, nothing else goes through the socket. Quitting detaches the terminal and the server waits for the next client, keeping the loaded
+#file, the unmodified files opened before it, the column maps of their lines and the file finder's index, so attaching again doesn't pay for the
+#interpreter startup, the configuration, curses or loading the file. Only one terminal can be attached at a time.
+
+#The largest request a client can send.
+MAX_REQUEST_SIZE = 65536
+
+
+#Returns the path of the server's socket, in the runtime folder if there's one, otherwise in the temporary folder. It includes the user ID so
+#each user has their own server.
+def get_socket_path() -> str:
+    folder = os.environ.get("XDG_RUNTIME_DIR") or "/tmp"
+    return os.path.join(folder, f"console-editor-{os.getuid()}.sock")
+
+
+class EditorServer:
+    def __init__(self, socket_path: str) -> None:
+        self.socket_path = socket_path
+
+        #A socket file left by a server that died is removed, if a server is running the bind fails.
+        try:
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            probe.connect(socket_path)
+            probe.close()
+            raise OSError(f"a server is already listening on {socket_path}")
+        except (FileNotFoundError, ConnectionRefusedError):
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+
+        #The socket is only accessible by the user, whoever connects gets to control the editor.
+        old_umask = os.umask(0o177)
+        try:
+            self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.listener.bind(socket_path)
+        finally:
+            os.umask(old_umask)
+
+        self.listener.listen(4)
+        #The connection of the attached client, "None" while detached.
+        self.client = None
+        #Set when a client asked the server to stop, it stops once the attached terminal detaches.
+        self.stop_requested = False
+
+
+    #Waits for a client to attach and attaches its terminal. Returns the client's request, a dictionary with its working directory "cwd", the file
+    #to open "filename", which may be "None", and the time it was launched "time". Returns "None" if a client asked the server to stop.
+    def wait_client(self) -> Optional[dict]:
+        self.listener.setblocking(True)
+
+        while not self.stop_requested:
+            connection, _ = self.listener.accept()
+
+            fds = []
+            try:
+                data, fds, _, _ = socket.recv_fds(connection, MAX_REQUEST_SIZE, 2)
+                request = json.loads(data)
+            except (OSError, ValueError):
+                request = None
+
+            if isinstance(request, dict) and request.get("stop", False):
+                self.stop_requested = True
+
+            #The terminal isn't attached if the request isn't valid or asks to stop, any descriptor received is closed.
+            if not isinstance(request, dict) or self.stop_requested or len(fds) != 2:
+                for fd in fds:
+                    os.close(fd)
+                connection.close()
+                continue
+
+            #The terminal replaces the standard input and output, which are the ones curses uses.
+            os.dup2(fds[0], 0)
+            os.dup2(fds[1], 1)
+            for fd in fds:
+                os.close(fd)
+
+            self.client = connection
+            self.client.setblocking(False)
+            self.listener.setblocking(False)
+
+            return request
+
+        return None
+
+
+    #Should be called every editor loop while a terminal is attached. Turns away clients that try to attach, and resizes curses when the client
+    #reports that its terminal was resized. Returns "False" if the client disconnected, like when its terminal was closed.
+    def client_handler(self) -> bool:
+        try:
+            connection, _ = self.listener.accept()
+            connection.sendall(b"busy")
+            connection.close()
+        except BlockingIOError:
+            pass
+        except OSError:
+            pass
+
+        try:
+            data = self.client.recv(4096)
+        except BlockingIOError:
+            return True
+        except OSError:
+            return False
+
+        if data == b"":
+            return False
+
+        self.resize_terminal()
+        return True
+
+
+    #Makes curses use the size of the attached terminal, the server doesn't get its resize signals.
+    @staticmethod
+    def resize_terminal() -> None:
+        try:
+            columns, lines = os.get_terminal_size(1)
+            curses.resizeterm(lines, columns)
+        except (OSError, curses.error):
+            pass
+
+
+    #Detaches the terminal, curses must have been ended first. The standard input and output are pointed at "/dev/null" until the next client
+    #attaches, and closing the connection lets the client exit.
+    def detach(self) -> None:
+        null = os.open(os.devnull, os.O_RDWR)
+        os.dup2(null, 0)
+        os.dup2(null, 1)
+        os.close(null)
+
+        if self.client != None:
+            self.client.close()
+            self.client = None
+
+
+    #Closes the socket and removes its file.
+    def close(self) -> None:
+        self.listener.close()
+
+        try:
+            os.remove(self.socket_path)
+        except OSError:
+            pass
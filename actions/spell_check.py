@@ -0,0 +1,185 @@
+import hashlib, marshal, os, os.path, queue, re, threading
+from typing import Optional
+
+from buffer.buffer import TextBuffer
+
+
+#Checks the spelling of the lines shown on the screen against a word list, like "/usr/share/dict/words". The words are kept in a hash set, and
+#the set is cached on disk in "marshal" format, so after the first time the word list doesn't have to be read and split again. The words are
+#loaded and the lines are checked in a background thread, the editor only hands it the text of the lines and takes the results, so typing never
+#waits on it. The misspellings of each line are kept until the line changes, only lines that changed since they were checked, or were never
+#shown, are checked again.
+class SpellChecker:
+    #Increased when the format of the cache changes.
+    CACHE_VERSION = 1
+    #Letters, with apostrophes between them, like "don't". Words with digits or underscores, like identifiers, aren't words.
+    WORD = re.compile(r"(?<![\w'])[^\W\d_]+(?:'[^\W\d_]+)*(?![\w'])")
+    #Lines longer than this aren't checked, they are rarely prose.
+    MAX_LINE_LENGTH = 10000
+
+    def __init__(self, buffer: type[TextBuffer], dictionary_path: str, cache_folder: str) -> None:
+        self.buffer = buffer
+        self.dictionary_path = dictionary_path
+        #Each word list has its own cache file, named after the hash of its absolute path.
+        self.cache_path = os.path.join(cache_folder, hashlib.sha1(os.path.abspath(dictionary_path).encode(errors = "replace")).hexdigest() + ".words")
+
+        #The words of the word list, in lowercase, "None" until they are loaded. "load_error" is set if they couldn't be loaded.
+        self.words = None
+        self.load_error = None
+
+        #The misspellings of each line, as lists of tuples with their start and end, "None" for the lines that haven't been checked since they
+        #changed. It's "None" while spell checking is off.
+        self.results = None
+        #The lines that were displayed without results, they are checked next.
+        self.wanted = set()
+        #Whether a batch of lines is being checked, only one is checked at a time.
+        self.checking = False
+
+        #Batches of "(y_pos, text)" tuples for the thread, and the results it sends back as "(y_pos, text, misspellings)" tuples.
+        self.requests = queue.Queue()
+        self.responses = queue.Queue()
+        self.thread = threading.Thread(target = self._run, daemon = True)
+        self.thread.start()
+
+
+    #Starts checking the buffer, the results are updated as it's edited.
+    def start(self) -> None:
+        self.results = [None] * self.buffer.get_line_count()
+        self.wanted = set()
+        self.buffer.add_change_callback(self.buffer_changed)
+
+
+    #Stops checking the buffer, the word list stays loaded.
+    def stop(self) -> None:
+        self.buffer.remove_change_callback(self.buffer_changed)
+        self.results = None
+
+
+    def is_active(self) -> bool:
+        return self.results != None
+
+
+    #Change callback for the buffer, the edited lines have to be checked again.
+    def buffer_changed(self, start: int, old_count: int, new_count: int) -> None:
+        self.results[start:start + old_count] = [None] * new_count
+        #The wanted lines may have moved, the displayed ones are wanted again when the screen is drawn.
+        self.wanted = set()
+
+
+    #Returns the misspellings of a line, as tuples of their start and end. A line that hasn't been checked has none, it's checked soon.
+    def get_misspellings(self, y_pos: int) -> list[tuple[int, int]]:
+        misspellings = self.results[y_pos]
+
+        if misspellings == None:
+            self.wanted.add(y_pos)
+            return []
+
+        return misspellings
+
+
+    #Should be called every editor loop while spell checking is on. Takes the results of the thread and sends it the displayed lines that haven't
+    #been checked. Returns "True" if there are new results, so the screen has to be drawn again.
+    def update(self) -> bool:
+        new_results = False
+
+        while True:
+            try:
+                batch = self.responses.get_nowait()
+            except queue.Empty:
+                break
+
+            self.checking = False
+
+            #The lines may have moved or changed while they were checked, the results are only used if the line still has the text.
+            for (y, text, misspellings) in batch:
+                if y < len(self.results) and self.results[y] == None and self.buffer.get_line(y) == text:
+                    self.results[y] = misspellings
+                    new_results = True
+
+        if not self.checking and self.wanted != set():
+            batch = [(y, self.buffer.get_line(y)) for y in sorted(self.wanted) if y < len(self.results) and self.results[y] == None]
+            self.wanted = set()
+
+            if batch != []:
+                self.requests.put(batch)
+                self.checking = True
+
+        return new_results
+
+
+    #Returns the reason the word list couldn't be loaded, or "None".
+    def get_load_error(self) -> Optional[str]:
+        return self.load_error
+
+
+    #The thread loads the word list and checks the batches of lines it gets.
+    def _run(self) -> None:
+        self.load_words()
+
+        while True:
+            batch = self.requests.get()
+            self.responses.put([(y, text, self.check_line(text)) for (y, text) in batch])
+
+
+    #Returns the misspellings in a line. Words are looked up as they are and in lowercase, so both "Paris" and sentence initial words are found.
+    def check_line(self, text: str) -> list[tuple[int, int]]:
+        if self.words == None or len(text) > self.MAX_LINE_LENGTH:
+            return []
+
+        words = self.words
+        misspellings = []
+
+        for match in self.WORD.finditer(text):
+            word = match.group()
+
+            if len(word) > 1 and word not in words and word.lower() not in words:
+                #Possessives, like "editor's", aren't usually in word lists.
+                if not (word.endswith("'s") and word[:-2].lower() in words):
+                    misspellings.append(match.span())
+
+        return misspellings
+
+
+    #Loads the word list from the cache if it's up to date, otherwise reads it and stores it in the cache.
+    def load_words(self) -> None:
+        try:
+            stat = os.stat(self.dictionary_path)
+        except OSError as error:
+            self.load_error = f"Couldn't open the word list {self.dictionary_path}: {error.strerror}"
+            return
+
+        try:
+            with open(self.cache_path, "rb") as file:
+                cache = marshal.load(file)
+
+            if isinstance(cache, dict) and cache.get("version") == self.CACHE_VERSION and cache.get("mtime") == stat.st_mtime_ns and \
+                cache.get("size") == stat.st_size:
+                self.words = cache["words"]
+                return
+        except:
+            pass
+
+        try:
+            with open(self.dictionary_path, encoding = "utf-8", errors = "replace") as file:
+                words = frozenset(word.lower() for word in file.read().split())
+        except OSError as error:
+            self.load_error = f"Couldn't read the word list {self.dictionary_path}: {error.strerror}"
+            return
+
+        self.save_cache(words, stat)
+        self.words = words
+
+
+    #Stores the word list in the cache, failing to write it isn't an error, the word list will simply be read again next time.
+    def save_cache(self, words: frozenset[str], stat: os.stat_result) -> None:
+        cache = {"version" : self.CACHE_VERSION, "mtime" : stat.st_mtime_ns, "size" : stat.st_size, "words" : words}
+
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok = True)
+
+            #The cache is written to a temporary file first, so an editor reading it at the same time never sees half of it.
+            with open(self.cache_path + ".tmp", "wb") as file:
+                marshal.dump(cache, file)
+            os.replace(self.cache_path + ".tmp", self.cache_path)
+        except:
+            pass
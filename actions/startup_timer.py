@@ -0,0 +1,34 @@
+import time
+from typing import Optional
+
+
+#Measures the time it takes the editor to go from being launched to displaying its first frame.
+class StartupTimer:
+    def __init__(self) -> None:
+        #The time at which the editor was launched, the class should be created as early as possible.
+        self.start_time = time.perf_counter()
+        #Time to first frame, in seconds. It's "None" until the first frame has been displayed.
+        self.first_frame_time = None
+
+
+    #Measures again from the given time, a "time.perf_counter" value, used when a terminal attaches to the editor in server mode.
+    def restart(self, start_time: float) -> None:
+        self.start_time = start_time
+        self.first_frame_time = None
+
+
+    #Should be called after each frame is displayed. The first call records the time to first frame and returns "True", later calls return "False".
+    def frame_displayed(self) -> bool:
+        if self.first_frame_time != None:
+            return False
+
+        self.first_frame_time = time.perf_counter() - self.start_time
+        return True
+
+
+    #Returns the time to first frame in milliseconds, or "None" if no frame has been displayed yet.
+    def get_first_frame_time(self) -> Optional[float]:
+        if self.first_frame_time == None:
+            return None
+
+        return self.first_frame_time * 1000
@@ -0,0 +1,105 @@
+import os, time
+
+from buffer.buffer import TextBuffer
+
+
+#Follows a file that keeps growing, like a log, in the same way as "tail -f". The offset in the file is kept so only the bytes appended since the
+#last check are read, and only complete lines are added to the buffer. Log rotation, a new file replacing the followed one, and truncation are
+#detected and the file is followed again from its start.
+class TailFollow:
+    def __init__(self, check_time: float) -> None:
+        #How often, in seconds, the file is checked for new data.
+        self.check_time = check_time
+        self.last_check_time = 0
+
+        #Whether follow mode is enabled.
+        self.enabled = False
+        self.filename = None
+        #Offset in the file up to which it has been read, and the inode of the file, used to detect rotation.
+        self.offset = 0
+        self.inode = None
+        #Bytes of a line that hasn't been completed yet.
+        self.remainder = b""
+        #If "True" the first line read has to be joined to the last line of the buffer, because the file didn't end with a newline when following
+        #started.
+        self.join_last = False
+
+
+    #Starts following the given file, the buffer must contain the whole file. Returns "False" if the file couldn't be opened.
+    def start(self, filename: str) -> bool:
+        try:
+            with open(filename, "rb") as file:
+                stat = os.fstat(file.fileno())
+                file.seek(max(stat.st_size - 1, 0))
+                last_byte = file.read(1)
+        except OSError:
+            return False
+
+        self.enabled = True
+        self.filename = filename
+        self.offset = stat.st_size
+        self.inode = stat.st_ino
+        self.remainder = b""
+        #If the file doesn't end with a newline, or is empty, the last line of the buffer isn't complete.
+        self.join_last = last_byte != b"\n"
+
+        return True
+
+
+    #Stops following the file.
+    def stop(self) -> None:
+        self.enabled = False
+
+
+    #Should be called every editor loop. Reads the data appended to the file and adds the completed lines to the end of the buffer, returns the
+    #number of lines added or changed.
+    def follow_handler(self, buffer: type[TextBuffer]) -> int:
+        if not self.enabled or time.time() < self.last_check_time + self.check_time:
+            return 0
+
+        self.last_check_time = time.time()
+
+        try:
+            stat = os.stat(self.filename)
+        except OSError:
+            #The file may be in the middle of a rotation, it's checked again later.
+            return 0
+
+        #If the file was replaced or truncated we start reading it from the beginning, its lines are added after the ones we already have. An
+        #incomplete line of the old file will never be completed, so it's added as a line.
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            self.inode = stat.st_ino
+            self.offset = 0
+            self.remainder = (self.remainder + b"\n" if self.remainder != b"" else b"")
+            self.join_last = False
+
+        if stat.st_size == self.offset:
+            return 0
+
+        try:
+            with open(self.filename, "rb") as file:
+                file.seek(self.offset)
+                data = file.read(stat.st_size - self.offset)
+        except OSError:
+            return 0
+
+        self.offset += len(data)
+        data = self.remainder + data
+
+        #Only complete lines are added, the rest is kept until its newline arrives.
+        end = data.rfind(b"\n")
+        if end < 0:
+            self.remainder = data
+            return 0
+
+        self.remainder = data[end + 1:]
+        lines = data[:end].decode(errors = "replace").split("\n")
+        last_y = buffer.get_line_count() - 1
+
+        if self.join_last:
+            self.join_last = False
+            buffer.replace_lines(last_y, 1, [buffer.get_line(last_y) + lines[0]] + lines[1:])
+        else:
+            buffer.replace_lines(last_y + 1, 0, lines)
+
+        return len(lines)
@@ -30,6 +30,13 @@ class Undo:
         self.action_to_save = True
 
 
+    #Same as "set_undo" but the action is never merged with the previous one, even if it happened less than "snapshot_time" seconds ago. Used for
+    #actions that consist of many edits that have to be undone at once, like replaying a macro.
+    def set_separate_undo(self) -> None:
+        self.action_to_save = True
+        self.last_snapshot_time = 0
+
+
     #Must be called every time the buffer is modified.
     def undo_handler(self, buffer_value: type[TextBuffer], cursor_value: type[Cursor]) -> None:
         #If the undo stack is empty that means we have either loaded a new file or emptied the queue, to allow the user to undo to this state we add it
@@ -23,32 +23,43 @@ class CursesUtils():
         self.x_size = 0
         self.get_size()
 
-        #Gets filled with a reference to each possible colour pair.
+        #Gets filled with a reference to each initialized colour pair.
         self.colours = {}
-        #Fills "self.colours" with each possible colour pair.
-        self.generate_colours()
 
 
-    #Defines every possible colour pair(without attributes), and then relates their number with the corresponding name in the "self.colours"
-    #dictionary. The naming convention is: Foreground colour first and then the background colour, with an underscore separating both colours.
+    #Initializes the given colour pairs, and then relates their number with the corresponding name in the "self.colours" dictionary. The naming
+    #convention is: Foreground colour first and then the background colour, with an underscore separating both colours. Only the colours that
+    #are actually used get initialized, any other colour is initialized the first time it's requested in "get_colour".
     @final
-    def generate_colours(self) -> None:
+    def generate_colours(self, colour_names: list[str]) -> None:
+        for name in colour_names:
+            self._init_colour(name)
+
+
+    #Initializes a single colour pair from its name, returns "False" if the name isn't a valid colour.
+    @final
+    def _init_colour(self, name: str) -> bool:
         #Colour variables.
         colour_reference = {"BLACK" : curses.COLOR_BLACK, "BLUE" : curses.COLOR_BLUE, "CYAN" : curses.COLOR_CYAN,
         "GREEN" : curses.COLOR_GREEN, "MAGENTA" : curses.COLOR_MAGENTA, "RED" : curses.COLOR_RED, "WHITE" : curses.COLOR_WHITE,
         "YELLOW" : curses.COLOR_YELLOW}
+        colour_list = list(colour_reference)
 
-        colour_cont = 1
+        if name in self.colours:
+            return True
 
-        for col_1 in colour_reference:
-            for col_2 in colour_reference:
-                #Create each colour's name.
-                key = str(col_1) + "_" + str(col_2)
+        try:
+            col_1, col_2 = name.split("_")
+            #Each pair keeps the same number it would have if every pair was generated, that way the numbers don't depend on the order in which
+            #the colours are requested.
+            colour_cont = colour_list.index(col_1) * len(colour_list) + colour_list.index(col_2) + 1
+        except ValueError:
+            return False
 
-                curses.init_pair(colour_cont, colour_reference[col_1], colour_reference[col_2])
-                self.colours[key] = colour_cont
+        curses.init_pair(colour_cont, colour_reference[col_1], colour_reference[col_2])
+        self.colours[name] = colour_cont
 
-                colour_cont += 1
+        return True
 
 
     #Simplifies using the colour dictionary. Allows the user to use "self.get_colour(colour)" instead of 
@@ -57,11 +68,34 @@ class CursesUtils():
     def get_colour(self, colour: str) -> int:
         try:
             return curses.color_pair(self.colours[colour])
+        except KeyError:
+            #The colour hasn't been initialized yet, we try to do it now.
+            if self._init_colour(colour):
+                return curses.color_pair(self.colours[colour])
+
+            #(-1) is the default value for a white foreground and black background.
+            return curses.color_pair(-1)
         except:
             #(-1) is the default value for a white foreground and black background.
             return curses.color_pair(-1)
 
 
+    #Gets the pressed key without blocking. Printable characters, including any Unicode character, are returned as strings, every other key is
+    #returned as its key code. If no key was pressed returns "(-1)".
+    @final
+    def get_key(self) -> int | str:
+        try:
+            key = self.stdscr.get_wch()
+        except curses.error:
+            return -1
+
+        #Control characters are returned as strings by "get_wch", we turn them into key codes so they can be compared like the rest of the keys.
+        if isinstance(key, str) and not key.isprintable():
+            return ord(key)
+
+        return key
+
+
     #Gets the console size.
     @final
     def get_size(self) -> None:
@@ -0,0 +1,547 @@
+from typing import Optional
+
+from buffer.buffer import TextBuffer
+
+
+#Keeps the brackets of every line of the buffer and the nesting depth they lead to, used to find matching brackets and to indent new lines. Each
+#line is summarized by the change in depth it causes and the lowest depth it reaches before and after each of its brackets, relative to its
+#start. Only edited lines are summarized again. The lines are grouped in blocks of up to "2 * BLOCK_SIZE" lines, and the summaries of the blocks
+#are stored in a segment tree, so the line with the matching bracket is found in O(log n) plus O(BLOCK_SIZE) to look at the lines of a block,
+#the depth at the start of a line is a prefix sum. Adding or removing lines only changes the blocks the edit touches, and when that splits or
+#merges a block the tree is built again from the summaries of the blocks, which is O(n / BLOCK_SIZE). Matches are looked for in the nearby lines
+#before using the tree. The index is built the first time it's used, and replacing the whole buffer, like opening a file, only discards it.
+class BracketIndex:
+    #The closing bracket of each opening one and the other way around.
+    PAIRS = {"(" : ")", "[" : "]", "{" : "}"}
+    OPENING = {")" : "(", "]" : "[", "}" : "{"}
+    #The regular expressions for brackets and for the text between them, they are compiled when first needed, see "compile_patterns".
+    BRACKETS = None
+    NOT_BRACKETS = None
+    #The lowest depth of a line without brackets, larger than any real depth so the line is never a match.
+    NO_BRACKETS = 1 << 60
+    #The number of lines around the bracket where the match is looked for before using the tree.
+    NEARBY_LINES = 256
+    #The number of lines in each block of the tree, a block has between half and twice as many, except when there's only one.
+    BLOCK_SIZE = 256
+    #The number of bracket sequences whose summaries are kept, the cache is emptied when it's reached.
+    MAX_CACHED_SUMMARIES = 65536
+
+    def __init__(self, buffer: type[TextBuffer]) -> None:
+        self.buffer = buffer
+
+        #The summary of each line as tuples of "(depth change, lowest depth before a bracket, lowest depth after a bracket)", "None" while the
+        #index isn't built.
+        self.summaries = None
+        #The summaries of the bracket sequences already seen, many lines have the same brackets.
+        self.summary_cache = {}
+
+        #The number of lines and the summary of each block.
+        self.block_counts = []
+        self.block_summaries = []
+        #The segment tree of the blocks, stored in arrays where node "i" has children "2 * i" and "2 * i + 1" and the leaves start at "size".
+        #Each node has the number of lines, the depth change and the lowest depths of its blocks. "tree_valid" is "False" while the blocks and
+        #the tree aren't built, they are built the first time the tree is needed.
+        self.size = 0
+        self.counts = []
+        self.sums = []
+        self.mins_before = []
+        self.mins_after = []
+        self.tree_valid = False
+
+
+    #Compiles the regular expressions, "re" is only imported when brackets are first looked for.
+    @classmethod
+    def compile_patterns(cls) -> None:
+        if cls.BRACKETS == None:
+            import re
+
+            cls.BRACKETS = re.compile(r"[()\[\]{}]")
+            cls.NOT_BRACKETS = re.compile(r"[^()\[\]{}]+")
+
+
+    #Change callback for the buffer. Only the edited lines are summarized again, and only the blocks that contain them are updated.
+    def buffer_changed(self, start: int, old_count: int, new_count: int) -> None:
+        if self.summaries == None:
+            return
+
+        #The whole buffer was replaced, the index is built again the next time it's used.
+        if start == 0 and old_count == len(self.summaries):
+            self.summaries = None
+            self.tree_valid = False
+            return
+
+        new_summaries = [self.summarize(self.buffer.get_line(y)) for y in range(start, start + new_count)]
+
+        if old_count == new_count:
+            changed = [i for i in range(new_count) if new_summaries[i] != self.summaries[start + i]]
+            self.summaries[start:start + old_count] = new_summaries
+
+            #The edited lines are usually in one block, each block is summarized again once.
+            if self.tree_valid and changed != []:
+                block, block_start, _ = self.find_block(start + changed[0])
+
+                for i in changed:
+                    if start + i >= block_start + self.block_counts[block]:
+                        self.update_block(block, block_start)
+                        block, block_start, _ = self.find_block(start + i)
+
+                self.update_block(block, block_start)
+
+            return
+
+        if not self.tree_valid:
+            self.summaries[start:start + old_count] = new_summaries
+            return
+
+        #The blocks from the one with the first replaced line to the one with the last one are replaced by new blocks with their lines.
+        first, first_start, _ = self.find_block(start)
+        last, last_start, _ = self.find_block(max(start + old_count - 1, start))
+        self.summaries[start:start + old_count] = new_summaries
+
+        line_count = last_start + self.block_counts[last] - first_start + new_count - old_count
+        #A block that becomes too small is merged with the next one, so there are never many more blocks than needed.
+        if line_count < self.BLOCK_SIZE // 2 and last + 1 < len(self.block_counts):
+            last += 1
+            line_count += self.block_counts[last]
+
+        new_counts = self.split_lines(line_count)
+        new_block_summaries = []
+        block_start = first_start
+
+        for count in new_counts:
+            new_block_summaries.append(self.combine_lines(block_start, count))
+            block_start += count
+
+        if len(new_counts) == last - first + 1:
+            for (i, count) in enumerate(new_counts):
+                self.block_counts[first + i] = count
+                self.block_summaries[first + i] = new_block_summaries[i]
+                self.update_leaf(first + i)
+        else:
+            self.block_counts[first:last + 1] = new_counts
+            self.block_summaries[first:last + 1] = new_block_summaries
+            self.build_tree()
+
+
+    #Returns the summary of a text, see "summaries".
+    def summarize(self, text: str) -> tuple[int, int, int]:
+        self.compile_patterns()
+        brackets = self.NOT_BRACKETS.sub("", text)
+
+        if brackets == "":
+            return (0, self.NO_BRACKETS, self.NO_BRACKETS)
+
+        summary = self.summary_cache.get(brackets)
+
+        if summary == None:
+            depth = 0
+            min_before = min_after = self.NO_BRACKETS
+
+            for bracket in brackets:
+                min_before = min(min_before, depth)
+                depth += (1 if bracket in self.PAIRS else -1)
+                min_after = min(min_after, depth)
+
+            summary = (depth, min_before, min_after)
+
+            if len(self.summary_cache) >= self.MAX_CACHED_SUMMARIES:
+                self.summary_cache = {}
+            self.summary_cache[brackets] = summary
+
+        return summary
+
+
+    #Returns the summary of some consecutive lines, the lowest depths of each line are relative to the end of the lines before it.
+    def combine_lines(self, first_y: int, count: int) -> tuple[int, int, int]:
+        depth = 0
+        min_before = min_after = self.NO_BRACKETS
+
+        for (change, line_before, line_after) in self.summaries[first_y:first_y + count]:
+            min_before = min(min_before, depth + line_before)
+            min_after = min(min_after, depth + line_after)
+            depth += change
+
+        return (depth, min_before, min_after)
+
+
+    #Returns the number of lines of each block when the given number of lines are split in blocks.
+    def split_lines(self, line_count: int) -> list[int]:
+        if line_count <= 2 * self.BLOCK_SIZE:
+            return ([line_count] if line_count > 0 else [])
+
+        block_count = line_count // self.BLOCK_SIZE
+        return [self.BLOCK_SIZE] * (block_count - 1) + [line_count - self.BLOCK_SIZE * (block_count - 1)]
+
+
+    #Summarizes every line if the index isn't built.
+    def build_summaries(self) -> None:
+        if self.summaries == None:
+            self.summaries = [self.summarize(self.buffer.get_line(y)) for y in range(self.buffer.get_line_count())]
+            self.tree_valid = False
+
+
+    #Builds the index if it isn't built, and the blocks and the tree if they aren't.
+    def build(self) -> None:
+        self.build_summaries()
+
+        if self.tree_valid:
+            return
+
+        self.block_counts = self.split_lines(len(self.summaries))
+        self.block_summaries = []
+        block_start = 0
+
+        for count in self.block_counts:
+            self.block_summaries.append(self.combine_lines(block_start, count))
+            block_start += count
+
+        self.build_tree()
+        self.tree_valid = True
+
+
+    #Builds the tree from the summaries of the blocks.
+    def build_tree(self) -> None:
+        count = len(self.block_counts)
+        self.size = 1 << max(count - 1, 0).bit_length()
+        padding = self.size - count
+
+        self.counts = [0] * self.size + self.block_counts + [0] * padding
+        self.sums = [0] * self.size + [summary[0] for summary in self.block_summaries] + [0] * padding
+        self.mins_before = [0] * self.size + [summary[1] for summary in self.block_summaries] + [self.NO_BRACKETS] * padding
+        self.mins_after = [0] * self.size + [summary[2] for summary in self.block_summaries] + [self.NO_BRACKETS] * padding
+
+        #Each level of the tree is calculated at once from the one below it, the nodes from "low" to "2 * low" are a level and their children
+        #are the nodes from "2 * low" to "4 * low".
+        low = self.size // 2
+        while low >= 1:
+            left_sums = self.sums[2 * low:4 * low:2]
+            right_sums = self.sums[2 * low + 1:4 * low:2]
+
+            self.counts[low:2 * low] = [left + right for (left, right) in zip(self.counts[2 * low:4 * low:2], self.counts[2 * low + 1:4 * low:2])]
+            self.sums[low:2 * low] = [left + right for (left, right) in zip(left_sums, right_sums)]
+            self.mins_before[low:2 * low] = [min(left, left_sum + right) for (left, right, left_sum) in
+                zip(self.mins_before[2 * low:4 * low:2], self.mins_before[2 * low + 1:4 * low:2], left_sums)]
+            self.mins_after[low:2 * low] = [min(left, left_sum + right) for (left, right, left_sum) in
+                zip(self.mins_after[2 * low:4 * low:2], self.mins_after[2 * low + 1:4 * low:2], left_sums)]
+
+            low //= 2
+
+
+    #Calculates a node of the tree from its children, the lowest depth of the right child is relative to the end of the left one.
+    def update_node(self, node: int) -> None:
+        left = 2 * node
+        left_sum = self.sums[left]
+
+        self.counts[node] = self.counts[left] + self.counts[left + 1]
+        self.sums[node] = left_sum + self.sums[left + 1]
+        self.mins_before[node] = min(self.mins_before[left], left_sum + self.mins_before[left + 1])
+        self.mins_after[node] = min(self.mins_after[left], left_sum + self.mins_after[left + 1])
+
+
+    #Summarizes a block again from its lines and updates the tree.
+    def update_block(self, block: int, block_start: int) -> None:
+        self.block_summaries[block] = self.combine_lines(block_start, self.block_counts[block])
+        self.update_leaf(block)
+
+
+    #Updates the leaf of a block and the nodes above it.
+    def update_leaf(self, block: int) -> None:
+        node = self.size + block
+        self.counts[node] = self.block_counts[block]
+        self.sums[node], self.mins_before[node], self.mins_after[node] = self.block_summaries[block]
+
+        node //= 2
+        while node > 0:
+            self.update_node(node)
+            node //= 2
+
+
+    #Returns the block that contains the given line, the line it starts in and the depth at its start. A line after the last one is in the
+    #last block. The tree must be built.
+    def find_block(self, y_pos: int) -> tuple[int, int, int]:
+        if y_pos >= self.counts[1]:
+            block = len(self.block_counts) - 1
+            return (block, self.counts[1] - self.block_counts[block], self.sums[1] - self.block_summaries[block][0])
+
+        node = 1
+        block_start = depth = 0
+
+        while node < self.size:
+            node *= 2
+
+            if y_pos >= block_start + self.counts[node]:
+                block_start += self.counts[node]
+                depth += self.sums[node]
+                node += 1
+
+        return (node - self.size, block_start, depth)
+
+
+    #Returns the line a block starts in and the depth at its start, adding up the nodes that cover the blocks before it.
+    def get_block_start(self, block: int) -> tuple[int, int]:
+        block_start = depth = 0
+        low = self.size
+        high = self.size + block
+
+        while low < high:
+            if low & 1:
+                block_start += self.counts[low]
+                depth += self.sums[low]
+                low += 1
+            if high & 1:
+                high -= 1
+                block_start += self.counts[high]
+                depth += self.sums[high]
+
+            low //= 2
+            high //= 2
+
+        return (block_start, depth)
+
+
+    #Returns the depth at the start of a line, counting from the start of the buffer.
+    def get_depth(self, y_pos: int) -> int:
+        self.build()
+        _, block_start, depth = self.find_block(y_pos)
+
+        return depth + sum(summary[0] for summary in self.summaries[block_start:y_pos])
+
+
+    #Returns the depth at the given position relative to the start of its line, the number of brackets opened minus the ones closed before it.
+    def get_line_depth(self, y_pos: int, x_pos: int) -> int:
+        return self.summarize(self.buffer.get_line(y_pos)[:x_pos])[0]
+
+
+    #Returns the position of the bracket under the cursor, or the one before it if there's none under it, or "None" if there's no bracket.
+    def get_bracket_at(self, y_pos: int, x_pos: int) -> Optional[int]:
+        line = self.buffer.get_line(y_pos)
+
+        self.compile_patterns()
+
+        if x_pos < len(line) and self.BRACKETS.match(line, x_pos):
+            return x_pos
+        if x_pos > 0 and self.BRACKETS.match(line, x_pos - 1):
+            return x_pos - 1
+
+        return None
+
+
+    #Returns the position of the bracket that matches the one at the cursor, see "get_bracket_at". Returns "None" if there's no bracket or it
+    #isn't matched, including when it's matched by a bracket of a different kind. Without "use_tree" the match is only looked for in the nearby
+    #lines, which is enough to highlight it on the screen and never rebuilds the tree.
+    def find_match(self, y_pos: int, x_pos: int, use_tree: bool = True) -> Optional[tuple[int, int]]:
+        bracket_x = self.get_bracket_at(y_pos, x_pos)
+
+        if bracket_x == None:
+            return None
+
+        self.build_summaries()
+        bracket = self.buffer.get_line(y_pos)[bracket_x]
+
+        if bracket in self.PAIRS:
+            match = self.find_closing(y_pos, bracket_x, use_tree)
+            expected = self.PAIRS[bracket]
+        else:
+            match = self.find_opening(y_pos, bracket_x, use_tree)
+            expected = self.OPENING[bracket]
+
+        if match == None or self.buffer.get_line(match[0])[match[1]] != expected:
+            return None
+
+        return match
+
+
+    #Returns the position of the first bracket after the given opening bracket that takes the depth below the one after it.
+    def find_closing(self, y_pos: int, x_pos: int, use_tree: bool) -> Optional[tuple[int, int]]:
+        line = self.buffer.get_line(y_pos)
+        #The depths are relative to the start of the bracket's line, the match takes the depth to "target".
+        target = self.get_line_depth(y_pos, x_pos)
+        depth = target + 1
+
+        for bracket in self.BRACKETS.finditer(line, x_pos + 1):
+            depth += (1 if bracket.group() in self.PAIRS else -1)
+
+            if depth <= target:
+                return (y_pos, bracket.start())
+
+        #The nearby lines are checked with their summaries.
+        depth = self.summaries[y_pos][0]
+        match_y = None
+
+        for y in range(y_pos + 1, min(y_pos + 1 + self.NEARBY_LINES, len(self.summaries))):
+            if depth + self.summaries[y][2] <= target:
+                match_y = y
+                break
+
+            depth += self.summaries[y][0]
+
+        #Otherwise the tree finds the line, with depths counted from the start of the buffer.
+        if match_y == None and use_tree and y_pos + 1 + self.NEARBY_LINES < len(self.summaries):
+            line_start = self.get_depth(y_pos)
+            match_y = self.find_first(y_pos + 1 + self.NEARBY_LINES, line_start + target)
+
+            if match_y != None:
+                depth = self.get_depth(match_y) - line_start
+
+        if match_y == None:
+            return None
+
+        for bracket in self.BRACKETS.finditer(self.buffer.get_line(match_y)):
+            depth += (1 if bracket.group() in self.PAIRS else -1)
+
+            if depth <= target:
+                return (match_y, bracket.start())
+
+        return None
+
+
+    #Returns the position of the last opening bracket before the given closing bracket that starts at the depth below the one before it.
+    def find_opening(self, y_pos: int, x_pos: int, use_tree: bool) -> Optional[tuple[int, int]]:
+        line = self.buffer.get_line(y_pos)
+        #The depths are relative to the start of the bracket's line, the match starts at the depth "target".
+        target = self.get_line_depth(y_pos, x_pos) - 1
+        match = self.last_bracket_at(line, 0, x_pos, 0, target)
+
+        if match != None:
+            return (y_pos, match)
+
+        #The nearby lines are checked with their summaries, going backwards.
+        depth = 0
+        match_y = None
+
+        for y in range(y_pos - 1, max(y_pos - 1 - self.NEARBY_LINES, -1), -1):
+            depth -= self.summaries[y][0]
+
+            if depth + self.summaries[y][1] <= target:
+                match_y = y
+                break
+
+        #Otherwise the tree finds the line, with depths counted from the start of the buffer.
+        if match_y == None and use_tree and y_pos - 1 - self.NEARBY_LINES >= 0:
+            line_start = self.get_depth(y_pos)
+            match_y = self.find_last(y_pos - 1 - self.NEARBY_LINES, line_start + target)
+
+            if match_y != None:
+                depth = self.get_depth(match_y) - line_start
+
+        if match_y == None:
+            return None
+
+        match_line = self.buffer.get_line(match_y)
+        match = self.last_bracket_at(match_line, 0, len(match_line), depth, target)
+
+        return (None if match == None else (match_y, match))
+
+
+    #Returns the position of the last bracket between "start" and "end" in the text before which the depth is "target" or lower, "depth" is the
+    #depth at "start". Returns "None" if there's none.
+    def last_bracket_at(self, text: str, start: int, end: int, depth: int, target: int) -> Optional[int]:
+        match = None
+
+        for bracket in self.BRACKETS.finditer(text, start, end):
+            if depth <= target:
+                match = bracket.start()
+
+            depth += (1 if bracket.group() in self.PAIRS else -1)
+
+        return match
+
+
+    #Returns the first line from "first_y" with a bracket after which the depth, counted from the start of the buffer, is "target" or lower.
+    #The rest of the block of "first_y" is looked at first, then the tree finds the first block after it with such a line.
+    def find_first(self, first_y: int, target: int) -> Optional[int]:
+        self.build()
+        block, block_start, depth = self.find_block(first_y)
+        found = self.find_first_in(block_start, block_start + self.block_counts[block], first_y, depth, target)
+
+        if found != None:
+            return found
+
+        block = self._find_first(1, 0, self.size, block + 1, target, 0)[0]
+
+        if block == None:
+            return None
+
+        block_start, depth = self.get_block_start(block)
+        return self.find_first_in(block_start, block_start + self.block_counts[block], block_start, depth, target)
+
+
+    #Returns the first line from "first_y" to "end", not including it, with a bracket after which the depth is "target" or lower, "depth" is the
+    #depth at the start of the line "start".
+    def find_first_in(self, start: int, end: int, first_y: int, depth: int, target: int) -> Optional[int]:
+        for y in range(start, end):
+            if y >= first_y and depth + self.summaries[y][2] <= target:
+                return y
+
+            depth += self.summaries[y][0]
+
+        return None
+
+
+    #Searches the blocks of a node, "depth" is the depth at its start. Returns the block found, or "None", and the depth at the end of the node.
+    def _find_first(self, node: int, low: int, high: int, first_block: int, target: int, depth: int) -> tuple[Optional[int], int]:
+        #Nodes before the first block, or without a low enough depth, are skipped whole.
+        if high <= first_block or (low >= first_block and depth + self.mins_after[node] > target):
+            return (None, depth + self.sums[node])
+
+        if high - low == 1:
+            return (low, depth + self.sums[node])
+
+        middle = (low + high) // 2
+        found, depth = self._find_first(2 * node, low, middle, first_block, target, depth)
+
+        if found != None:
+            return (found, depth)
+
+        return self._find_first(2 * node + 1, middle, high, first_block, target, depth)
+
+
+    #Returns the last line up to "last_y" with a bracket before which the depth, counted from the start of the buffer, is "target" or lower.
+    #The block of "last_y" is looked at first, then the tree finds the last block before it with such a line.
+    def find_last(self, last_y: int, target: int) -> Optional[int]:
+        self.build()
+        block, block_start, depth = self.find_block(last_y)
+        found = self.find_last_in(block_start, min(last_y + 1, block_start + self.block_counts[block]), depth, target)
+
+        if found != None or block == 0:
+            return found
+
+        block = self._find_last(1, 0, self.size, block - 1, target, 0)
+
+        if block == None:
+            return None
+
+        block_start, depth = self.get_block_start(block)
+        return self.find_last_in(block_start, block_start + self.block_counts[block], depth, target)
+
+
+    #Returns the last line from "start" to "end", not including it, with a bracket before which the depth is "target" or lower, "depth" is the
+    #depth at the start of "start".
+    def find_last_in(self, start: int, end: int, depth: int, target: int) -> Optional[int]:
+        found = None
+
+        for y in range(start, end):
+            if depth + self.summaries[y][1] <= target:
+                found = y
+
+            depth += self.summaries[y][0]
+
+        return found
+
+
+    #Searches the blocks of a node from the end, "depth" is the depth at its start.
+    def _find_last(self, node: int, low: int, high: int, last_block: int, target: int, depth: int) -> Optional[int]:
+        #Nodes after the last block, or without a low enough depth, are skipped whole.
+        if low > last_block or (high - 1 <= last_block and depth + self.mins_before[node] > target):
+            return None
+
+        if high - low == 1:
+            return low
+
+        middle = (low + high) // 2
+        found = self._find_last(2 * node + 1, middle, high, last_block, target, depth + self.sums[2 * node])
+
+        if found != None:
+            return found
+
+        return self._find_last(2 * node, low, middle, last_block, target, depth)
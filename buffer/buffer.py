@@ -1,15 +1,42 @@
-from dataclasses import dataclass
-from typing import List, Optional
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from enum import Enum, auto
+from typing import Callable, List, Optional
+
+from buffer.columns import build_column_map
 
 
 @dataclass
 class Line:
     contents: str = ""
+    #The column map of the line and the contents it was calculated for, used to know when it has to be calculated again. See
+    #"TextBuffer.get_columns".
+    columns: Optional[list[int]] = field(default = None, repr = False, compare = False)
+    columns_source: Optional[str] = field(default = None, repr = False, compare = False)
+
+
+#The edits that can be applied at several positions at once with "TextBuffer.multi_edit".
+class EditOperationsEnum(Enum):
+    INSERT = auto(),
+    BACKSPACE = auto(),
+    DELETE = auto()
 
 
 class TextBuffer:
     def __init__(self):
         self.buffer = [Line()]
+        #Functions that get called every time the buffer is modified, they allow other classes to keep their own per-line information up to date
+        #without rescanning the whole buffer. They are called with "(start, old_count, new_count)", meaning that the "old_count" lines starting
+        #at "start" have been replaced by "new_count" lines.
+        self.change_callbacks = []
+        #While the callbacks are called, the edits done inside the lines, if they are known, as tuples of "(y_pos, x_pos, end_y, end_x, text)"
+        #meaning that the text from "(y_pos, x_pos)" to "(end_y, end_x)" was replaced by "text", sorted by position. Positions are the ones before
+        #the change. It's "None" when they aren't known, like when lines are replaced. See "get_text_edits".
+        self.text_edits = None
+        #Incremented every time the buffer is modified, used to know if the buffer changed while something ran in the background.
+        self.version = 0
+        #The size of a tabulation, used to calculate the column of each character.
+        self.tab_size = 4
 
     #####USE NOTE#####
     #All the functions in this dataclass use indexes starting at zero. Furthermore when referring to the "x_pos" in a line it must be thought of as if
@@ -25,6 +52,7 @@ class TextBuffer:
             else:
                 self.buffer[y_pos].contents = self.buffer[y_pos].contents[:x_pos] + char + self.buffer[y_pos].contents[x_pos:]
 
+            self._notify_change(y_pos, 1, 1, [(y_pos, x_pos, y_pos, x_pos, char)])
             return True
 
         except:
@@ -38,12 +66,15 @@ class TextBuffer:
             #lines, since we are appending an empty string.
             if x_pos == 0:
                 if y_pos > 0:
+                    previous_length = len(self.buffer[y_pos - 1].contents)
                     self.buffer[y_pos - 1].contents += self.buffer[y_pos].contents
                     self.buffer.pop(y_pos)
+                    self._notify_change(y_pos - 1, 2, 1, [(y_pos - 1, previous_length, y_pos, 0, "")])
 
             #If we want to delete a character of in the current line we simply remove it using a string slice.
             else:
                 self.buffer[y_pos].contents = self.buffer[y_pos].contents[:x_pos - 1] + self.buffer[y_pos].contents[x_pos:]
+                self._notify_change(y_pos, 1, 1, [(y_pos, x_pos - 1, y_pos, x_pos, "")])
 
             return True
 
@@ -57,10 +88,13 @@ class TextBuffer:
             #If there are any characters in front of the character in the current line we delete them.
             if x_pos < len(self.buffer[y_pos].contents):
                 self.buffer[y_pos].contents = self.buffer[y_pos].contents[:x_pos] + self.buffer[y_pos].contents[x_pos + 1:]
+                self._notify_change(y_pos, 1, 1, [(y_pos, x_pos, y_pos, x_pos + 1, "")])
             #Otherwise we check if there's a line beneath the current one and append it to it.
             elif len(self.buffer) > y_pos + 1:
+                length = len(self.buffer[y_pos].contents)
                 self.buffer[y_pos].contents += self.buffer[y_pos + 1].contents
                 self.buffer.pop(y_pos + 1)
+                self._notify_change(y_pos, 2, 1, [(y_pos, length, y_pos + 1, 0, "")])
 
             return True
 
@@ -70,7 +104,8 @@ class TextBuffer:
 
     #Inserts a newline behind the cursor, returns "True" if no errors occurred. Note that newline doesn't refer to the newline character "\n" but to
     #what would happen when pressing enter on a regular editor.
-    def newline(self, y_pos: int, x_pos: int) -> bool:
+    #If "indent" is given it replaces the indentation of the new line, used to auto-indent it.
+    def newline(self, y_pos: int, x_pos: int, indent: Optional[str] = None) -> bool:
         try:
             #Insert a new line right after the current one.
             self.buffer.insert(y_pos + 1, Line())
@@ -81,13 +116,156 @@ class TextBuffer:
                 self.buffer[y_pos + 1].contents = self.buffer[y_pos].contents[x_pos:]
                 self.buffer[y_pos].contents = self.buffer[y_pos].contents[:x_pos]
 
+            #The indentation that is replaced is part of the edit.
+            end_x = x_pos
+            if indent != None:
+                end_x += len(self.buffer[y_pos + 1].contents) - len(self.buffer[y_pos + 1].contents.lstrip(" \t"))
+                self.buffer[y_pos + 1].contents = indent + self.buffer[y_pos + 1].contents.lstrip(" \t")
+
+            self._notify_change(y_pos, 1, 2, [(y_pos, x_pos, y_pos, end_x, "\n" + (indent if indent != None else ""))])
             return True
 
         except:
             return False
 
+    #Replaces the "old_count" lines starting at "y_pos" with the given lines, returns "True" if no errors occurred. It's used for edits that change
+    #many lines at once. "text_edits" are the edits inside the lines that produced the new lines if they are known, see "self.text_edits".
+    def replace_lines(self, y_pos: int, old_count: int, new_lines: list[str], text_edits: Optional[list[tuple[int, int, int, int, str]]] = None) -> bool:
+        if y_pos < 0 or y_pos + old_count > len(self.buffer):
+            return False
+
+        self.buffer[y_pos:y_pos + old_count] = [Line(line) for line in new_lines]
+
+        #The buffer must always have at least one line.
+        if len(self.buffer) == 0:
+            self.buffer.append(Line())
+            new_lines = [""]
+            text_edits = None
+
+        self._notify_change(y_pos, old_count, len(new_lines), text_edits)
+        return True
+
+    #Applies the same edit at every position in "positions", which are "(y_pos, x_pos)" tuples, and returns the new position of each of them in
+    #the same order. For "INSERT" "texts" contains the text to insert at each position, it may contain newlines. The lines between the first and
+    #last position are joined and edited in a single pass, with every position converted to an offset in the original text so they all stay
+    #valid, then the result replaces those lines at once. This way editing thousands of positions costs about the same as a single edit.
+    def multi_edit(self, positions: list[tuple[int, int]], operation: EditOperationsEnum, texts: Optional[list[str]] = None) -> list[tuple[int, int]]:
+        #One more line is included on each side, since deleting at the start or end of a line joins it with the one next to it.
+        start_y = max(min(y for (y, x) in positions) - 1, 0)
+        end_y = min(max(y for (y, x) in positions) + 1, len(self.buffer) - 1)
+
+        lines = [line.contents for line in self.buffer[start_y:end_y + 1]]
+        text = "\n".join(lines)
+
+        #The offset where each line starts in the joined text.
+        line_starts = [0] * len(lines)
+        for i in range(1, len(lines)):
+            line_starts[i] = line_starts[i - 1] + len(lines[i - 1]) + 1
+
+        #Each position is converted to an offset, positions are edited in order and repeated positions are only edited once.
+        offsets = [line_starts[y - start_y] + x for (y, x) in positions]
+        order = sorted(range(len(offsets)), key = lambda i: offsets[i])
+
+        pieces = []
+        #The edits as offsets in the joined text, the replaced text is from the first to the second offset.
+        edits = []
+        new_offsets = [0] * len(offsets)
+        previous_offset = None
+        copied = 0
+        shift = 0
+
+        for i in order:
+            offset = offsets[i]
+
+            if offset == previous_offset:
+                new_offsets[i] = new_offsets[previous_index]
+                continue
+
+            previous_offset = offset
+            previous_index = i
+
+            match operation:
+                case EditOperationsEnum.INSERT:
+                    pieces.append(text[copied:offset])
+                    pieces.append(texts[i])
+                    edits.append((offset, offset, texts[i]))
+                    copied = offset
+                    shift += len(texts[i])
+                    new_offsets[i] = offset + shift
+
+                case EditOperationsEnum.BACKSPACE:
+                    if offset > 0:
+                        pieces.append(text[copied:offset - 1])
+                        edits.append((offset - 1, offset, ""))
+                        copied = offset
+                        shift -= 1
+
+                    new_offsets[i] = offset + shift
+
+                case EditOperationsEnum.DELETE:
+                    new_offsets[i] = offset + shift
+
+                    if offset < len(text):
+                        pieces.append(text[copied:offset])
+                        edits.append((offset, offset + 1, ""))
+                        copied = offset + 1
+                        shift -= 1
+
+        pieces.append(text[copied:])
+        new_lines = "".join(pieces).split("\n")
+
+        #Convert the edits to positions in the original lines.
+        text_edits = []
+        for (start, end, edit_text) in edits:
+            line = bisect_right(line_starts, start) - 1
+            end_line = bisect_right(line_starts, end) - 1
+            text_edits.append((start_y + line, start - line_starts[line], start_y + end_line, end - line_starts[end_line], edit_text))
+
+        self.replace_lines(start_y, len(lines), new_lines, text_edits)
+
+        #Convert the new offsets back to positions.
+        new_line_starts = [0] * len(new_lines)
+        for i in range(1, len(new_lines)):
+            new_line_starts[i] = new_line_starts[i - 1] + len(new_lines[i - 1]) + 1
+
+        new_positions = []
+        for offset in new_offsets:
+            line = bisect_right(new_line_starts, offset) - 1
+            new_positions.append((start_y + line, offset - new_line_starts[line]))
+
+        return new_positions
+
+    #####Change callbacks#####
+
+    #Registers a function to be called every time the buffer is modified, see "self.change_callbacks".
+    def add_change_callback(self, callback: Callable[[int, int, int], None]) -> None:
+        self.change_callbacks.append(callback)
+
+
+    #Removes a previously registered change callback.
+    def remove_change_callback(self, callback: Callable[[int, int, int], None]) -> None:
+        if callback in self.change_callbacks:
+            self.change_callbacks.remove(callback)
+
+
+    #Calls every change callback, indicating that the "old_count" lines starting at "start" were replaced by "new_count" lines. "text_edits" are
+    #the edits inside the lines, if they are known, see "self.text_edits".
+    def _notify_change(self, start: int, old_count: int, new_count: int, text_edits: Optional[list[tuple[int, int, int, int, str]]] = None) -> None:
+        self.version += 1
+        self.text_edits = text_edits
+
+        for callback in self.change_callbacks:
+            callback(start, old_count, new_count)
+
+        self.text_edits = None
+
     #####Getters and setters#####
 
+    #Returns the edits inside the lines of the change the callbacks are being called for, see "self.text_edits".
+    def get_text_edits(self) -> Optional[list[tuple[int, int, int, int, str]]]:
+        return self.text_edits
+
+
     #Returns the character in the specified position if possible, otherwise returns "None".
     def get_char(self, y_pos: int, x_pos: int) -> Optional[str]:
         try:
@@ -105,6 +283,34 @@ class TextBuffer:
         except:
             return None
 
+    #Returns a list with the console column where each character of the line starts, plus the width of the line as the last element. The list is
+    #cached in the line and only calculated again when the line's contents change.
+    def get_columns(self, y_pos: int) -> list[int]:
+        line = self.buffer[y_pos]
+
+        if line.columns_source is not line.contents:
+            line.columns = build_column_map(line.contents, self.tab_size)
+            line.columns_source = line.contents
+
+        return line.columns
+
+
+    #Returns the number of console cells the line in the specified position takes.
+    def get_line_width(self, y_pos: int) -> int:
+        return self.get_columns(y_pos)[-1]
+
+
+    #Sets the size of a tabulation, the column map of every line is calculated again when needed.
+    def set_tab_size(self, tab_size: int) -> None:
+        self.tab_size = tab_size
+
+        for line in self.buffer:
+            line.columns_source = None
+
+    #Returns the version of the buffer, it changes every time the buffer is modified.
+    def get_version(self) -> int:
+        return self.version
+
     #Returns how many lines the buffer has, it's length.
     def get_line_count(self) -> int:
         return len(self.buffer)
@@ -115,4 +321,6 @@ class TextBuffer:
 
     #Receives a list of lines and sets that as the buffer, it's used for opening files.
     def set_buffer(self, buffer: list[Line]) -> None:
-        self.buffer = buffer
\ No newline at end of file
+        old_count = len(self.buffer)
+        self.buffer = buffer
+        self._notify_change(0, old_count, len(self.buffer))
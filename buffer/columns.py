@@ -0,0 +1,74 @@
+import unicodedata
+
+
+#The display width of every character that has been measured, since measuring a character with "unicodedata" is slow each character is only
+#measured once.
+_width_table = {}
+
+
+#Returns the number of console cells a character takes. Combining and formatting characters take zero cells, since they are displayed together
+#with the character before them, wide characters take two cells and control characters take two, since they are displayed as "^X". Tabs aren't
+#handled here because their width depends on their position, see "build_column_map".
+def char_width(char: str) -> int:
+    try:
+        return _width_table[char]
+    except KeyError:
+        pass
+
+    category = unicodedata.category(char)
+
+    if category in ("Mn", "Me", "Cf"):
+        width = 0
+    elif category == "Cc":
+        width = 2
+    elif unicodedata.east_asian_width(char) in ("W", "F"):
+        width = 2
+    else:
+        width = 1
+
+    _width_table[char] = width
+    return width
+
+
+#Returns a list with the console column where each character of the text starts, the list has one more element than the text, the column
+#after the last character, which is the display width of the text.
+def build_column_map(text: str, tab_size: int) -> list[int]:
+    #Most lines only contain printable ASCII characters, where every character takes exactly one cell.
+    if text.isascii() and text.isprintable():
+        return list(range(len(text) + 1))
+
+    columns = [0] * (len(text) + 1)
+    column = 0
+
+    for i, char in enumerate(text):
+        columns[i] = column
+
+        #A tab goes to the next tab stop.
+        if char == "\t":
+            column += tab_size - (column % tab_size)
+        else:
+            column += char_width(char)
+
+    columns[len(text)] = column
+
+    return columns
+
+
+#Returns the string that has to be displayed for the character in "x_pos", together with any zero width characters that follow it, and the index
+#of the next character to be displayed.
+def cell_text(text: str, columns: list[int], x_pos: int) -> tuple[str, int]:
+    end = x_pos + 1
+
+    #Zero width characters are displayed in the same cell as the character before them.
+    while end < len(text) and columns[end + 1] == columns[end]:
+        end += 1
+
+    char = text[x_pos]
+
+    if char == "\t":
+        return (" " * (columns[x_pos + 1] - columns[x_pos]), end)
+    #Control characters are displayed using caret notation, otherwise curses would interpret them.
+    elif unicodedata.category(char) == "Cc":
+        return ("^" + chr(ord(char) ^ 0x40), end)
+
+    return (text[x_pos:end], end)
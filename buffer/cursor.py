@@ -1,6 +1,8 @@
 from dataclasses import dataclass
+from typing import Callable, Optional
 
 from buffer.buffer import TextBuffer
+from buffer.fold_index import FoldIndex
 from configuration.config import CursorConfig
 
 
@@ -13,7 +15,7 @@ class CursorInfo:
 
 
 class Cursor:
-    def __init__(self, config: type[CursorConfig]):
+    def __init__(self, config: type[CursorConfig], fold_index: Optional[type[FoldIndex]] = None):
         self.y_pos = 0
         self.x_pos = 0
 
@@ -22,7 +24,12 @@ class Cursor:
         #for easy and always false comparisons using "max".
         self._desired_x_pos = -1
 
+        #Additional cursors, edits are applied at every cursor at once. The position above is the main cursor, the one that scrolls the view.
+        self.extra_cursors = []
+
         self.config = config
+        #The folded regions of the buffer, vertical movement steps over them. When it's "None" every line is visible.
+        self.fold_index = fold_index
 
 
     def get_y(self) -> int:
@@ -48,6 +55,89 @@ class Cursor:
         self._desired_x_pos = cursor_info._desired_x_pos
 
 
+    #####Multiple cursors#####
+
+    #Returns "True" if there are additional cursors.
+    def has_extra_cursors(self) -> bool:
+        return self.extra_cursors != []
+
+
+    #Returns the number of additional cursors.
+    def get_extra_cursor_count(self) -> int:
+        return len(self.extra_cursors)
+
+
+    #Removes every additional cursor.
+    def clear_extra_cursors(self) -> None:
+        self.extra_cursors = []
+
+
+    #Returns the position of every cursor as "(y_pos, x_pos)" tuples, the main cursor first.
+    def get_all_positions(self) -> list[tuple[int, int]]:
+        return [(self.y_pos, self.x_pos)] + [(info.y_pos, info.x_pos) for info in self.extra_cursors]
+
+
+    #Sets the position of every cursor, the first position is the main cursor. Cursors that end up in the same position are merged.
+    def set_all_positions(self, positions: list[tuple[int, int]]) -> None:
+        self.y_pos, self.x_pos = positions[0]
+        self._desired_x_pos = self.x_pos
+        self.extra_cursors = [CursorInfo(x_pos, y_pos, x_pos) for (y_pos, x_pos) in positions[1:]]
+
+        self._merge_cursors()
+
+
+    #Removes the additional cursors that are in the same position as another cursor.
+    def _merge_cursors(self) -> None:
+        seen = {(self.y_pos, self.x_pos)}
+        kept_cursors = []
+
+        for info in self.extra_cursors:
+            if (info.y_pos, info.x_pos) not in seen:
+                seen.add((info.y_pos, info.x_pos))
+                kept_cursors.append(info)
+
+        self.extra_cursors = kept_cursors
+
+
+    #Adds a cursor on the line below the lowest cursor, in the same column as the main cursor, used to edit a column of lines at once.
+    def add_cursor_below(self, buffer: type[TextBuffer]) -> bool:
+        lowest_y = max(y_pos for (y_pos, x_pos) in self.get_all_positions())
+        #Folded lines are skipped.
+        next_y = (lowest_y + 1 if self.fold_index == None else self.fold_index.next_visible(lowest_y))
+
+        if next_y >= buffer.get_line_count():
+            return False
+
+        x_pos = min(max(self.x_pos, self._desired_x_pos), len(buffer.get_line(next_y)))
+        self.extra_cursors.append(CursorInfo(x_pos, next_y, self.x_pos))
+
+        return True
+
+
+    #Calls "function" once for each cursor, with that cursor loaded as the main cursor, that way every movement function also works with
+    #multiple cursors. For example "cursor.for_each_cursor(lambda: cursor.cursor_end(buffer))".
+    def for_each_cursor(self, function: Callable[[], None]) -> None:
+        main_cursor = self.get_cursor_value()
+        extra_cursors = self.extra_cursors
+        self.extra_cursors = []
+
+        for info in extra_cursors:
+            self.set_cursor_value(info)
+            function()
+            #"get_cursor_value" returns a new object, so it can be stored directly.
+            self.extra_cursors.append(self.get_cursor_value())
+
+        moved_cursors = self.extra_cursors
+        self.extra_cursors = []
+        self.set_cursor_value(main_cursor)
+        function()
+
+        #Cursors moved to the same position are merged.
+        self.extra_cursors = moved_cursors
+        self._merge_cursors()
+
+    #####Single cursor#####
+
     #Changes the X position of the cursor, if "change" is "True" then the cursor is moved one position to the right, otherwise it's moved one position
     #to the left.
     def change_x_pos(self, change: bool, buffer: type[TextBuffer]) -> bool:
@@ -60,15 +150,18 @@ class Cursor:
                 self.x_pos = new_pos
                 #Otherwise we check to see if we can move the cursor vertically to the next/previous line accordingly.
             else:
+                #Folded lines are skipped, the cursor moves to the next or previous visible line.
                 if change:
                     if self.y_pos + 1 < buffer.get_line_count():
-                        self.y_pos += 1
+                        self.y_pos = (self.y_pos + 1 if self.fold_index == None else self.fold_index.next_visible(self.y_pos))
                         self.x_pos = 0
                 else:
                     if self.y_pos - 1 >= 0:
-                        self.y_pos -= 1
+                        self.y_pos = (self.y_pos - 1 if self.fold_index == None else self.fold_index.line_at_visible(self.fold_index.visible_index(self.y_pos) - 1))
                         self.x_pos = len(buffer.get_line(self.y_pos))
 
+            self._skip_zero_width(change, buffer)
+
             #Whenever the X position of the cursor is updated we also update the desired x position.
             self._desired_x_pos = self.x_pos
 
@@ -79,10 +172,22 @@ class Cursor:
 
 
     #Changes the Y position of the cursor, the "change" can be both positive or negative. A reference to the buffer is required for the function to
-    #work. Returns "True" if no errors occurred.
+    #work. Returns "True" if no errors occurred. When lines are folded the change is counted in visible lines, a folded region counts as its
+    #header, the line to move to is found in O(log n) from the cursor's visible row instead of walking the hidden lines.
     def change_y_pos(self, change: int, buffer: type[TextBuffer]) -> bool:
-        new_pos = self.y_pos + change
+        if self.fold_index != None and self.fold_index.has_folds():
+            row = self.fold_index.visible_index(self.y_pos) + change
+
+            if row < 0 or row >= self.fold_index.get_visible_count():
+                return False
+
+            return self.move_to_line(self.fold_index.line_at_visible(row), buffer)
+
+        return self.move_to_line(self.y_pos + change, buffer)
+
 
+    #Moves the cursor to the given line, keeping it's horizontal position when possible. Returns "False" if the line doesn't exist.
+    def move_to_line(self, new_pos: int, buffer: type[TextBuffer]) -> bool:
         #Make sure the cursor is being moved to a valid location.
         if new_pos < buffer.get_line_count() and new_pos >= 0:
             max_x = max(self.x_pos, self._desired_x_pos)
@@ -97,18 +202,42 @@ class Cursor:
                 self._desired_x_pos = self.x_pos
                 self.x_pos = len(buffer.get_line(new_pos))
 
+            self._skip_zero_width(False, buffer)
+
             return True
             
         else:
             return False
 
 
+    #Moves the cursor off zero width characters, like combining marks, since they are displayed in the same cell as the character before them
+    #the cursor can't be placed between them. "change" is the direction to move in, like in "change_x_pos".
+    def _skip_zero_width(self, change: bool, buffer: type[TextBuffer]) -> None:
+        columns = buffer.get_columns(self.y_pos)
+
+        while 0 < self.x_pos < len(columns) - 1 and columns[self.x_pos + 1] == columns[self.x_pos]:
+            self.x_pos += (1 if change else -1)
+
+
+    #Moves the cursor to the nearest valid position, used when the buffer is changed by something other than the cursor.
+    def clamp(self, buffer: type[TextBuffer]) -> None:
+        self.y_pos = min(self.y_pos, buffer.get_line_count() - 1)
+        self.x_pos = min(self.x_pos, len(buffer.get_line(self.y_pos)))
+        self._skip_zero_width(False, buffer)
+
+
     #Sets the cursor and it's desired position to the start of the line.
     def cursor_start(self) -> None:
         self.x_pos = 0
         self._desired_x_pos = 0
 
 
+    #Sets the cursor and it's desired position to the given position in the line.
+    def set_x(self, x_pos: int) -> None:
+        self.x_pos = x_pos
+        self._desired_x_pos = x_pos
+
+
     #Sets the cursor and it's desired position to the end of the line.
     def cursor_end(self, buffer: type[TextBuffer]) -> None:
         pos = len(buffer.get_line(self.y_pos))
@@ -117,15 +246,22 @@ class Cursor:
 
 
     #Scrolls the cursor by "scroll_keys_lines", the direction depends on the "dir" variable, if it's "True" then it will be scrolled up,
-    #otherwise down.
+    #otherwise down. With folded lines the scroll is counted in visible lines, like in "change_y_pos".
     def cursor_scroll(self, dir: bool, buffer: type[TextBuffer]) -> None:
+        if self.fold_index != None and self.fold_index.has_folds():
+            y_pos = self.fold_index.visible_index(self.y_pos)
+            line_count = self.fold_index.get_visible_count()
+        else:
+            y_pos = self.y_pos
+            line_count = buffer.get_line_count()
+
         if dir:
             #For scrolling up we see if the current Y position of the cursor is greater than the lines to scroll. If so we scroll the amount
-            #specified, otherwise we scroll "self.y_pos" lines, which in this case is the amount required to get to the first line.
-            scroll = (-1) * (self.config.scroll_keys_lines if self.y_pos >= self.config.scroll_keys_lines else self.y_pos)
+            #specified, otherwise we scroll "y_pos" lines, which in this case is the amount required to get to the first line.
+            scroll = (-1) * (self.config.scroll_keys_lines if y_pos >= self.config.scroll_keys_lines else y_pos)
         else:
             #For scrolling down we see if the current Y position of the cursor plus the lines to scroll is less than the length of the buffer.
             #If so we scroll the amount specified, otherwise we the amount of lines required to get to the end of the buffer.
-            scroll = (self.config.scroll_keys_lines if self.y_pos + self.config.scroll_keys_lines < buffer.get_line_count() else buffer.get_line_count() - self.y_pos - 1)
+            scroll = (self.config.scroll_keys_lines if y_pos + self.config.scroll_keys_lines < line_count else line_count - y_pos - 1)
 
-        self.change_y_pos(scroll, buffer)
\ No newline at end of file
+        self.change_y_pos(scroll, buffer)
@@ -0,0 +1,342 @@
+from typing import Optional
+
+from buffer.buffer import TextBuffer
+from buffer.wrap_index import FenwickTree
+
+
+#Keeps the folded regions of the buffer. A fold hides the lines after its first line, the header, up to its last line. Folds can be nested, the
+#lines hidden by the outermost ones are kept as sorted, disjoint intervals along with the number of lines hidden up to each of them, so converting
+#between lines and visible rows, and skipping over a folded region, are searches in Fenwick trees, O(log n) in the number of folds, instead of a
+#walk over the hidden lines. Like marks, see "MarkIndex", the folds and intervals store their distance from the one before them, so when lines are
+#added or removed only the first fold and interval after the edit change, in O(log n). An edit to lines of a fold removes it, which builds the
+#intervals again in O(number of folds), like folding and unfolding do.
+class FoldIndex:
+    #Lines containing these markers start and end a fold, regions between markers take precedence over the indentation.
+    START_MARKER = "{{{"
+    END_MARKER = "}}}"
+    #A line with the indentation of a region's header that starts with one of these closes the region, like the "}" of a JSON object, so it's
+    #folded with it.
+    CLOSING_BRACKETS = ("}", "]", ")")
+
+    def __init__(self, buffer: type[TextBuffer]) -> None:
+        self.buffer = buffer
+
+        #Every fold, sorted by header, as the number of lines between its header and the one of the fold before it, and the number of lines it
+        #hides, and the tree used to add up the distances.
+        self.fold_gaps = []
+        self.fold_lengths = []
+        self.fold_tree = FenwickTree([])
+        #The intervals of hidden lines, as the number of lines between their first line and the one of the interval before it, the number of
+        #lines they hide and the lines hidden by each interval and the ones before it. The row of an interval's header among the visible lines is
+        #kept the same way, each row as the distance from the previous one.
+        self.hidden_gaps = []
+        self.hidden_lengths = []
+        self.hidden_through = []
+        self.hidden_tree = FenwickTree([])
+        self.row_gaps = []
+        self.row_tree = FenwickTree([])
+
+
+    #Returns every fold, as tuples of its header and its last line, sorted by header.
+    def get_folds(self) -> list[tuple[int, int]]:
+        folds = []
+        start = 0
+
+        for (gap, length) in zip(self.fold_gaps, self.fold_lengths):
+            start += gap
+            folds.append((start, start + length))
+
+        return folds
+
+
+    #Replaces every fold and calculates the hidden intervals from them, only done when the folds change.
+    def set_folds(self, folds: list[tuple[int, int]]) -> None:
+        self.fold_gaps = [start - previous for ((start, _), previous) in zip(folds, [0] + [start for (start, _) in folds])]
+        self.fold_lengths = [end - start for (start, end) in folds]
+        self.fold_tree = FenwickTree(self.fold_gaps.copy())
+
+        #The first and last lines of the intervals.
+        starts = []
+        ends = []
+
+        for (start, end) in folds:
+            #Folds whose header is hidden by an outer fold are hidden with it, if one goes past the outer fold the interval is extended.
+            if ends != [] and start <= ends[-1]:
+                ends[-1] = max(ends[-1], end)
+            else:
+                starts.append(start + 1)
+                ends.append(end)
+
+        self.hidden_gaps = [start - previous for (start, previous) in zip(starts, [0] + starts)]
+        self.hidden_lengths = [end - start + 1 for (start, end) in zip(starts, ends)]
+        self.hidden_through = []
+        hidden = 0
+
+        for length in self.hidden_lengths:
+            hidden += length
+            self.hidden_through.append(hidden)
+
+        #The row of a header is its line minus the lines hidden before it.
+        self.row_gaps = [gap - previous_length for (gap, previous_length) in zip(self.hidden_gaps, [1] + self.hidden_lengths)]
+        self.hidden_tree = FenwickTree(self.hidden_gaps.copy())
+        self.row_tree = FenwickTree(self.row_gaps.copy())
+
+
+    #Change callback for the buffer. Folds before the edit are kept, folds after it are shifted and folds whose hidden lines were edited are
+    #removed. A fold whose header is the last edited line keeps its hidden lines, so typing in a header or splitting it doesn't unfold it.
+    def buffer_changed(self, start: int, old_count: int, new_count: int) -> None:
+        if self.fold_gaps == []:
+            return
+
+        end = start + old_count
+        delta = new_count - old_count
+
+        #If no line from "start" to "end" is hidden the folds and intervals after the edit are only shifted, the ones before it don't change.
+        interval = self.interval_before(end)
+        if interval < 0 or self.get_interval_end(interval) < start:
+            if delta != 0:
+                self.shift(self.fold_gaps, self.fold_tree, self.fold_tree.search(end - 1), delta)
+                index = self.hidden_tree.search(end)
+                self.shift(self.hidden_gaps, self.hidden_tree, index, delta)
+                self.shift(self.row_gaps, self.row_tree, index, delta)
+
+            return
+
+        folds = []
+
+        for (fold_start, fold_end) in self.get_folds():
+            if fold_end < start:
+                folds.append((fold_start, fold_end))
+            elif fold_start >= end or (fold_start == end - 1 and new_count > 0):
+                folds.append((fold_start + delta, fold_end + delta))
+
+        if len(folds) != len(self.fold_gaps) or delta != 0:
+            self.set_folds(folds)
+
+
+    #Adds "delta" to the distance in the given index, which moves every element after it too.
+    def shift(self, gaps: list[int], tree: type[FenwickTree], index: int, delta: int) -> None:
+        if index < len(gaps):
+            gaps[index] += delta
+            tree.add(index, delta)
+
+
+    #Returns the index of the last interval that starts in the given line or before it, "-1" if there's none.
+    def interval_before(self, y_pos: int) -> int:
+        return (self.hidden_tree.search(y_pos) - 1 if y_pos >= 0 else -1)
+
+
+    #Returns the first and last lines hidden by an interval.
+    def get_interval_start(self, interval: int) -> int:
+        return self.hidden_tree.prefix_sum(interval + 1)
+
+
+    def get_interval_end(self, interval: int) -> int:
+        return self.get_interval_start(interval) + self.hidden_lengths[interval] - 1
+
+
+    #Folds the lines from "start" to "end", "start" stays visible. Returns "False" if there are no lines to hide.
+    def fold(self, start: int, end: int) -> bool:
+        return self.fold_regions([(start, end)]) > 0
+
+
+    #Folds several regions at once, given as tuples of their header and their last line, the hidden intervals are only calculated once. Returns
+    #the number of regions folded.
+    def fold_regions(self, regions: list[tuple[int, int]]) -> int:
+        folds = self.get_folds()
+        existing = set(folds)
+        new_folds = [(start, end) for (start, end) in regions if end > start and (start, end) not in existing]
+
+        if new_folds != []:
+            #Folds with the same header are sorted from the outermost one.
+            self.set_folds(sorted(folds + new_folds, key = lambda fold: (fold[0], -fold[1])))
+
+        return len(new_folds)
+
+
+    #Removes the fold whose header is the given line, returns "False" if there's none.
+    def unfold(self, header: int) -> bool:
+        folds = self.get_folds()
+        kept = [fold for fold in folds if fold[0] != header]
+
+        if len(kept) == len(folds):
+            return False
+
+        self.set_folds(kept)
+
+        return True
+
+
+    def unfold_all(self) -> None:
+        self.set_folds([])
+
+
+    #Removes the folds that hide the given line, so it can be shown.
+    def reveal(self, y_pos: int) -> None:
+        if self.is_hidden(y_pos):
+            self.set_folds([(start, end) for (start, end) in self.get_folds() if not start < y_pos <= end])
+
+
+    def has_folds(self) -> bool:
+        return self.fold_gaps != []
+
+
+    #Returns the last line of the fold whose header is the given line, if it's a visible, folded header, otherwise returns "None".
+    def get_fold_end(self, y_pos: int) -> Optional[int]:
+        interval = self.interval_before(y_pos + 1)
+
+        if interval >= 0 and self.get_interval_start(interval) == y_pos + 1:
+            return self.get_interval_end(interval)
+
+        return None
+
+
+    #Returns whether the given line is hidden by a fold.
+    def is_hidden(self, y_pos: int) -> bool:
+        interval = self.interval_before(y_pos)
+        return interval >= 0 and y_pos <= self.get_interval_end(interval)
+
+
+    #Returns the next visible line after the given one, skipping over a folded region if the line is its header.
+    def next_visible(self, y_pos: int) -> int:
+        fold_end = self.get_fold_end(y_pos)
+        return (fold_end if fold_end != None else y_pos) + 1
+
+
+    #Returns the number of visible lines.
+    def get_visible_count(self) -> int:
+        return self.buffer.get_line_count() - (self.hidden_through[-1] if self.hidden_through != [] else 0)
+
+
+    #Returns the row of a line among the visible lines, a hidden line has the row of its fold's header.
+    def visible_index(self, y_pos: int) -> int:
+        interval = self.interval_before(y_pos)
+
+        if interval < 0:
+            return y_pos
+
+        #The line is hidden, it's counted as its header.
+        if y_pos <= self.get_interval_end(interval):
+            y_pos = self.get_interval_start(interval) - 1
+            interval -= 1
+
+        return y_pos - (self.hidden_through[interval] if interval >= 0 else 0)
+
+
+    #Returns the line in the given row among the visible lines.
+    def line_at_visible(self, row: int) -> int:
+        #An interval hides the lines after the row of its header, so the intervals before the line are the ones whose header's row is lower
+        #than the given row, they are found with a search in the tree of the rows.
+        count = (self.row_tree.search(row - 1) if row > 0 else 0)
+        return row + (self.hidden_through[count - 1] if count > 0 else 0)
+
+
+    #Returns the region that can be folded at the given line, as a tuple of its header and its last line, or "None" if there's none. A line
+    #with the start marker starts a region that ends at its matching end marker. Otherwise, if the lines after the given one are more indented
+    #it's the header of the region they form, if not the region is the one the line is in, the header is the closest line above it with less
+    #indentation.
+    def find_region(self, y_pos: int) -> Optional[tuple[int, int]]:
+        if self.START_MARKER in self.buffer.get_line(y_pos):
+            end = self.find_marker_end(y_pos)
+            if end != None:
+                return (y_pos, end)
+
+        indent = self.get_indent(y_pos)
+
+        if indent == None:
+            return None
+
+        end = self.find_indent_end(y_pos, indent)
+        if end > y_pos:
+            return (y_pos, end)
+
+        #The enclosing region.
+        for header in range(y_pos - 1, -1, -1):
+            header_indent = self.get_indent(header)
+
+            if header_indent != None and header_indent < indent:
+                return (header, self.find_indent_end(header, header_indent))
+
+        return None
+
+
+    #Returns the regions whose header has the given indentation, used to fold every region at a level, like the top levels of a JSON or YAML
+    #file. The buffer is scanned once.
+    def find_level_regions(self, indent: int) -> list[tuple[int, int]]:
+        regions = []
+        header = None
+        last = None
+
+        for y in range(self.buffer.get_line_count()):
+            line_indent = self.get_indent(y)
+
+            #Blank lines don't end regions.
+            if line_indent == None:
+                continue
+
+            if line_indent <= indent:
+                if header != None and last > header:
+                    if line_indent == indent and self.is_closing(y):
+                        regions.append((header, y))
+                        header = None
+                        last = y
+                        continue
+
+                    regions.append((header, last))
+
+                header = (y if line_indent == indent else None)
+
+            last = y
+
+        if header != None and last > header:
+            regions.append((header, last))
+
+        return regions
+
+
+    #Returns the last line of the region that starts at the given header with the given indentation, the header itself if the lines after it
+    #aren't more indented. Blank lines at the end of the region aren't part of it, a closing bracket line is.
+    def find_indent_end(self, header: int, indent: int) -> int:
+        end = header
+
+        for y in range(header + 1, self.buffer.get_line_count()):
+            line_indent = self.get_indent(y)
+
+            if line_indent == None:
+                continue
+            if line_indent <= indent:
+                if line_indent == indent and end > header and self.is_closing(y):
+                    end = y
+                break
+
+            end = y
+
+        return end
+
+
+    #Returns the line with the end marker that matches the start marker in the given line, nested markers are taken into account. Returns "None"
+    #if there's no matching end marker.
+    def find_marker_end(self, header: int) -> Optional[int]:
+        depth = 0
+
+        for y in range(header, self.buffer.get_line_count()):
+            line = self.buffer.get_line(y)
+            depth += line.count(self.START_MARKER) - line.count(self.END_MARKER)
+
+            if depth <= 0:
+                return (y if y > header else None)
+
+        return None
+
+
+    #Returns whether a line starts with a closing bracket.
+    def is_closing(self, y_pos: int) -> bool:
+        return self.buffer.get_line(y_pos).lstrip().startswith(self.CLOSING_BRACKETS)
+
+
+    #Returns the indentation of a line, in characters, or "None" if the line is blank.
+    def get_indent(self, y_pos: int) -> Optional[int]:
+        line = self.buffer.get_line(y_pos)
+        stripped = line.lstrip()
+
+        return (len(line) - len(stripped) if stripped != "" else None)
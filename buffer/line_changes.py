@@ -0,0 +1,206 @@
+from itertools import compress, count
+from operator import ne
+
+from buffer.buffer import TextBuffer
+
+
+#Keeps track of which lines of the buffer differ from the file as it was last saved or loaded. The hash of every saved line is stored, and each
+#line of the buffer remembers the hash of its contents and which saved line it comes from, its origin, or "-1" if it's a new line. A line is
+#changed when it's new or its hash isn't the one of its origin. The information is updated from the buffer's change callbacks, only the edited
+#lines are looked at, and the number of changed lines is kept so knowing if the buffer is modified never needs a scan.
+class LineChanges:
+    def __init__(self, buffer: type[TextBuffer]) -> None:
+        self.buffer = buffer
+
+        #The hash of each line of the saved file.
+        self.saved_hashes = []
+        #The hash and origin of each line of the buffer.
+        self.hashes = []
+        self.origins = []
+        #The number of changed lines.
+        self.changed_count = 0
+        #Increased every time every line becomes unchanged, when the buffer is marked as saved or it's back to the saved contents.
+        self.saved_version = 0
+        #The last line found to differ from the saved line in its position, see "check_saved_contents".
+        self.mismatch_hint = 0
+        #Whether edits at the end of the buffer are also made to the saved file, see "set_appending_saved".
+        self.appending_saved = False
+        #The first line and the end, not included, of the lines whose origins were assigned by the last change, they can be more than the
+        #edited lines, see "buffer_changed".
+        self.updated_range = (0, 0)
+
+        self.mark_saved()
+        self.buffer.add_change_callback(self.buffer_changed)
+
+
+    #Makes the current contents of the buffer the saved ones, to be called after saving or loading a file.
+    def mark_saved(self) -> None:
+        self.saved_hashes = [hash(self.buffer.get_line(y)) for y in range(self.buffer.get_line_count())]
+        self.hashes = self.saved_hashes.copy()
+        self.origins = list(range(len(self.saved_hashes)))
+        self.changed_count = 0
+        self.saved_version += 1
+
+
+    #While enabled, edits that add lines to the end of the buffer, or replace its last lines if they are unchanged, are also made to the saved
+    #file. Used for lines that are already in the file, like the ones appended to a followed file, or that are never unsaved changes, like the
+    #results of a search in files. Only the added lines are hashed, instead of every line as "mark_saved" does.
+    def set_appending_saved(self, enabled: bool) -> None:
+        self.appending_saved = enabled
+
+
+    def get_saved_version(self) -> int:
+        return self.saved_version
+
+
+    #Returns the lines whose origins were assigned by the last change, so whether they are changed may be different, see "updated_range".
+    def get_updated_range(self) -> tuple[int, int]:
+        return self.updated_range
+
+
+    #Returns whether the line in the specified position differs from the saved file.
+    def is_changed(self, y_pos: int) -> bool:
+        origin = self.origins[y_pos]
+        return origin < 0 or self.hashes[y_pos] != self.saved_hashes[origin]
+
+
+    #Returns whether the buffer differs from the saved file. Origins are assigned in order, so if no line is changed and there are as many lines
+    #as in the saved file every line is in its original position.
+    def is_dirty(self) -> bool:
+        return self.changed_count > 0 or len(self.hashes) != len(self.saved_hashes)
+
+
+    #Change callback for the buffer. The unchanged lines at the start and end of the replaced range that are still the same keep their origin. The rest get the
+    #saved lines between their neighbours' origins if there are exactly as many of them, which happens when an edit is undone, otherwise they
+    #take the origins of the replaced lines in order and any extra line is new.
+    def buffer_changed(self, start: int, old_count: int, new_count: int) -> None:
+        if self.appending_saved and self.append_saved(start, old_count, new_count):
+            return
+
+        if start == 0 and old_count == len(self.hashes):
+            self.updated_range = (0, new_count)
+            self.replace_all([hash(self.buffer.get_line(y)) for y in range(new_count)])
+            self.check_saved_contents()
+            return
+
+        #When lines are added or removed, the changed lines next to the edit may be the ones that were really added or removed, like an empty
+        #line that is added and then joined with the line above. As many of them as lines were added or removed are included in the edit, so
+        #their origins are assigned again.
+        if old_count != new_count:
+            extra = abs(new_count - old_count)
+
+            before = 0
+            while before < extra and start - before > 0 and self.is_changed(start - before - 1):
+                before += 1
+
+            after = 0
+            while after < extra and start + old_count + after < len(self.hashes) and self.is_changed(start + old_count + after):
+                after += 1
+
+            start -= before
+            old_count += before + after
+            new_count += before + after
+
+        self.updated_range = (start, start + new_count)
+        new_hashes = [hash(self.buffer.get_line(y)) for y in range(start, start + new_count)]
+
+        old_hashes = self.hashes[start:start + old_count]
+        old_origins = self.origins[start:start + old_count]
+
+        old_changed = [self.is_changed(y) for y in range(start, start + old_count)]
+        self.changed_count -= sum(old_changed)
+
+        #Only unchanged lines keep their origin, a changed line that is the same may still get its saved line back.
+        prefix = 0
+        while prefix < min(old_count, new_count) and not old_changed[prefix] and old_hashes[prefix] == new_hashes[prefix]:
+            prefix += 1
+
+        suffix = 0
+        while (suffix < min(old_count, new_count) - prefix and not old_changed[old_count - suffix - 1] and
+            old_hashes[old_count - suffix - 1] == new_hashes[new_count - suffix - 1]):
+            suffix += 1
+
+        middle_count = new_count - prefix - suffix
+        middle_origins = old_origins[prefix:old_count - suffix][:middle_count]
+        middle_origins += [-1] * (middle_count - len(middle_origins))
+
+        #The saved lines that fit between the lines around the middle, if the line before it is new there are none.
+        first_origin = 0
+        if prefix > 0 or start > 0:
+            before = (old_origins[prefix - 1] if prefix > 0 else self.origins[start - 1])
+            first_origin = (before + 1 if before >= 0 else -1)
+
+        last_origin = len(self.saved_hashes)
+        if suffix > 0 or start + old_count < len(self.origins):
+            last_origin = (old_origins[old_count - suffix] if suffix > 0 else self.origins[start + old_count])
+
+        if first_origin >= 0 and last_origin >= 0 and last_origin - first_origin == middle_count:
+            middle_origins = list(range(first_origin, last_origin))
+
+        self.hashes[start:start + old_count] = new_hashes
+        self.origins[start:start + old_count] = old_origins[:prefix] + middle_origins + old_origins[old_count - suffix:]
+
+        self.changed_count += sum(self.is_changed(y) for y in range(start, start + new_count))
+        self.check_saved_contents()
+
+
+    #Makes an edit at the end of the buffer part of the saved file, see "set_appending_saved". The replaced lines must be the last saved lines,
+    #unchanged. Returns "False" if the edit can't be made to the saved file, it's then handled like any other edit.
+    def append_saved(self, start: int, old_count: int, new_count: int) -> bool:
+        saved_start = len(self.saved_hashes) - old_count
+        end = start + old_count
+
+        if end != len(self.hashes) or saved_start < 0 or self.origins[start:end] != list(range(saved_start, len(self.saved_hashes))) or \
+            any(self.is_changed(y) for y in range(start, end)):
+            return False
+
+        self.updated_range = (start, start + new_count)
+        new_hashes = [hash(self.buffer.get_line(y)) for y in range(start, start + new_count)]
+        self.saved_hashes[saved_start:] = new_hashes
+        self.hashes[start:] = new_hashes
+        self.origins[start:] = range(saved_start, saved_start + new_count)
+
+        return True
+
+
+    #Origins can't always be told apart when lines have the same text, so a buffer with the saved contents may still have lines marked as
+    #changed. When it has as many lines as the saved file each line is compared with the saved line in its position, if they are all the same
+    #every line gets its position as origin and the buffer is unmodified. The line that differed the last time is compared first, it usually
+    #still does, so the whole buffer is only compared when it may be back to the saved contents.
+    def check_saved_contents(self) -> None:
+        if self.changed_count == 0 or len(self.hashes) != len(self.saved_hashes):
+            return
+
+        if self.mismatch_hint < len(self.hashes) and self.hashes[self.mismatch_hint] != self.saved_hashes[self.mismatch_hint]:
+            return
+
+        mismatch = next(compress(count(), map(ne, self.hashes, self.saved_hashes)), None)
+
+        if mismatch != None:
+            self.mismatch_hint = mismatch
+        else:
+            self.origins = list(range(len(self.hashes)))
+            self.changed_count = 0
+            self.saved_version += 1
+
+
+    #Used when the whole buffer is replaced, like when undoing. The new lines are compared directly with the saved ones, the lines at the start
+    #and end that are the same keep their saved line as origin and the ones in the middle take the saved lines in between in order.
+    def replace_all(self, new_hashes: list[int]) -> None:
+        saved_count = len(self.saved_hashes)
+        new_count = len(new_hashes)
+
+        prefix = 0
+        while prefix < min(saved_count, new_count) and self.saved_hashes[prefix] == new_hashes[prefix]:
+            prefix += 1
+
+        suffix = 0
+        while suffix < min(saved_count, new_count) - prefix and self.saved_hashes[saved_count - suffix - 1] == new_hashes[new_count - suffix - 1]:
+            suffix += 1
+
+        middle_origins = list(range(prefix, saved_count - suffix))[:new_count - prefix - suffix]
+        middle_origins += [-1] * (new_count - prefix - suffix - len(middle_origins))
+
+        self.hashes = new_hashes
+        self.origins = list(range(prefix)) + middle_origins + list(range(saved_count - suffix, saved_count))
+        self.changed_count = sum(self.is_changed(y) for y in range(new_count))
@@ -0,0 +1,180 @@
+from typing import Optional
+
+from buffer.buffer import TextBuffer
+from buffer.wrap_index import FenwickTree
+
+
+#Keeps named positions of the buffer, marks, that stay on the same text when the buffer is edited. The marks are sorted by position and each one
+#stores the number of lines from the mark before it, in a Fenwick tree, so the line of a mark is a prefix sum. Lines added or removed before some
+#marks only change the distance of the first mark after the edit, so an edit costs O(log n) for the marks after it, plus O(log n) for each mark
+#in the edited lines, instead of updating every mark. Marks in the edited lines move with their text, using the edits inside the lines the buffer
+#reports. Adding or removing a mark rebuilds the tree, marks are set much less often than the buffer is edited.
+class MarkIndex:
+    #The mark set at the position the cursor was in before jumping to a line or a mark.
+    PREVIOUS_POSITION = "'"
+
+    def __init__(self, buffer: type[TextBuffer]) -> None:
+        self.buffer = buffer
+
+        #The names and columns of the marks, sorted by position, and the index of each name.
+        self.names = []
+        self.columns = []
+        self.indexes = {}
+        #The number of lines between each mark and the one before it, the first one counts from the start of the buffer, and the tree used to
+        #add them up.
+        self.gaps = []
+        self.tree = FenwickTree([])
+
+
+    #Builds the tree and the indexes from the sorted marks, given as tuples of their line, column and name.
+    def rebuild(self, marks: list[tuple[int, int, str]]) -> None:
+        self.names = [name for (_, _, name) in marks]
+        self.columns = [x for (_, x, _) in marks]
+        self.indexes = {name : i for (i, name) in enumerate(self.names)}
+        self.gaps = [y - previous_y for ((y, _, _), previous_y) in zip(marks, [0] + [y for (y, _, _) in marks])]
+        self.tree = FenwickTree(self.gaps.copy())
+
+
+    #Returns every mark, as tuples of their line, column and name, sorted by position.
+    def get_marks(self) -> list[tuple[int, int, str]]:
+        marks = []
+        y = 0
+
+        for (gap, x, name) in zip(self.gaps, self.columns, self.names):
+            y += gap
+            marks.append((y, x, name))
+
+        return marks
+
+
+    #Returns the line of the mark in the given index.
+    def get_line(self, index: int) -> int:
+        return self.tree.prefix_sum(index + 1)
+
+
+    #Returns the number of marks before the given line.
+    def count_before(self, y_pos: int) -> int:
+        if y_pos <= 0:
+            return 0
+
+        return self.tree.search(y_pos - 1)
+
+
+    #Sets a mark in the given position, a mark with the same name is moved.
+    def set_mark(self, name: str, y_pos: int, x_pos: int) -> None:
+        marks = [mark for mark in self.get_marks() if mark[2] != name]
+        marks.append((y_pos, x_pos, name))
+        marks.sort(key = lambda mark: mark[:2])
+
+        self.rebuild(marks)
+
+
+    def remove_mark(self, name: str) -> None:
+        if name in self.indexes:
+            self.rebuild([mark for mark in self.get_marks() if mark[2] != name])
+
+
+    def clear(self) -> None:
+        self.rebuild([])
+
+
+    #Returns the position of a mark as a tuple of its line and column, or "None" if there's no mark with that name.
+    def get_mark(self, name: str) -> Optional[tuple[int, int]]:
+        index = self.indexes.get(name)
+
+        if index == None:
+            return None
+
+        return (self.get_line(index), self.columns[index])
+
+
+    #Returns the marks between the lines "start" and "end", not including it, as tuples of their line, column and name.
+    def get_marks_between(self, start: int, end: int) -> list[tuple[int, int, str]]:
+        index = self.count_before(start)
+        marks = []
+
+        if index < len(self.gaps):
+            y = self.get_line(index)
+
+            while y < end:
+                marks.append((y, self.columns[index], self.names[index]))
+                index += 1
+
+                if index == len(self.gaps):
+                    break
+                y += self.gaps[index]
+
+        return marks
+
+
+    #Change callback for the buffer. The first mark after the edited lines is moved, and with it every mark after it. Marks in the edited lines
+    #follow their text if the buffer tells where the edits inside the lines were, see "move_mark", otherwise they stay in the same line and in
+    #the same column if the line is long enough.
+    def buffer_changed(self, start: int, old_count: int, new_count: int) -> None:
+        if self.names == []:
+            return
+
+        end = start + old_count
+        delta = new_count - old_count
+        first = self.count_before(start)
+        last = self.count_before(end)
+
+        if first == len(self.gaps):
+            return
+
+        text_edits = self.buffer.get_text_edits()
+
+        #The lines of the edited marks and of the first mark after them are recalculated, then the gaps that changed are updated in the tree.
+        y = self.get_line(first)
+        previous_y = y - self.gaps[first]
+        last_line = min(start + max(new_count, 1), self.buffer.get_line_count()) - 1
+
+        for index in range(first, min(last + 1, len(self.gaps))):
+            if index > first:
+                y += self.gaps[index]
+
+            if index < last:
+                if text_edits != None:
+                    new_y, self.columns[index] = self.move_mark(y, self.columns[index], text_edits)
+                else:
+                    new_y = y
+
+                new_y = min(new_y, last_line)
+                self.columns[index] = min(self.columns[index], len(self.buffer.get_line(new_y)))
+            else:
+                new_y = y + delta
+
+            self.set_gap(index, new_y - previous_y)
+            previous_y = new_y
+
+
+    #Returns the position a mark moves to after the given edits inside the lines, see "TextBuffer.text_edits". The edits are applied from the
+    #last one, so the ones before it are still in the positions they were given in. A mark before an edit stays, a mark after it, or where text
+    #is inserted, moves with the text after it, even to another line when a line is split or joined, and a mark in the replaced text goes to
+    #its start.
+    def move_mark(self, y_pos: int, x_pos: int, text_edits: list[tuple[int, int, int, int, str]]) -> tuple[int, int]:
+        for (edit_y, edit_x, end_y, end_x, text) in reversed(text_edits):
+            if (y_pos, x_pos) < (edit_y, edit_x):
+                continue
+
+            if (y_pos, x_pos) < (end_y, end_x):
+                y_pos, x_pos = edit_y, edit_x
+                continue
+
+            added_lines = text.count("\n")
+            new_end_y = edit_y + added_lines
+            new_end_x = (edit_x + len(text) if added_lines == 0 else len(text) - text.rfind("\n") - 1)
+
+            if y_pos == end_y:
+                x_pos += new_end_x - end_x
+
+            y_pos += new_end_y - end_y
+
+        return (y_pos, x_pos)
+
+
+    #Changes the gap of a mark, updating the tree.
+    def set_gap(self, index: int, gap: int) -> None:
+        if gap != self.gaps[index]:
+            self.tree.add(index, gap - self.gaps[index])
+            self.gaps[index] = gap
@@ -0,0 +1,180 @@
+from array import array
+from typing import Optional
+
+from buffer.buffer import TextBuffer
+from buffer.line_changes import LineChanges
+from buffer.wrap_index import FenwickTree
+
+
+#Keeps the summaries the overview column is drawn from, the number of changed lines and of find matches in each block of lines. Each line has a
+#flag that tells if it's changed and a count of its matches, and each block keeps their totals, so the summary of any range of lines adds up the
+#blocks inside it and only counts the lines at its ends, the buffer is never scanned when drawing. Like in "WrapIndex" the blocks have between
+#half and twice "BLOCK_SIZE" lines and a Fenwick tree keeps the number of lines of each one, so adding or removing lines only changes the blocks
+#the edit touches, which are counted again from the per line flags in O(BLOCK_SIZE) plus the edited lines, the blocks after them aren't looked
+#at. Find matches are only shown until the buffer is edited, like their highlights, so they are never moved.
+class OverviewIndex:
+    #The number of lines in each block, a block has between half and twice as many, except when there's only one.
+    BLOCK_SIZE = 1024
+
+    def __init__(self, buffer: type[TextBuffer], line_changes: type[LineChanges]) -> None:
+        self.buffer = buffer
+        self.line_changes = line_changes
+
+        #Whether each line is changed since the file was saved, "1" if it is.
+        self.changed = bytearray(self.buffer.get_line_count())
+        #The number of lines and of changed lines in each block, and the tree used to find the block of a line.
+        self.block_lines = []
+        self.block_changed = []
+        self.line_tree = None
+        self.set_blocks(self.split_lines(len(self.changed)), [])
+        self.block_changed = [0] * len(self.block_lines)
+        #The version of the saved file the flags were calculated for, saving or loading a file makes every line unchanged.
+        self.saved_version = self.line_changes.get_saved_version()
+
+        #The highlighted matches the counts are for, the number of matches in each line and in each block. "None" while there are no matches.
+        self.matches = None
+        self.line_matches = None
+        self.block_matches = None
+
+
+    #Replaces every block, given as the number of lines and of changed lines of each one, and builds the tree for them.
+    def set_blocks(self, block_lines: list[int], block_changed: list[int]) -> None:
+        #There's always a block, even if it's empty, so there's somewhere to add lines.
+        self.block_lines = (block_lines if block_lines != [] else [0])
+        self.block_changed = (block_changed if block_changed != [] else [0])
+        self.line_tree = FenwickTree(self.block_lines.copy())
+
+
+    #Returns the number of changed lines in each of the blocks of the given number of lines, starting at the given line.
+    def count_changed(self, block_start: int, block_lines: list[int]) -> list[int]:
+        block_changed = []
+
+        for line_count in block_lines:
+            block_changed.append(self.changed[block_start:block_start + line_count].count(1))
+            block_start += line_count
+
+        return block_changed
+
+
+    #Returns the number of lines of each block when the given number of lines are split in blocks.
+    def split_lines(self, line_count: int) -> list[int]:
+        if line_count <= 2 * self.BLOCK_SIZE:
+            return ([line_count] if line_count > 0 else [])
+
+        block_count = line_count // self.BLOCK_SIZE
+        return [self.BLOCK_SIZE] * (block_count - 1) + [line_count - self.BLOCK_SIZE * (block_count - 1)]
+
+
+    #Returns the block that contains the given line and the line the block starts in. A line just after the last one is in the last block.
+    def find_block(self, y_pos: int) -> tuple[int, int]:
+        block = min(self.line_tree.search(y_pos), len(self.block_lines) - 1)
+        return (block, self.line_tree.prefix_sum(block))
+
+
+    #Change callback for the buffer, it must be called after the one of "line_changes". The blocks from the one with the first replaced line to
+    #the one with the last one are replaced by new blocks with their lines, which are counted again, and the flags of the lines next to the edit
+    #whose origins were assigned again are updated in their blocks. The matches of a find are no longer valid once the buffer is edited.
+    def buffer_changed(self, start: int, old_count: int, new_count: int) -> None:
+        self.check_saved()
+
+        first, first_start = self.find_block(start)
+        last, last_start = self.find_block(max(start + old_count - 1, start))
+        self.changed[start:start + old_count] = bytes(new_count)
+
+        line_count = last_start + self.block_lines[last] - first_start + new_count - old_count
+        #A block that becomes too small is merged with the next one, so there are never many more blocks than needed.
+        if line_count < self.BLOCK_SIZE // 2 and last + 1 < len(self.block_lines):
+            last += 1
+            line_count += self.block_lines[last]
+
+        new_lines = self.split_lines(line_count)
+        new_changed = self.count_changed(first_start, new_lines)
+
+        if len(new_lines) == last - first + 1:
+            for (i, block_lines) in enumerate(new_lines):
+                self.line_tree.add(first + i, block_lines - self.block_lines[first + i])
+                self.block_lines[first + i] = block_lines
+                self.block_changed[first + i] = new_changed[i]
+        else:
+            self.set_blocks(self.block_lines[:first] + new_lines + self.block_lines[last + 1:],
+                self.block_changed[:first] + new_changed + self.block_changed[last + 1:])
+
+        first, end = self.line_changes.get_updated_range()
+
+        for y in range(first, end):
+            changed = self.line_changes.is_changed(y)
+
+            if changed != self.changed[y]:
+                self.changed[y] = changed
+                self.block_changed[self.find_block(y)[0]] += (1 if changed else -1)
+
+        self.clear_matches()
+
+
+    #Every line is unchanged after saving or loading a file, the flags and counts are cleared if the buffer was marked as saved since they were
+    #calculated.
+    def check_saved(self) -> None:
+        if self.line_changes.get_saved_version() != self.saved_version:
+            self.saved_version = self.line_changes.get_saved_version()
+            self.changed = bytearray(len(self.changed))
+            self.block_changed = [0] * len(self.block_lines)
+
+
+    #Clears the counts if the file was saved since they were calculated, should be called before getting summaries.
+    def update(self) -> None:
+        self.check_saved()
+
+
+    #Starts counting the matches of a find, which are highlighted with the given dictionary, see "add_matches".
+    def set_matches(self, matches: dict[int, list[tuple[int, int]]]) -> None:
+        self.matches = matches
+        self.line_matches = array("I", bytes(4 * len(self.changed)))
+        self.block_matches = [0] * len(self.block_lines)
+
+
+    #Adds matches found by the running find, as tuples of a line and the matches in it.
+    def add_matches(self, found: list[tuple[int, list[tuple[int, int]]]]) -> None:
+        if self.matches == None:
+            return
+
+        for (y, line_matches) in found:
+            self.line_matches[y] += len(line_matches)
+            self.block_matches[self.find_block(y)[0]] += len(line_matches)
+
+
+    def clear_matches(self) -> None:
+        self.matches = None
+        self.line_matches = None
+        self.block_matches = None
+
+
+    #Returns the matches that are counted, used to know if they are still the highlighted ones.
+    def get_matches(self) -> Optional[dict[int, list[tuple[int, int]]]]:
+        return self.matches
+
+
+    #Returns the number of changed lines and the number of matches in the lines from "start" to "end", not including it. The lines of the
+    #blocks that are completely in the range aren't looked at.
+    def get_summary(self, start: int, end: int) -> tuple[int, int]:
+        #The first block that starts in "start" or after it, and the blocks that end in "end" or before it.
+        first_block = self.line_tree.search(start)
+        first_full = self.line_tree.prefix_sum(first_block)
+        if first_full < start:
+            first_block += 1
+            first_full = self.line_tree.prefix_sum(first_block)
+
+        last_block = self.line_tree.search(end)
+        last_full = self.line_tree.prefix_sum(last_block)
+
+        #The range is inside a block.
+        if first_block >= last_block:
+            return (self.changed[start:end].count(1), (sum(self.line_matches[start:end]) if self.matches != None else 0))
+
+        changed = self.changed[start:first_full].count(1) + sum(self.block_changed[first_block:last_block]) + self.changed[last_full:end].count(1)
+        matches = 0
+
+        if self.matches != None:
+            matches = (sum(self.line_matches[start:first_full]) + sum(self.block_matches[first_block:last_block]) +
+                sum(self.line_matches[last_full:end]))
+
+        return (changed, matches)
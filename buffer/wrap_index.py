@@ -0,0 +1,208 @@
+from buffer.buffer import TextBuffer
+
+
+#A Fenwick tree, also called binary indexed tree. It stores a list of integers and allows changing a value and getting the sum of the first "n"
+#values, both in O(log n) time.
+class FenwickTree:
+    def __init__(self, values: list[int]) -> None:
+        #The tree uses indexes starting at one, index zero is never used.
+        self.tree = [0] + values
+        self.size = len(values)
+
+        #Build the tree in O(n), each node adds its partial sum to its parent.
+        for i in range(1, self.size + 1):
+            parent = i + (i & -i)
+            if parent <= self.size:
+                self.tree[parent] += self.tree[i]
+
+
+    #Adds "delta" to the value in the given index.
+    def add(self, index: int, delta: int) -> None:
+        i = index + 1
+
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+
+    #Returns the sum of the first "count" values.
+    def prefix_sum(self, count: int) -> int:
+        total = 0
+        i = count
+
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+
+        return total
+
+
+    #Returns the largest "count" such that the sum of the first "count" values is smaller or equal than "target". Since all the values stored are
+    #positive this is the index of the value that contains "target".
+    def search(self, target: int) -> int:
+        count = 0
+        step = 1 << self.size.bit_length()
+
+        while step > 0:
+            if count + step <= self.size and self.tree[count + step] <= target:
+                count += step
+                target -= self.tree[count]
+
+            step >>= 1
+
+        return count
+
+
+#Keeps the number of screen rows each line of the buffer occupies when soft wrapping is enabled. Only the lines that are edited get measured
+#again. The rows of the lines are kept in blocks of up to "2 * BLOCK_SIZE" lines, and two Fenwick trees keep the number of lines and rows of each
+#block, so converting between lines and screen rows is O(log n) plus O(BLOCK_SIZE) to walk the lines inside a block. Adding or removing lines
+#only splices the blocks the edit touches, which costs O(BLOCK_SIZE) plus the edited lines. When that changes the number of blocks, a block is
+#split or merged, the trees are built again in O(n / BLOCK_SIZE), which only happens every "BLOCK_SIZE" or so lines added or removed.
+class WrapIndex:
+    BLOCK_SIZE = 512
+
+    def __init__(self, buffer: type[TextBuffer], width: int) -> None:
+        self.buffer = buffer
+        #The width, in console cells, available for displaying a line.
+        self.width = max(width, 1)
+
+        #The number of screen rows of each line, in blocks, the number of lines and rows of each block and the trees used to add them up.
+        self.blocks = []
+        self.block_lines = []
+        self.block_rows = []
+        self.line_tree = None
+        self.row_tree = None
+
+        self.rebuild()
+
+
+    #Measures every line in the buffer again, only needed when the index is created or the width changes.
+    def rebuild(self) -> None:
+        self.set_blocks(self.split_rows([self.line_rows(y) for y in range(self.buffer.get_line_count())]))
+
+
+    #Replaces every block and builds the trees for them.
+    def set_blocks(self, blocks: list[list[int]]) -> None:
+        #There's always a block, even if it's empty, so there's somewhere to add lines.
+        self.blocks = (blocks if blocks != [] else [[]])
+        self.block_lines = [len(block) for block in self.blocks]
+        self.block_rows = [sum(block) for block in self.blocks]
+        self.line_tree = FenwickTree(self.block_lines.copy())
+        self.row_tree = FenwickTree(self.block_rows.copy())
+
+
+    #Splits the rows of some lines into blocks of "BLOCK_SIZE" lines, the last one can have up to twice as many.
+    def split_rows(self, rows: list[int]) -> list[list[int]]:
+        block_count = max(len(rows) // self.BLOCK_SIZE, 1)
+        blocks = [rows[i * self.BLOCK_SIZE:(i + 1) * self.BLOCK_SIZE] for i in range(block_count - 1)]
+        blocks.append(rows[(block_count - 1) * self.BLOCK_SIZE:])
+
+        return [block for block in blocks if block != []]
+
+
+    #Returns the number of rows a line occupies. A line always has room for the cursor after its last character, that's why a line exactly as
+    #long as the width takes two rows.
+    def line_rows(self, y_pos: int) -> int:
+        return self.buffer.get_line_width(y_pos) // self.width + 1
+
+
+    #Changes the width of the index, if it's different from the current one the index is rebuilt.
+    def set_width(self, width: int) -> None:
+        width = max(width, 1)
+
+        if width != self.width:
+            self.width = width
+            self.rebuild()
+
+
+    #Returns the block that contains the given line and the position of the line in it. A line just after the last one is at the end of the
+    #last block.
+    def find_block(self, y_pos: int) -> tuple[int, int]:
+        block = min(self.line_tree.search(y_pos), len(self.blocks) - 1)
+        return (block, y_pos - self.line_tree.prefix_sum(block))
+
+
+    #Change callback for the buffer. Lines that were only modified are updated in their blocks, if lines were added or removed the blocks the
+    #edit touches are spliced, only the new lines are measured.
+    def buffer_changed(self, start: int, old_count: int, new_count: int) -> None:
+        new_rows = [self.line_rows(y) for y in range(start, start + new_count)]
+
+        if old_count == new_count:
+            for i in range(new_count):
+                block, offset = self.find_block(start + i)
+                self.set_block_rows(block, self.block_rows[block] + new_rows[i] - self.blocks[block][offset])
+                self.blocks[block][offset] = new_rows[i]
+
+            return
+
+        #The whole buffer was replaced.
+        if start == 0 and old_count == self.line_tree.prefix_sum(len(self.blocks)):
+            self.set_blocks(self.split_rows(new_rows))
+            return
+
+        first, first_offset = self.find_block(start)
+        last, last_offset = self.find_block(start + old_count)
+        #The edit can end just before a block, which then isn't touched.
+        if last_offset == 0 and last > first:
+            last -= 1
+            last_offset = self.block_lines[last]
+
+        rows = self.blocks[first][:first_offset] + new_rows + self.blocks[last][last_offset:]
+        #A block that becomes too small is merged with the next one, so there are never many more blocks than needed.
+        if len(rows) < self.BLOCK_SIZE // 2 and last + 1 < len(self.blocks):
+            last += 1
+            rows += self.blocks[last]
+
+        new_blocks = (self.split_rows(rows) if len(rows) > 2 * self.BLOCK_SIZE or rows == [] else [rows])
+
+        if len(new_blocks) == last - first + 1:
+            for (i, block) in enumerate(new_blocks):
+                self.blocks[first + i] = block
+                self.set_block_lines(first + i, len(block))
+                self.set_block_rows(first + i, sum(block))
+        else:
+            self.set_blocks(self.blocks[:first] + new_blocks + self.blocks[last + 1:])
+
+
+    #Changes the number of lines or rows of a block, updating the tree.
+    def set_block_lines(self, block: int, lines: int) -> None:
+        self.line_tree.add(block, lines - self.block_lines[block])
+        self.block_lines[block] = lines
+
+
+    def set_block_rows(self, block: int, rows: int) -> None:
+        self.row_tree.add(block, rows - self.block_rows[block])
+        self.block_rows[block] = rows
+
+
+    #Returns the number of rows the line in "y_pos" occupies.
+    def get_line_rows(self, y_pos: int) -> int:
+        block, offset = self.find_block(y_pos)
+        return self.blocks[block][offset]
+
+
+    #Returns the total number of rows the buffer occupies.
+    def get_total_rows(self) -> int:
+        return self.row_tree.prefix_sum(len(self.blocks))
+
+
+    #Returns the screen row, counting from the start of the buffer, of the given position.
+    def row_of(self, y_pos: int, x_pos: int) -> int:
+        block, offset = self.find_block(y_pos)
+        return self.row_tree.prefix_sum(block) + sum(self.blocks[block][:offset]) + self.buffer.get_columns(y_pos)[x_pos] // self.width
+
+
+    #Returns the line that contains the given screen row and which of the line's rows it is. Rows after the last one are in the last line.
+    def line_at_row(self, row: int) -> tuple[int, int]:
+        block = min(self.row_tree.search(row), len(self.blocks) - 1)
+        y_pos = self.line_tree.prefix_sum(block)
+        row -= self.row_tree.prefix_sum(block)
+
+        for rows in self.blocks[block][:-1]:
+            if row < rows:
+                break
+
+            row -= rows
+            y_pos += 1
+
+        return (y_pos, row)
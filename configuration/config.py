@@ -1,5 +1,4 @@
-import yaml
-from yaml.loader import SafeLoader
+import os, hashlib, marshal
 from dataclasses import dataclass
 
 
@@ -10,6 +9,16 @@ class EditorConfig:
     tab_size: int = None
     undo_separation_time: float = None
     max_undo_states: int = None
+    journal_flush_time: float = None
+    file_check_time: float = None
+    follow_check_time: float = None
+    search_threads: int = None
+    search_ignore: list[str] = None
+    find_time_limit: float = None
+    chord_timeout: float = None
+    parked_buffers: int = None
+    auto_indent: bool = None
+    spell_check_words: str = None
 
 
 #Configuration for the cursor.
@@ -18,17 +27,20 @@ class CursorConfig:
     scroll_keys_lines: int = None
 
 
-#This class contains configuration info pertaining to the buffer display. The Y and X ends are specified from the total height or width
-#respectively. For example, a "y_end" of (-2) means that the Y size of the buffer will be the total height of the console window minus 2.
+#This class contains configuration info pertaining to the buffer display. The Y and X ends are specified from the height or width of the
+#display's part of the console respectively. For example, a "y_end" of (-1) means that the Y size of the buffer will be the height of the
+#display minus 1, the status-bar.
 @dataclass
 class DisplayConfig:
     #These four configurations are for internal editor use, not configurable by the user.
     y_start: int = 0
-    y_end: int = -2
+    y_end: int = -1
     x_start: int = 0
     x_end: int = 0
 
     line_number_min_width = None
+    soft_wrap = None
+    overview = None
     statusbar_config = None
     statusbar_separators_definitions = None
 
@@ -40,25 +52,76 @@ class DisplayColourConfig:
     highlight_colour = None
     cursor_colour = None
     line_number_colour = None
+    changed_line_number_colour = None
     empty_line_number_colour = None
     status_bar_colour = None
     prompt_colour = None
+    matching_bracket_colour = None
+    overview_colour = None
+    overview_viewport_colour = None
 
 
 class ConfigurationHandler:
     def __init__(self):
         self.config_file_name = "./configuration/config.yaml"
+        #The parsed configuration is cached in this file, in "marshal" format, so that YAML doesn't have to be imported or parsed on every launch.
+        self.config_cache_name = "./configuration/config.cache"
         self.config_file = None
 
         self.load_config_file()
 
 
-    #Loads the configuration file and stores the info as a dictionary.
+    #Loads the configuration file and stores the info as a dictionary. If the cached configuration matches the configuration file it's used
+    #instead.
     def load_config_file(self) -> None:
-        #Open the configuration file.
-        with open(self.config_file_name) as file:
+        mtime = os.stat(self.config_file_name).st_mtime_ns
+        cache = self.read_config_cache()
+
+        #If the modification time of the file hasn't changed we don't even need to read it.
+        if cache != None and cache["mtime"] == mtime:
+            self.config_file = cache["config"]
+            return
+
+        with open(self.config_file_name, "rb") as file:
+            contents = file.read()
+
+        digest = hashlib.sha1(contents).hexdigest()
+
+        #The file was touched but its contents are the same, we can still use the cache.
+        if cache != None and cache["hash"] == digest:
+            self.config_file = cache["config"]
+        else:
+            #YAML is only imported when the configuration actually has to be parsed, since importing it is a large part of the startup time.
+            import yaml
+            from yaml.loader import SafeLoader
+
             #We use the "SafeLoader" to avoid leaving a security hole that could be exploited.
-            self.config_file = yaml.load(file, Loader = SafeLoader)
+            self.config_file = yaml.load(contents, Loader = SafeLoader)
+
+        self.write_config_cache(mtime, digest)
+
+
+    #Returns the cached configuration as a dictionary with the keys "mtime", "hash" and "config", if there's no valid cache returns "None".
+    def read_config_cache(self) -> dict | None:
+        try:
+            with open(self.config_cache_name, "rb") as file:
+                cache = marshal.load(file)
+        except:
+            return None
+
+        if not isinstance(cache, dict) or not {"mtime", "hash", "config"} <= cache.keys():
+            return None
+
+        return cache
+
+
+    #Stores the current configuration in the cache, failing to write it isn't an error, the next launch will simply parse the YAML again.
+    def write_config_cache(self, mtime: int, digest: str) -> None:
+        try:
+            with open(self.config_cache_name, "wb") as file:
+                marshal.dump({"mtime" : mtime, "hash" : digest, "config" : self.config_file}, file)
+        except:
+            pass
 
 
     #Returns a "EditorConfig" dataclass with the values from the configuration file.
@@ -69,6 +132,16 @@ class ConfigurationHandler:
         config.tab_size = self.config_file["editor behaviour"]["tab size"]
         config.undo_separation_time = self.config_file["editor behaviour"]["undo separation time"]
         config.max_undo_states = self.config_file["editor behaviour"]["max undo states"]
+        config.journal_flush_time = self.config_file["editor behaviour"]["journal flush time"]
+        config.file_check_time = self.config_file["editor behaviour"]["file check time"]
+        config.follow_check_time = self.config_file["editor behaviour"]["follow check time"]
+        config.search_threads = self.config_file["editor behaviour"]["search threads"]
+        config.search_ignore = self.config_file["editor behaviour"]["search ignore"]
+        config.find_time_limit = self.config_file["editor behaviour"]["find time limit"]
+        config.chord_timeout = self.config_file["editor behaviour"]["chord timeout"]
+        config.parked_buffers = self.config_file["editor behaviour"]["parked buffers"]
+        config.auto_indent = self.config_file["editor behaviour"]["auto indent"]
+        config.spell_check_words = self.config_file["editor behaviour"]["spell check words"]
 
         return config
 
@@ -85,6 +158,8 @@ class ConfigurationHandler:
     def get_display_config(self) -> DisplayConfig:
         config = DisplayConfig()
         config.line_number_min_width = self.config_file["display behaviour"]["line number min width"]
+        config.soft_wrap = self.config_file["display behaviour"]["soft wrap"]
+        config.overview = self.config_file["display behaviour"]["overview"]
         config.statusbar_config = self.config_file["display behaviour"]["statusbar config"]
         config.statusbar_separators_definitions = self.config_file["display behaviour"]["statusbar separators definitions"]
 
@@ -98,8 +173,22 @@ class ConfigurationHandler:
         config.highlight_colour = self.config_file["display colour"]["highlight colour"]
         config.cursor_colour = self.config_file["display colour"]["cursor colour"]
         config.line_number_colour = self.config_file["display colour"]["line number colour"]
+        config.changed_line_number_colour = self.config_file["display colour"]["changed line number colour"]
         config.empty_line_number_colour = self.config_file["display colour"]["empty line number colour"]
         config.status_bar_colour = self.config_file["display colour"]["status bar colour"]
         config.prompt_colour = self.config_file["display colour"]["prompt colour"]
+        config.matching_bracket_colour = self.config_file["display colour"]["matching bracket colour"]
+        config.overview_colour = self.config_file["display colour"]["overview colour"]
+        config.overview_viewport_colour = self.config_file["display colour"]["overview viewport colour"]
+
+        return config
+
+
+    #Returns the key bindings, the keys of each action, as a dictionary of action names and key sequences, or lists of them.
+    def get_keybindings(self) -> dict[str, str | list[str]]:
+        return self.config_file["keybindings"]
+
 
-        return config
\ No newline at end of file
+    #Returns the names of all the colours used in the configuration file, so that only those colour pairs have to be initialized.
+    def get_used_colours(self) -> list[str]:
+        return list(self.config_file["display colour"].values())
\ No newline at end of file
@@ -0,0 +1,92 @@
+#The thin client of server mode, see "actions/server.py". It only imports a few modules of the standard library, so it starts in a few
+#milliseconds. The terminal is handed to the editor server, starting one if none is running, and the client waits until the editor detaches it.
+import json, os, os.path, signal, socket, subprocess, sys, termios, time
+
+from actions.server import get_socket_path
+
+
+#How long to wait for a server that was just started to accept connections, in seconds.
+SERVER_START_TIMEOUT = 10
+
+
+#Connects to the server, starting it if it isn't running. Returns "None" if it couldn't be started.
+def connect(socket_path: str) -> socket.socket | None:
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+    try:
+        connection.connect(socket_path)
+        return connection
+    except (FileNotFoundError, ConnectionRefusedError):
+        pass
+
+    #The server runs from the editor's folder, where its configuration is, in its own session so closing the terminal doesn't stop it.
+    editor_folder = os.path.dirname(os.path.abspath(__file__))
+    subprocess.Popen([sys.executable, os.path.join(editor_folder, "console_editor.py"), "--server"], cwd = editor_folder, stdin = subprocess.DEVNULL,
+        stdout = subprocess.DEVNULL, stderr = subprocess.DEVNULL, start_new_session = True)
+
+    end_time = time.time() + SERVER_START_TIMEOUT
+
+    while time.time() < end_time:
+        try:
+            connection.connect(socket_path)
+            return connection
+        except (FileNotFoundError, ConnectionRefusedError):
+            time.sleep(0.01)
+
+    return None
+
+
+def main() -> int:
+    start_time = time.time()
+    socket_path = get_socket_path()
+    arguments = sys.argv[1:]
+
+    #Stops the server once its terminal is detached.
+    if arguments == ["--stop"]:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            connection.connect(socket_path)
+        except OSError:
+            print("The editor server isn't running")
+            return 1
+
+        connection.sendall(json.dumps({"stop" : True}).encode())
+        connection.close()
+        return 0
+
+    if len(arguments) > 1:
+        print("Usage: python console_client.py [file] | --stop")
+        return 1
+
+    if not os.isatty(0) or not os.isatty(1):
+        print("The client has to be run in a terminal")
+        return 1
+
+    connection = connect(socket_path)
+    if connection == None:
+        print("Failed to start the editor server")
+        return 1
+
+    request = {"cwd" : os.getcwd(), "filename" : (os.path.abspath(arguments[0]) if arguments != [] else None), "time" : start_time}
+    #The terminal settings are restored at the end, even if the server dies without restoring them.
+    terminal_settings = termios.tcgetattr(0)
+
+    #The server doesn't get the terminal's resize signals, they are forwarded through the connection.
+    signal.signal(signal.SIGWINCH, lambda signal_number, frame: connection.send(b"r"))
+
+    try:
+        socket.send_fds(connection, [json.dumps(request).encode()], [0, 1])
+
+        #The connection is closed when the terminal is detached.
+        while (data := connection.recv(4096)) != b"":
+            if data == b"busy":
+                print("The editor server is attached to another terminal")
+                return 1
+    finally:
+        termios.tcsetattr(0, termios.TCSADRAIN, terminal_settings)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
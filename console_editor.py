@@ -1,25 +1,46 @@
-import curses, curses.ascii, os.path
+#The startup timer is created before importing anything else, so the time spent on imports is also measured.
+from actions.startup_timer import StartupTimer
+startup_timer = StartupTimer()
+
+import curses, os, os.path, sys, time
+from typing import Callable, Optional
 
 from actions.utils import CursesUtils
-from buffer.buffer import TextBuffer
+from buffer.buffer import TextBuffer, Line, EditOperationsEnum
 from buffer.cursor import Cursor
+from buffer.fold_index import FoldIndex
+from buffer.bracket_index import BracketIndex
+from buffer.line_changes import LineChanges
+from buffer.overview_index import OverviewIndex
+from buffer.mark_index import MarkIndex
 from display.display import Display
+from display.display_modes import DisplayModeHandler
+from display.render_cache import RenderCache
+from display.windows import Window, WindowLayout
 from actions.input_output import IOHandler
 from configuration.config import ConfigurationHandler
 from actions.prompt import Prompt
 from actions.command_help import CommandHelp
 from actions.basic_input import BasicInput
-from actions.find import FindInBuffer
 from actions.undo import Undo
+from actions.journal import EditJournal
+from actions.file_watcher import FileWatcher
+from actions.tail_follow import TailFollow
+from actions.macro import Macro
+from actions.keymap import Keymap
+from actions.parked_buffers import ParkedBuffers
+from actions.compression import detect_format, format_from_extension, is_supported
 from actions.time_counter import TimeCounter
 
 
 class TextEditor(CursesUtils):
-    def __init__(self):
+    #In server mode "server" is the server the editor runs in and "request" is the request of the client whose terminal is attached, see
+    #"actions/server.py".
+    def __init__(self, startup_timer: type[StartupTimer], server = None, request: Optional[dict] = None):
         super().__init__()
 
         #####CONFIGURATION#####
-        #Make "getch" non-blocking.
+        #Make "get_wch" non-blocking.
         self.stdscr.nodelay(True)
 
         #####GENERAL VARIABLES#####
@@ -31,183 +52,863 @@ class TextEditor(CursesUtils):
         self.config = ConfigurationHandler()
         #The editor's configuration.
         self.editor_config = self.config.get_editor_config()
+        #Only initialize the colour pairs the configuration uses.
+        self.generate_colours(self.config.get_used_colours())
+        #Measures the time to first frame.
+        self.startup_timer = startup_timer
 
         #The text buffer handler.
         self.buffer = TextBuffer()
+        self.buffer.set_tab_size(self.editor_config.tab_size)
+        #The folded regions of the buffer, kept up to date as the buffer is edited.
+        self.fold_index = FoldIndex(self.buffer)
+        self.buffer.add_change_callback(self.fold_index.buffer_changed)
+        #The brackets of the buffer and their depths, used to match brackets and to auto-indent, kept up to date as the buffer is edited.
+        self.bracket_index = BracketIndex(self.buffer)
+        self.buffer.add_change_callback(self.bracket_index.buffer_changed)
+        #The named positions set by the user, they follow the text they are on as the buffer is edited.
+        self.mark_index = MarkIndex(self.buffer)
+        self.buffer.add_change_callback(self.mark_index.buffer_changed)
         #The cursor handler.
-        self.cursor = Cursor(self.config.get_cursor_config())
-        #The I/O handler.
-        self.io = IOHandler()
+        self.cursor = Cursor(self.config.get_cursor_config(), self.fold_index)
+        #The I/O handler, it keeps track of the lines changed since the file was saved.
+        self.io = IOHandler(line_changes = LineChanges(self.buffer))
+        #The functions of the actions and the keys bound to them.
+        self.actions = self.create_actions()
+        self.hex_actions = self.create_hex_actions()
+        self.keymap = Keymap(self.config.get_keybindings(), set(self.actions), self.editor_config.chord_timeout)
         #The prompt handler.
-        self.prompt = Prompt("COMMANDS: Ctrl+S - save | Ctrl+O - open | Ctrl+A - command help | Ctrl+Q - quit", self.editor_config.forget_time)
+        self.prompt = Prompt("COMMANDS: " + self.describe_actions(["save", "open", "command help", "quit"]), self.editor_config.forget_time)
+        #The display mode and the rendered lines of the buffer, shared by the displays of every window.
+        self.display_mode_handler = DisplayModeHandler(self.config.get_display_colour_config(), self)
+        self.render_cache = RenderCache(self.buffer, self.display_mode_handler)
+        self.buffer.add_change_callback(self.render_cache.buffer_changed)
+        #The summaries of the changed lines and find matches the overview column is drawn from, "None" if the overview is disabled.
+        self.overview_index = None
+        if self.config.get_display_config().overview:
+            self.overview_index = OverviewIndex(self.buffer, self.io.line_changes)
+            self.buffer.add_change_callback(self.overview_index.buffer_changed)
         #The display handler.
-        self.display = Display(self, self.buffer, self.cursor, self.prompt, self.io, self.config.get_display_config(), self.config.get_display_colour_config())
+        self.display = self.create_display(self.cursor)
+        #The windows the console is split into, "cursor" and "display" are the ones of the active window.
+        self.windows = WindowLayout(self.buffer, Window(self.cursor, self.display))
+        self.buffer.add_change_callback(self.windows.buffer_changed)
         #Basic input handler.
         self.basic_input = BasicInput(self, self.config.get_display_colour_config())
         #Command help handler.
-        self.command_help = CommandHelp(["Ctrl+Z - undo | Ctrl+F - find | Ctrl+G - goto line | Ctrl+W - word count", "Consectetur adipiscing elit. Nulla non neque rutrum lacus dapibus lobortis.", "Maecenas lobortis nibh massa, in varius leo auctor eget"], self.editor_config.forget_time)
-        #Find in buffer.
-        self.find_in_buffer = FindInBuffer(self.buffer)
+        self.command_help = CommandHelp([self.describe_actions(["undo", "find", "goto line", "word count", "line command"]),
+            self.describe_actions(["toggle soft wrap", "follow file", "cursor below", "cursors at matches"]),
+            self.describe_actions(["search in files", "last search results", "match bracket", "set mark", "jump to mark"]), self.describe_actions(["record macro", "replay macro", "hex view", "spell check"]),
+            self.describe_actions(["toggle fold", "fold level", "unfold all"]),
+            self.describe_actions(["split horizontally", "split vertically", "next window", "close window"])], self.editor_config.forget_time)
+        #Find in buffer, it's created the first time it's used since it's rarely needed.
+        self.find_in_buffer = None
         #Undo handler.
         self.undo_handler = Undo(self.editor_config.undo_separation_time, self.editor_config.max_undo_states)
+        #Crash-recovery journal of the edits to the current file.
+        self.journal = EditJournal(self.buffer, self.editor_config.journal_flush_time)
+        #Detects changes made to the open file by other programs.
+        self.file_watcher = FileWatcher(self.editor_config.file_check_time)
+        #Follows files that keep growing, like logs.
+        self.tail_follow = TailFollow(self.editor_config.follow_check_time)
+        #Line commands, like sort, they are created the first time they are used.
+        self.line_commands = None
+        #The spell checker, it's created the first time spell checking is turned on. "spell_error_shown" is set once it reported that the word
+        #list couldn't be loaded.
+        self.spell_checker = None
+        self.spell_error_shown = False
+        #The file finder used to open files, it's created the first time it's used.
+        self.file_finder = None
+        #Search in files, it's created the first time it's used. While the buffer shows its results Enter opens the result under the cursor.
+        self.file_search = None
+        self.showing_search_results = False
+        #The background job that is running, like a line command, or "None".
+        self.current_job = None
+        #The input that is open, like the one for the line number of goto line, or "None". While it's open the keys go to it.
+        self.current_input = None
+        #The buffer version and console size the screen was last drawn with, while an input is open the rest of the screen is only drawn again
+        #when they change.
+        self.drawn_state = None
+        #The recorded keyboard macro.
+        self.macro = Macro()
         #COunter for the quit function.
         self.quit_counter = TimeCounter(self.editor_config.confirmation_count, self.editor_config.forget_time)
+        #In server mode the editor outlives the terminals attached to it, the unmodified files opened before the current one are kept loaded.
+        self.server = server
+        self.parked_buffers = ParkedBuffers(self.editor_config.parked_buffers)
+
+        if self.server != None:
+            self.attach(request)
 
 
     def text_editor(self) -> None:
         while True:
-            #Clear the screen
-            self.stdscr.clear()
-
-            #Get and process key input.
-            self.get_input()
+            #Get and process key input, while an input is open the keys go to it.
+            if self.current_input != None:
+                self.current_input.input_handler()
+            else:
+                self.get_input()
 
-            #Call the display function.
-            self.display.display()
+            #Draw the screen.
+            self.draw()
 
             #Call all handlers.
             self.prompt.prompt_handler()
             self.command_help.help_line_handler()
             self.undo_handler.undo_handler(self.buffer.get_buffer(), self.cursor.get_cursor_value())
             self.quit_counter.quit_counter_handler()
+            self.file_change_handler()
+            self.tail_follow_handler()
+            self.job_handler()
+            self.spell_check_handler()
+            self.keymap.chord_handler()
+            self.server_handler()
 
             #Get console size.
             self.get_size()
             #Refresh the screen.
             self.stdscr.refresh()
-            #Gets the pressed key code.
-            try:
-                self.key = self.stdscr.getch()
-            except:
-                self.key = -1
+
+            #Once the first frame has been displayed report the startup time.
+            if self.startup_timer.frame_displayed():
+                self.prompt.change_prompt(f"Started in {self.startup_timer.get_first_frame_time():.0f} ms")
+
+                #Invalid key bindings are reported instead, otherwise they would go unnoticed.
+                if self.keymap.get_errors() != []:
+                    self.prompt.change_prompt(self.keymap.get_errors()[0])
+
+            #Gets the pressed key.
+            self.key = self.get_key()
+
+
+    #Draws the screen. While an input is open only its line is drawn, unless the rest of the screen changed, so typing in it costs almost
+    #nothing.
+    def draw(self) -> None:
+        drawn_state = (self.buffer.get_version(), self.y_size, self.x_size)
+
+        if self.current_input != None and not self.current_input.take_screen_changed() and drawn_state == self.drawn_state:
+            self.current_input.display_input()
+            return
+
+        #Clear the screen
+        self.stdscr.clear()
+
+        #Call the display functions.
+        self.display_windows()
+        self.drawn_state = drawn_state
+
+        if self.current_input != None:
+            self.current_input.display_input()
+
+
+    #Displays every window, the active one last, then the separators between side by side windows and the prompt.
+    def display_windows(self) -> None:
+        self.windows.arrange(0, 0, self.y_size - 1, self.x_size)
+
+        for window in self.windows.get_windows():
+            if window is not self.windows.get_active():
+                window.display.display(False)
+
+        self.display.display()
+
+        separator_colour = self.get_colour(self.display.colour_config.status_bar_colour)
+        for (top, column, height) in self.windows.separators:
+            for y in range(top, top + height):
+                self.addstrex(y, column, "|", separator_colour)
+
+        self.display.display_prompt()
+
+
+    #Returns a new display of the buffer that shows the given cursor.
+    def create_display(self, cursor: type[Cursor]) -> type[Display]:
+        return Display(self, self.buffer, cursor, self.fold_index, self.bracket_index, self.prompt, self.io, self.config.get_display_config(),
+            self.config.get_display_colour_config(), self.display_mode_handler, self.render_cache, self.overview_index)
+
+
+    #Splits the active window, the new window shows the same part of the buffer, with its own cursor and scroll, and becomes the active one.
+    def split_window(self, vertical: bool) -> None:
+        cursor = Cursor(self.config.get_cursor_config(), self.fold_index)
+        cursor.set_all_positions(self.cursor.get_all_positions())
+        display = self.create_display(cursor)
+
+        #The new window starts with the soft wrapping and scroll of the active one.
+        if (display.wrap_index != None) != (self.display.wrap_index != None):
+            display.toggle_soft_wrap()
+        display.buffer_y_scroll = self.display.buffer_y_scroll
+        display.buffer_x_scroll = self.display.buffer_x_scroll
+
+        window = Window(cursor, display)
+
+        if not self.windows.split(window, vertical):
+            if display.wrap_index != None:
+                display.toggle_soft_wrap()
+            self.prompt.change_prompt("The window is too small to split")
+            return
+
+        self.focus_window(window)
+
+
+    #Makes the given window the active one, the keys go to its cursor.
+    def focus_window(self, window: Window) -> None:
+        self.windows.set_active(window)
+        self.cursor = window.cursor
+        self.display = window.display
+        self.cursor.clamp(self.buffer)
+
+
+    #Closes the active window, the next one becomes active.
+    def close_window(self) -> None:
+        closed = self.windows.close()
+
+        if closed == None:
+            self.prompt.change_prompt("The only window can't be closed")
+            return
+
+        #The display stops following the buffer.
+        if closed.display.wrap_index != None:
+            closed.display.toggle_soft_wrap()
+
+        self.focus_window(self.windows.get_active())
 
 
     def get_input(self) -> None:
         #We use the "key" variable to avoid accessing the class variable repeated times.
         key = self.key
 
-        #In non-blocking mode the function "getch" returns "(-1)" when no key was pressed.
+        #In non-blocking mode the function "get_key" returns "(-1)" when no key was pressed.
         if key == (-1):
             return
 
-        #####Input keys#####
-        #Printable characters, this range covers all of extended ASCII, including symbols.
-        if key >= 32 and key <= 253:
-            self.buffer.add_char(chr(key), self.cursor.get_y(), self.cursor.get_x())
-            self.cursor.change_x_pos(True, self.buffer)
-            #Since we've modified the buffer we call the appropriate function.
-            self.buffer_modified_handler()
-
-        #Backspace
-        elif key == curses.ascii.BS:
-            #The reason we store the old cursor position is so we can modify the cursor, by calling "change_x_pos", before trying to delete a
-            #character. We do this to solve a problem that would occur when deleting at the end of a line. What would occur is that the cursor
-            #would get positioned at the end of the new line because "change_x_pos" uses the length of the line to get it's position.
-            old_y = self.cursor.get_y()
-            old_x = self.cursor.get_x()
-
-            self.cursor.change_x_pos(False, self.buffer)
-            self.buffer.delete_char(old_y, old_x)
-
-            #Since we've modified the buffer we call the appropriate function.
-            self.buffer_modified_handler()
-
-        #Supr
-        elif key == curses.KEY_DC:
-            self.buffer.delete_char_forward(self.cursor.get_y(), self.cursor.get_x())
-            #Since we've modified the buffer we call the appropriate function.
-            self.buffer_modified_handler()
-
-        #Enter, to detect it we use the ASCII "Carriage return(CR)" or "Line feed(LF)", both are included for compatibility reasons.
-        elif key == curses.ascii.CR or key == curses.ascii.LF:
+        #The keys of the sequence the key is part of, there's more than one if it continues a chord.
+        keys = self.keymap.get_pending_keys() + [key]
+        action = self.keymap.feed(key)
+
+        if action == None:
+            #While a chord is unfinished the keys pressed so far are shown.
+            if self.keymap.get_pending_keys() != []:
+                self.prompt.change_prompt(f"{self.keymap.get_sequence_name(keys)} -")
+                return
+
+            #A chord that isn't bound is discarded.
+            if len(keys) > 1:
+                self.prompt.change_prompt(f"{self.keymap.get_sequence_name(keys)} isn't bound")
+                return
+
+            #Other keys that aren't bound are typed if they are printable characters, which are returned as strings, this covers every Unicode
+            #character.
+            if not isinstance(key, str):
+                return
+
+        #The hex view is read only, it has its own actions.
+        if self.display.display_mode_handler.get_hex_view() != None:
+            self.hex_view_input(action)
+            return
+
+        #While a macro is being recorded every editing and movement key is stored.
+        self.macro.record(keys, action)
+
+        #When there are additional cursors, editing and movement actions are applied at every cursor.
+        if self.cursor.has_extra_cursors() and self.multi_cursor_input(action, key):
+            return
+
+        if action == None:
+            self.insert_char(key)
+        else:
+            self.actions[action]()
+
+
+    #Returns the function run by each action, the keys of the actions are read from the "keybindings" section of the configuration file. To add
+    #a command add its function here and its keys to the configuration.
+    def create_actions(self) -> dict[str, Callable[[], None]]:
+        return {
+            #####Editing actions#####
+            "backspace" : self.backspace,
+            "delete" : self.delete_forward,
+            "newline" : self.newline,
+            "indent" : self.indent,
+
+            #####Cursor movement actions#####
+            "cursor right" : lambda: self.cursor.change_x_pos(True, self.buffer),
+            "cursor left" : lambda: self.cursor.change_x_pos(False, self.buffer),
+            "cursor up" : lambda: self.cursor.change_y_pos(-1, self.buffer),
+            "cursor down" : lambda: self.cursor.change_y_pos(1, self.buffer),
+            "line start" : lambda: self.cursor.cursor_start(),
+            "line end" : lambda: self.cursor.cursor_end(self.buffer),
+            "page up" : lambda: self.cursor.cursor_scroll(True, self.buffer),
+            "page down" : lambda: self.cursor.cursor_scroll(False, self.buffer),
+
+            #####Commands#####
+            "save" : self.save_handler,
+            "open" : self.load_handler,
+            "command help" : lambda: self.prompt.change_prompt(self.command_help.get_help_line()),
+            "goto line" : self.goto_line,
+            "word count" : self.word_count,
+            "quit" : self.quit,
+            "find" : self.find,
+            "undo" : self.undo,
+            "toggle soft wrap" : self.toggle_soft_wrap,
+            "follow file" : self.toggle_tail_follow,
+            "cursor below" : lambda: self.cursor.add_cursor_below(self.buffer),
+            "cursors at matches" : self.cursors_at_matches,
+            "search in files" : self.search_files,
+            "last search results" : self.last_search_results,
+            "record macro" : self.toggle_macro_recording,
+            "replay macro" : self.replay_macro,
+            "line command" : self.line_command,
+            "hex view" : self.toggle_hex_view,
+            "toggle fold" : self.toggle_fold,
+            "fold level" : self.fold_level,
+            "unfold all" : self.unfold_all,
+            "match bracket" : self.match_bracket,
+            "spell check" : self.toggle_spell_check,
+            "set mark" : self.set_mark,
+            "jump to mark" : self.jump_to_mark,
+            "split horizontally" : lambda: self.split_window(False),
+            "split vertically" : lambda: self.split_window(True),
+            "next window" : lambda: self.focus_window(self.windows.get_next()),
+            "close window" : self.close_window,
+            "cancel" : self.cancel
+        }
+
+
+    #Returns the function run by each action in the hex view, the actions that aren't in it aren't available.
+    def create_hex_actions(self) -> dict[str, Callable[[], None]]:
+        hex_view = lambda: self.display.display_mode_handler.get_hex_view()
+        #The number of displayed rows, moved by the page keys.
+        page_size = lambda: self.display.get_text_height() * hex_view().get_row_size()
+
+        return {
+            "cursor right" : lambda: hex_view().move_cursor(1),
+            "cursor left" : lambda: hex_view().move_cursor(-1),
+            "cursor up" : lambda: hex_view().move_cursor(-hex_view().get_row_size()),
+            "cursor down" : lambda: hex_view().move_cursor(hex_view().get_row_size()),
+            "line start" : lambda: hex_view().cursor_row_start(),
+            "line end" : lambda: hex_view().cursor_row_end(),
+            "page up" : lambda: hex_view().move_cursor(-page_size()),
+            "page down" : lambda: hex_view().move_cursor(page_size()),
+            "find" : lambda: self.basic_input.start("Bytes to find (hex, or text in quotes): ", self.find_bytes),
+            "goto line" : lambda: self.basic_input.start("Offset (decimal, or hex starting with 0x): ", self.goto_offset),
+            "open" : self.load_handler,
+            "command help" : lambda: self.prompt.change_prompt(self.command_help.get_help_line()),
+            "quit" : self.quit,
+            "hex view" : self.toggle_hex_view,
+            "cancel" : self.toggle_hex_view
+        }
+
+
+    #Returns the keys of the given actions and their names, like "Ctrl+S - save | Ctrl+O - open", for the help lines. Actions without keys are
+    #left out.
+    def describe_actions(self, actions: list[str]) -> str:
+        return " | ".join(f"{self.keymap.describe(action)} - {action}" for action in actions if self.keymap.is_bound(action))
+
+
+    #Types a character at the cursor.
+    def insert_char(self, char: str) -> None:
+        self.buffer.add_char(char, self.cursor.get_y(), self.cursor.get_x())
+        self.cursor.change_x_pos(True, self.buffer)
+        #Since we've modified the buffer we call the appropriate function.
+        self.buffer_modified_handler()
+
+
+    #Deletes the character before the cursor.
+    def backspace(self) -> None:
+        #The reason we store the old cursor position is so we can modify the cursor, by calling "change_x_pos", before trying to delete a
+        #character. We do this to solve a problem that would occur when deleting at the end of a line. What would occur is that the cursor
+        #would get positioned at the end of the new line because "change_x_pos" uses the length of the line to get it's position.
+        old_y = self.cursor.get_y()
+        old_x = self.cursor.get_x()
+
+        self.cursor.change_x_pos(False, self.buffer)
+        self.buffer.delete_char(old_y, old_x)
+
+        #Since we've modified the buffer we call the appropriate function.
+        self.buffer_modified_handler()
+
+
+    #Deletes the character under the cursor.
+    def delete_forward(self) -> None:
+        self.buffer.delete_char_forward(self.cursor.get_y(), self.cursor.get_x())
+        #Since we've modified the buffer we call the appropriate function.
+        self.buffer_modified_handler()
+
+
+    #Splits the line at the cursor. In the results of a search in files it opens the result instead.
+    def newline(self) -> None:
+        if self.showing_search_results:
+            self.open_search_result()
+            return
+
+        if self.editor_config.auto_indent:
+            self.auto_indent_newline()
+        else:
             self.buffer.newline(self.cursor.get_y(), self.cursor.get_x())
             #When the enter key is pressed we move the cursor down one line and then set it to the start of the line
             self.cursor.change_y_pos(1, self.buffer)
             #Set the cursor to the beginning of the new line.
             self.cursor.cursor_start()
-            #Since we've modified the buffer we call the appropriate function.
-            self.buffer_modified_handler()
 
-        #Tab key.
-        elif key == curses.ascii.TAB:
-            tab_size = self.editor_config.tab_size
-            cursor_x = self.cursor.get_x()
+        #Since we've modified the buffer we call the appropriate function.
+        self.buffer_modified_handler()
+
+
+    #Splits the line at the cursor and indents the new line like the current one, one more level if the cursor is inside brackets opened in the
+    #current line. If the rest of the line starts with a closing bracket it goes on its own line with the current indentation, with the cursor
+    #on an indented line between them. Only the current line is looked at, the bracket index has the depth in it.
+    def auto_indent_newline(self) -> None:
+        y = self.cursor.get_y()
+        x = self.cursor.get_x()
+        line = self.buffer.get_line(y)
+        indent = line[:len(line) - len(line.lstrip(" \t"))][:x]
+        inner_indent = indent
+
+        if self.bracket_index.get_line_depth(y, x) > 0:
+            inner_indent += ("\t" if indent.startswith("\t") else " " * self.editor_config.tab_size)
+
+        rest = line[x:].lstrip(" \t")
+
+        if inner_indent != indent and rest[:1] in BracketIndex.OPENING:
+            self.buffer.newline(y, x, inner_indent)
+            self.buffer.newline(y + 1, len(inner_indent), indent)
+        else:
+            self.buffer.newline(y, x, inner_indent)
+
+        self.cursor.move_to_line(y + 1, self.buffer)
+        self.cursor.set_x(len(inner_indent))
+
+
+    #Moves the cursor to the bracket that matches the one at the cursor.
+    def match_bracket(self) -> None:
+        match = self.bracket_index.find_match(self.cursor.get_y(), self.cursor.get_x())
+
+        if match == None:
+            self.prompt.change_prompt("No matching bracket")
+            return
 
-            tabs_to_insert = (tab_size - (cursor_x % tab_size))
+        self.cursor.move_to_line(match[0], self.buffer)
+        self.cursor.set_x(match[1])
 
-            #Since there's no function in the buffer to insert a string we just add the space characters one by one, whilst moving the cursor
-            #at the same time.
-            for x in range(tabs_to_insert):
-                self.buffer.add_char(" ", self.cursor.get_y(), self.cursor.get_x())
-                self.cursor.change_x_pos(True, self.buffer)
 
-            #Since we've modified the buffer we call the appropriate function.
-            self.buffer_modified_handler()
+    #Asks for the name of a mark to set at the cursor.
+    def set_mark(self) -> None:
+        self.basic_input.start("Set mark: ", self.set_entered_mark)
 
-        #####Cursor movement keys#####
-        elif key == curses.KEY_RIGHT:
+
+    #Sets the entered mark at the cursor, a mark with the same name is moved.
+    def set_entered_mark(self, name: Optional[str]) -> None:
+        #In case the user pressed "esc".
+        if name == None:
+            return
+
+        self.mark_index.set_mark(name, self.cursor.get_y(), self.cursor.get_x())
+        self.prompt.change_prompt(f"Mark \"{name}\" set")
+
+
+    #Asks for the name of a mark to jump to.
+    def jump_to_mark(self) -> None:
+        self.basic_input.start("Jump to mark: ", self.jump_to_entered_mark)
+
+
+    #Moves the cursor to the entered mark. The position the cursor jumped from is kept as a mark, so jumping to it goes back.
+    def jump_to_entered_mark(self, name: Optional[str]) -> None:
+        #In case the user pressed "esc".
+        if name == None:
+            return
+
+        position = self.mark_index.get_mark(name)
+        if position == None:
+            self.prompt.change_prompt(f"There's no mark \"{name}\"")
+            return
+
+        self.mark_index.set_mark(MarkIndex.PREVIOUS_POSITION, self.cursor.get_y(), self.cursor.get_x())
+        self.cursor.set_all_positions([position])
+
+
+    #Inserts spaces up to the next tab stop.
+    def indent(self) -> None:
+        tab_size = self.editor_config.tab_size
+        cursor_x = self.cursor.get_x()
+
+        tabs_to_insert = (tab_size - (cursor_x % tab_size))
+
+        #Since there's no function in the buffer to insert a string we just add the space characters one by one, whilst moving the cursor
+        #at the same time.
+        for x in range(tabs_to_insert):
+            self.buffer.add_char(" ", self.cursor.get_y(), self.cursor.get_x())
             self.cursor.change_x_pos(True, self.buffer)
 
-        elif key == curses.KEY_LEFT:
-            self.cursor.change_x_pos(False, self.buffer)
+        #Since we've modified the buffer we call the appropriate function.
+        self.buffer_modified_handler()
 
-        elif key == curses.KEY_UP:
-            self.cursor.change_y_pos(-1, self.buffer)
 
-        elif key == curses.KEY_DOWN:
-            self.cursor.change_y_pos(1, self.buffer)
+    #Handles an action in the hex view, typed characters have the action "None" and are ignored.
+    def hex_view_input(self, action: Optional[str]) -> None:
+        if action in self.hex_actions:
+            self.hex_actions[action]()
+        elif action != None:
+            self.prompt.change_prompt(f"Not available in the hex view, {self.keymap.describe('hex view')} closes it")
 
-        elif key == curses.KEY_HOME:
-            self.cursor.cursor_start()
 
-        elif key == curses.KEY_END:
-            self.cursor.cursor_end(self.buffer)
+    #Turns spell checking on or off, misspelled words are underlined. The word list is loaded in the background the first time.
+    def toggle_spell_check(self) -> None:
+        if self.spell_checker == None:
+            from actions.spell_check import SpellChecker
+            self.spell_checker = SpellChecker(self.buffer, self.editor_config.spell_check_words, self.get_cache_folder())
+
+        if self.spell_checker.is_active():
+            self.spell_checker.stop()
+            self.display.display_mode_handler.set_spell_checker(None)
+            self.prompt.change_prompt("Spell checking off")
+        else:
+            self.spell_checker.start()
+            self.display.display_mode_handler.set_spell_checker(self.spell_checker)
+            self.prompt.change_prompt("Spell checking on")
+
+
+    #Should be called every editor loop. Passes the displayed lines to the spell checker and takes its results, if there are new ones the screen
+    #is drawn again even if an input is open.
+    def spell_check_handler(self) -> None:
+        if self.spell_checker == None or not self.spell_checker.is_active():
+            return
+
+        if self.spell_checker.update():
+            self.drawn_state = None
+
+        if self.spell_checker.get_load_error() != None and not self.spell_error_shown:
+            self.prompt.change_prompt(self.spell_checker.get_load_error())
+            self.spell_error_shown = True
+
+
+    #Opens the current file in the hex view, or closes the hex view if it's open.
+    def toggle_hex_view(self) -> None:
+        if self.display.display_mode_handler.get_hex_view() != None:
+            self.display.display_mode_handler.get_hex_view().close()
+            self.display.display_mode_handler.set_normal_display_mode()
+            self.prompt.change_prompt("Hex view closed")
+        elif self.io.get_filename() == None:
+            self.prompt.change_prompt("The hex view needs an opened file")
+        else:
+            self.open_hex_view(self.io.get_filename())
+
+
+    #Shows the given file in the hex view, the buffer is kept and shown again when the hex view is closed. Returns "True" if no errors occurred.
+    def open_hex_view(self, filename: str) -> bool:
+        from display.hex_view import HexView
+
+        #Jobs change the display mode when they finish.
+        if self.current_job != None:
+            self.prompt.change_prompt(f"Another command is running, press {self.keymap.describe('cancel')} to cancel it")
+            return False
+
+        #The mapped bytes would be the compressed ones.
+        if detect_format(filename) != None:
+            self.prompt.change_prompt("The hex view doesn't work with compressed files")
+            return False
+
+        try:
+            hex_view = HexView(filename)
+        except (OSError, ValueError):
+            self.prompt.change_prompt(f"Failed to open file, make sure the file exists and you have permission")
+            return False
+
+        #A file that was already shown in the hex view is replaced.
+        if self.display.display_mode_handler.get_hex_view() != None:
+            self.display.display_mode_handler.get_hex_view().close()
+
+        self.display.display_mode_handler.set_hex_display_mode(hex_view)
+        self.prompt.change_prompt(f"Showing {filename} in hex, {self.keymap.describe('hex view')} to close it")
+        return True
+
+
+    #Moves the hex view's cursor to the next occurrence of the entered bytes.
+    def find_bytes(self, text: Optional[str]) -> None:
+        #The escape key was pressed, therefore nothing was entered.
+        if text == None:
+            return
+
+        from display.hex_view import HexView
+        pattern = HexView.parse_pattern(text.strip())
+
+        if pattern == None:
+            self.prompt.change_prompt("Invalid bytes, enter hex bytes like \"de ad be ef\" or text in quotes")
+        elif self.display.display_mode_handler.get_hex_view().find(pattern):
+            self.prompt.change_prompt(f"Found at offset 0x{self.display.display_mode_handler.get_hex_view().get_cursor():x}")
+        else:
+            self.prompt.change_prompt(f"No matches found for \"{text}\"")
+
+
+    #Moves the hex view's cursor to the entered offset.
+    def goto_offset(self, text: Optional[str]) -> None:
+        #The escape key was pressed, therefore nothing was entered.
+        if text == None:
+            return
+
+        try:
+            offset = int(text, 0)
+        except ValueError:
+            offset = -1
+
+        if not self.display.display_mode_handler.get_hex_view().set_cursor(offset):
+            self.prompt.change_prompt("Invalid offset entered")
+
+
+    #Cancels the running background job, if there's none removes the additional cursors.
+    def cancel(self) -> None:
+        if self.current_job != None:
+            self.current_job.cancel()
+        else:
+            self.cursor.clear_extra_cursors()
+
+    #Handles the actions that act on every cursor when there are additional cursors, a typed character has the action "None". Returns "False" if
+    #the action isn't one of them. Edits are applied at all the cursors in a single pass over the buffer and recorded as a single undo.
+    def multi_cursor_input(self, action: Optional[str], key: int | str) -> bool:
+        positions = self.cursor.get_all_positions()
+
+        if action == None:
+            self.cursor.set_all_positions(self.buffer.multi_edit(positions, EditOperationsEnum.INSERT, [key] * len(positions)))
+
+        elif action == "backspace":
+            self.cursor.set_all_positions(self.buffer.multi_edit(positions, EditOperationsEnum.BACKSPACE))
+
+        elif action == "delete":
+            self.cursor.set_all_positions(self.buffer.multi_edit(positions, EditOperationsEnum.DELETE))
+
+        elif action == "newline":
+            self.cursor.set_all_positions(self.buffer.multi_edit(positions, EditOperationsEnum.INSERT, ["\n"] * len(positions)))
+
+        elif action == "indent":
+            #Each cursor gets the spaces needed to get to its next tab stop.
+            tab_size = self.editor_config.tab_size
+            spaces = [" " * (tab_size - (x % tab_size)) for (y, x) in positions]
+            self.cursor.set_all_positions(self.buffer.multi_edit(positions, EditOperationsEnum.INSERT, spaces))
+
+        elif action == "cursor right":
+            self.cursor.for_each_cursor(lambda: self.cursor.change_x_pos(True, self.buffer))
+            return True
+
+        elif action == "cursor left":
+            self.cursor.for_each_cursor(lambda: self.cursor.change_x_pos(False, self.buffer))
+            return True
+
+        elif action == "cursor up":
+            self.cursor.for_each_cursor(lambda: self.cursor.change_y_pos(-1, self.buffer))
+            return True
+
+        elif action == "cursor down":
+            self.cursor.for_each_cursor(lambda: self.cursor.change_y_pos(1, self.buffer))
+            return True
+
+        elif action == "line start":
+            self.cursor.for_each_cursor(self.cursor.cursor_start)
+            return True
+
+        elif action == "line end":
+            self.cursor.for_each_cursor(lambda: self.cursor.cursor_end(self.buffer))
+            return True
+
+        else:
+            return False
+
+        #Since we've modified the buffer we call the appropriate function.
+        self.buffer_modified_handler()
+        return True
+
+
+    #Gets a line command, like "sort", "10,20 keep <regex>" or "!<shell command>", and runs it in the background.
+    def line_command(self) -> None:
+        if self.current_job != None:
+            self.prompt.change_prompt(f"Another command is running, press {self.keymap.describe('cancel')} to cancel it")
+            return
+
+        self.basic_input.start("Command ([start,end] sort|unique|keep|drop|!cmd): ", self.run_line_command)
+
+
+    #Runs the entered line command.
+    def run_line_command(self, command: Optional[str]) -> None:
+        #The escape key was pressed, therefore no command was entered.
+        if command == None:
+            return
+
+        if self.line_commands == None:
+            from actions.line_commands import LineCommands
+            self.line_commands = LineCommands()
+
+        parsed_command = self.line_commands.parse_command(command, self.buffer.get_line_count())
+
+        #If the command is invalid we get an error message.
+        if isinstance(parsed_command, str):
+            self.prompt.change_prompt(parsed_command)
+            return
+
+        start, count, name, argument = parsed_command
+        lines = [self.buffer.get_line(y) for y in range(start, start + count)]
+        version = self.buffer.get_version()
+
+        self.current_job = self.line_commands.start(name, argument, lines, lambda new_lines: self.replace_lines_from_job(start, count, new_lines, version))
+
+
+    #Replaces the lines a background job worked on with its result, as a single edit. If the buffer was modified while the job ran the result is
+    #discarded, since the lines may no longer be the same.
+    def replace_lines_from_job(self, start: int, count: int, new_lines: Optional[list[str]], version: int) -> None:
+        if new_lines == None:
+            return
+
+        if self.buffer.get_version() != version:
+            self.prompt.change_prompt("The buffer was modified while the command ran, its result was discarded")
+            return
+
+        self.buffer.replace_lines(start, count, new_lines)
+        self.cursor.clear_extra_cursors()
+        self.cursor.clamp(self.buffer)
+        #Since we've modified the buffer we call the appropriate function, the whole command is a single undo.
+        self.buffer_modified_handler()
+
+        self.prompt.change_prompt(f"Replaced {count} lines with {len(new_lines)} lines")
+
+
+    #Should be called every editor loop. Shows the progress of the running background job and, once it finishes, handles its result.
+    def job_handler(self) -> None:
+        job = self.current_job
+
+        if job == None:
+            return
+
+        #"done" is read before taking the output, that way the last results are never left behind.
+        done = job.done
+
+        if job.on_output != None:
+            items = job.take_output()
+            if items != []:
+                job.on_output(items)
+
+        if not done:
+            self.prompt.change_prompt(job.get_prompt())
+            return
+
+        self.current_job = None
+
+        if job.is_cancelled():
+            self.prompt.change_prompt(f"{job.description} cancelled")
+        elif job.error != None:
+            self.prompt.change_prompt(f"{job.description} failed: {job.error}")
+        else:
+            job.on_done(job.result)
+
+
+    #Gets a regex and searches every file in the current folder and its subfolders for it. The buffer is replaced by the results, which are added
+    #as they are found, pressing Enter on a result opens its file at that line.
+    def search_files(self) -> None:
+        if self.current_job != None:
+            self.prompt.change_prompt(f"Another command is running, press {self.keymap.describe('cancel')} to cancel it")
+            return
+
+        #The results replace the buffer, so the changes to it would be lost.
+        if self.io.get_dirty():
+            self.prompt.change_prompt("Save the file before searching in files")
+            return
+
+        self.basic_input.start("Search in files: ", self.start_file_search)
+
+
+    #Starts searching the files for the entered regex.
+    def start_file_search(self, regex: Optional[str]) -> None:
+        #The escape key was pressed, therefore no regex was entered.
+        if regex == None:
+            return
+
+        if self.file_search == None:
+            from actions.file_search import FileSearch
+            self.file_search = FileSearch(self.editor_config.search_ignore, self.editor_config.search_threads)
+
+        job = self.file_search.start(regex, os.curdir, self.add_search_results, lambda count: self.search_files_done(regex, count))
+
+        #If the regex is invalid we get an error message.
+        if isinstance(job, str):
+            self.prompt.change_prompt(job)
+            return
+
+        self.show_search_results([f"Results for \"{regex}\", press Enter on a result to open it"])
+        self.current_job = job
+
 
-        elif key == curses.KEY_PPAGE:
-            self.cursor.cursor_scroll(True, self.buffer)
+    #Shows the results of the last search in files again, usually after opening one of them.
+    def last_search_results(self) -> None:
+        if self.file_search == None or self.file_search.results == None:
+            self.prompt.change_prompt(f"There are no previous results, use {self.keymap.describe('search in files')} to search in files")
+        elif self.current_job != None:
+            self.prompt.change_prompt(f"Another command is running, press {self.keymap.describe('cancel')} to cancel it")
+        elif self.io.get_dirty():
+            self.prompt.change_prompt("Save the file before going back to the search results")
+        else:
+            self.show_search_results(self.file_search.results)
+
+
+    #Replaces the buffer with the given results of a search in files. The results aren't a file, nothing is journaled or watched.
+    def show_search_results(self, results: list[str]) -> None:
+        self.tail_follow.stop()
+        self.journal.stop(True)
+        self.file_watcher.unwatch()
+        self.io.set_filename(None)
 
-        elif key == curses.KEY_NPAGE:
-            self.cursor.cursor_scroll(False, self.buffer)
+        self.buffer.set_buffer([Line(line) for line in results])
+        self.cursor.set_all_positions([(0, 0)])
+        self.io.set_saved()
+        self.display.display_mode_handler.set_normal_display_mode()
+        self.showing_search_results = True
 
-        #####"CTRL" keys#####
-        #To detect keys pressed in conjunction with "Ctrl" we check for the uppercase ASCII value of the key minus 64, which is the value returned
-        #when pressing a key plus "Ctrl". For example pressing CTRL+E would get a keycode of 5.
-        #Ctrl+S -- Save
-        elif key == ord("S") - 64:
-            self.save_handler()
 
-        #Ctrl+O -- Open
-        elif key == ord("O") - 64:
-            self.load_handler()
+    #Adds results found by the running search in files to the end of the buffer, keeping the cursor where it is.
+    def add_search_results(self, results: list[str]) -> None:
+        #If a file was opened while the search ran the results are no longer shown.
+        if not self.showing_search_results:
+            return
 
-        #Ctrl+A -- Command help
-        elif key == ord("A") - 64:
-            self.prompt.change_prompt(self.command_help.get_help_line())
+        #The results aren't unsaved changes, they are added to the saved contents without hashing the results found before.
+        self.io.set_appending_saved(True)
+        self.buffer.replace_lines(self.buffer.get_line_count(), 0, results)
+        self.io.set_appending_saved(False)
 
-        #Ctrl+G -- Goto line.
-        elif key == ord("G") - 64:
-            self.goto_line()
 
-        #Ctrl+W -- Word count
-        elif key == ord("W") - 64:
-            self.word_count()
+    #Called when a search in files finishes, the results are kept so they can be shown again.
+    def search_files_done(self, regex: str, count: int) -> None:
+        if self.showing_search_results:
+            self.file_search.results = [self.buffer.get_line(y) for y in range(self.buffer.get_line_count())]
 
-        #Ctrl+Q -- Quit
-        elif key == ord("Q") - 64:
-            self.quit()
+        self.prompt.change_prompt(f"Found {count} matching lines for \"{regex}\"")
 
-        #Ctrl+F -- Find
-        elif key == ord("F") - 64:
-            self.find()
 
-        #Ctrl+Z -- Undo
-        elif key == ord("Z") - 64:
-            self.undo()
+    #Opens the file of the search result under the cursor and goes to its line.
+    def open_search_result(self) -> None:
+        result = self.file_search.parse_result(self.buffer.get_line(self.cursor.get_y()))
+
+        if result == None:
+            self.prompt.change_prompt("Move the cursor to a result to open it")
+            return
+
+        #The results are kept if the search is still running, the ones found until now can be shown again.
+        if self.current_job != None:
+            self.current_job.cancel()
+            self.file_search.results = [self.buffer.get_line(y) for y in range(self.buffer.get_line_count())]
+
+        filename, line = result
+        if self.open_file(filename):
+            self.cursor.set_all_positions([(min(line, self.buffer.get_line_count()) - 1, 0)])
+
+
+    #Places a cursor at the start of every match of the last find, the first match gets the main cursor.
+    def cursors_at_matches(self) -> None:
+        matches = self.display.display_mode_handler.get_highlight_text()
+
+        if matches == None or matches == {}:
+            self.prompt.change_prompt(f"Use {self.keymap.describe('find')} to find the text to place the cursors on first")
+            return
+
+        positions = [(y, start) for y in sorted(matches) for (start, end) in matches[y]]
+        self.cursor.set_all_positions(positions)
+        self.prompt.change_prompt(f"Placed {len(positions)} cursors, press {self.keymap.describe('cancel')} to remove them")
+
 
     #To be called every time the buffer is modified.
     def buffer_modified_handler(self) -> None:
-        #Set the dirty flag.
-        self.io.set_dirty()
         #Set the display mode to normal.
         self.display.display_mode_handler.set_normal_display_mode()
         #Since the buffer has been modified we want to add these changes to the undo stack.
@@ -219,18 +920,128 @@ class TextEditor(CursesUtils):
         #Check if there's unsaved work.
         if self.io.get_dirty():
             if self.quit_counter.check_count():
-                #Properly terminate curses and exit the program.
-                curses.endwin()
-                quit()
+                #The user chose to discard the unsaved changes, the journal is no longer needed.
+                self.journal.stop(True)
+                #In server mode the editor keeps running, the discarded changes mustn't be there for the next terminal.
+                if self.server != None:
+                    self.clear_buffer()
+
+                self.exit_editor()
             else:
                 #Show prompt indicating the need to repeat the keypress.
-                self.prompt.change_prompt(f"Please press Ctrl+Q {self.quit_counter.get_remaining_counts()} more times to exit")
+                self.prompt.change_prompt(f"Please press {self.keymap.describe('quit')} {self.quit_counter.get_remaining_counts()} more times to exit")
 
         else:
-            #Properly terminate curses and exit the program.
-            curses.endwin()
+            #In server mode the file stays open, its journal is still needed.
+            if self.server == None:
+                self.journal.stop(True)
+
+            self.exit_editor()
+
+
+    #Properly terminates curses and exits the program. In server mode the terminal is detached instead, and the editor waits for the next one.
+    def exit_editor(self) -> None:
+        curses.endwin()
+
+        if self.server == None:
+            quit()
+
+        self.detach()
+
+
+    #Empties the buffer, leaving the editor as if it had just started without a file.
+    def clear_buffer(self) -> None:
+        if self.display.display_mode_handler.get_hex_view() != None:
+            self.toggle_hex_view()
+
+        self.tail_follow.stop()
+        self.file_watcher.unwatch()
+        self.buffer.set_buffer([Line()])
+        self.io.set_filename(None)
+        self.io.compression = None
+        self.io.set_saved()
+        self.cursor.set_all_positions([(0, 0)])
+        self.showing_search_results = False
+
+
+    #####Server mode#####
+
+    #Detaches the terminal, curses must have been ended first, then waits for the next terminal to attach. If a client asked the server to stop
+    #the editor exits instead.
+    def detach(self) -> None:
+        self.server.detach()
+        request = self.server.wait_client()
+
+        if request == None:
+            self.journal.stop(not self.io.get_dirty())
+            self.server.close()
             quit()
 
+        self.attach(request)
+
+
+    #Handles the request of a client whose terminal was just attached, the server has already made it the standard input and output. The screen
+    #is drawn again for the new terminal, and the client's file is opened unless it's the open one, so attaching to an open file is instant.
+    def attach(self, request: dict) -> None:
+        self.server.resize_terminal()
+        self.get_size()
+        self.drawn_state = None
+        #The time to the first frame is measured from the client's launch.
+        self.startup_timer.restart(time.perf_counter() - (time.time() - request["time"]))
+
+        self.change_folder(request["cwd"])
+        filename = request["filename"]
+
+        if filename != None and (self.io.get_filename() == None or os.path.abspath(self.io.get_filename()) != filename):
+            self.open_file(filename)
+
+
+    #Changes the working folder to the client's. The path of the open file is made absolute first, so it still refers to the same file.
+    def change_folder(self, folder: str) -> None:
+        if folder == os.getcwd():
+            return
+
+        filename = self.io.get_filename()
+
+        if filename != None and not os.path.isabs(filename):
+            filename = os.path.abspath(filename)
+            self.io.set_filename(filename)
+            self.file_watcher.filename = filename
+            self.tail_follow.filename = filename
+
+        try:
+            os.chdir(folder)
+        except OSError:
+            return
+
+        #The file finder lists the files of the folder it was created in.
+        self.file_finder = None
+
+
+    #Checks the attached terminal in server mode. If its client disconnected without detaching, like when the terminal was closed, the editor
+    #waits for the next one, any unsaved changes are kept.
+    def server_handler(self) -> None:
+        if self.server != None and not self.server.client_handler():
+            try:
+                curses.endwin()
+            except curses.error:
+                pass
+
+            self.detach()
+
+
+    #In server mode the unmodified file in the buffer is parked when another file is opened, so opening it again is instant. Returns the arguments
+    #for "ParkedBuffers.park", or "None" if the buffer can't be parked. Files that are followed aren't parked, lines were appended to them after
+    #they were loaded.
+    def get_parkable_buffer(self) -> Optional[tuple]:
+        filename = self.io.get_filename()
+        file_stat = self.file_watcher.get_file_stat()
+
+        if self.server == None or filename == None or file_stat == None or self.io.get_dirty() or self.tail_follow.enabled:
+            return None
+
+        return (filename, file_stat, self.buffer.get_buffer(), self.io.get_compression())
+
 
     #Handles calling the I/O saving function and it's errors.
     def save_handler(self) -> None:
@@ -238,51 +1049,217 @@ class TextEditor(CursesUtils):
 
         #In case there's no specified filename we get one.
         if filename == None:
-            #Disable the prompt, get input and then re-enable the prompt.
-            self.prompt.toggle_enabled()
-            filename = self.basic_input.basic_input(self.y_size - 1, 0, "Save file: ")
-            self.prompt.toggle_enabled()
+            self.basic_input.start("Save file: ", self.save_file)
+        else:
+            self.save_file(filename)
 
-            #The escape key was pressed, therefore no filename was entered.
-            if filename == None:
-                return
+
+    #Saves the buffer to the given file.
+    def save_file(self, filename: Optional[str]) -> None:
+        #The escape key was pressed, therefore no filename was entered.
+        if filename == None:
+            return
 
         result = self.io.save_file(self.buffer, filename)
 
         #No errors occurred, display size of file saved in the prompt.
         if result > 0:
+            #Once saved the results of a search in files are a normal file.
+            self.showing_search_results = False
+            #The saved file is the new base for the journal, the edits before it don't have to be recovered.
+            self.journal.start(filename)
+            self.file_watcher.watch(filename, self.buffer)
             self.prompt.change_prompt(f"{os.path.getsize(filename)} bytes written to disk")
+        elif not is_supported(format_from_extension(filename) or self.io.get_compression()):
+            self.prompt.change_prompt("Failed to save file, Zstandard files need the \"zstandard\" module")
         else:
             self.prompt.change_prompt(f"Failed to save file, make sure the location exists and you have permission")
 
 
-    #Handles calling the I/O loading function and it's errors.
+    #Returns the folder where the editor caches data between sessions, like the file finder's index.
+    def get_cache_folder(self) -> str:
+        return os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")), "console-editor")
+
+
+    #Handles calling the I/O loading function and it's errors. The file is chosen with the file finder, which lists the files in the current folder
+    #that match the typed text.
     def load_handler(self) -> None:
-        #Disable the prompt, get input and then re-enable the prompt.
-        self.prompt.toggle_enabled()
-        filename = self.basic_input.basic_input(self.y_size - 1, 0, "Open file: ")
-        self.prompt.toggle_enabled()
+        if self.file_finder == None:
+            from actions.file_index import FileIndex
+            from actions.file_finder import FileFinder
 
-        #The escape key was pressed, therefore no filename was entered.
-        if filename == None:
-            return
+            file_index = FileIndex(os.curdir, self.editor_config.search_ignore, self.get_cache_folder())
+            self.file_finder = FileFinder(self, self.config.get_display_colour_config(), file_index)
+
+        #Nothing is opened if the escape key was pressed.
+        self.file_finder.start("Open file: ", lambda filename: filename != None and self.open_file(filename))
+
+
+    #Opens the given file, replacing the buffer, returns "True" if no errors occurred.
+    def open_file(self, filename: str) -> bool:
+        from display.hex_view import HexView
+
+        #Binary files are shown in the hex view instead of being loaded as text.
+        if detect_format(filename) == None and HexView.is_binary(filename):
+            return self.open_hex_view(filename)
+
+        #Opening a file closes the hex view.
+        if self.display.display_mode_handler.get_hex_view() != None:
+            self.toggle_hex_view()
+
+        #A parked file is used as it is, without reading it. The open file is parked once the new one is loaded, while it's still in the buffer.
+        previous = self.get_parkable_buffer()
+        parked = (self.parked_buffers.take(filename) if self.server != None else None)
 
-        result = self.io.load_file(self.buffer, filename)
+        #The journal of the open file is stopped before loading, otherwise the new file would be journaled as an edit of the open one. It's kept
+        #if there are unsaved changes, and started again if the new file can't be loaded.
+        previous_filename = self.io.get_filename()
+        dirty = self.io.get_dirty()
+        self.journal.stop(not dirty)
+
+        if parked != None:
+            result = self.io.load_lines(self.buffer, filename, *parked)
+        else:
+            result = self.io.load_file(self.buffer, filename)
 
         #No errors occurred, display size of file opened in the prompt.
         if result > 0:
+            if previous != None and os.path.abspath(previous[0]) != os.path.abspath(filename):
+                self.parked_buffers.park(*previous)
+
+            self.showing_search_results = False
+            self.tail_follow.stop()
+            self.mark_index.clear()
+            self.cursor.set_all_positions([(0, 0)])
             self.prompt.change_prompt(f"Loaded {os.path.getsize(filename)} bytes from {filename}")
+            self.file_watcher.watch(filename, self.buffer)
+            self.recover_journal(filename)
+            return True
+
+        if previous_filename != None:
+            self.journal.start(previous_filename, dirty)
+
+        #Zstandard files need a module that may not be installed.
+        if not is_supported(detect_format(filename)):
+            self.prompt.change_prompt("Failed to open file, Zstandard files need the \"zstandard\" module")
+            return False
         else:
             self.prompt.change_prompt(f"Failed to open file, make sure the file exists and you have permission")
+            return False
+
+
+    #Checks if the open file was changed by another program. An unmodified buffer is updated in place, keeping the cursor and scroll, if the
+    #buffer has unsaved changes the user is warned instead.
+    def file_change_handler(self) -> None:
+        if not self.file_watcher.check():
+            return
+
+        #When the file is being followed its changes are handled by follow mode.
+        if self.tail_follow.enabled:
+            self.file_watcher.acknowledge()
+            return
+
+        if self.io.get_dirty():
+            self.file_watcher.acknowledge()
+            self.prompt.change_prompt("Warning: the file was changed by another program, saving will overwrite those changes")
+            return
+
+        changed_lines = self.file_watcher.reload(self.buffer)
+
+        if changed_lines < 0:
+            self.prompt.change_prompt("Warning: the file was removed or can't be read by the editor")
+        elif changed_lines > 0:
+            self.cursor.clamp(self.buffer)
+            #The buffer matches the file on disk again.
+            self.io.set_saved()
+            #The file on disk changed, the journal has to start again from the new version.
+            self.journal.start(self.io.get_filename())
+            self.prompt.change_prompt(f"File changed by another program, reloaded {changed_lines} lines")
+
+
+    #Enables or disables follow mode, in which lines appended to the file by other programs are added to the buffer.
+    def toggle_tail_follow(self) -> None:
+        filename = self.io.get_filename()
+
+        if self.tail_follow.enabled:
+            self.tail_follow.stop()
+            #The file watcher takes care of the file again, if the buffer matches the file it becomes its new base.
+            if not self.io.get_dirty():
+                self.file_watcher.watch(filename, self.buffer)
+            self.prompt.change_prompt("Follow mode disabled")
+
+        elif filename == None or self.io.get_dirty():
+            self.prompt.change_prompt("Follow mode needs an opened file without unsaved changes")
+
+        #Lines appended to a compressed file can't be read on their own.
+        elif self.io.get_compression() != None:
+            self.prompt.change_prompt("Follow mode doesn't work with compressed files")
+
+        elif self.tail_follow.start(filename):
+            #The journal is started once for the version of the file following starts from, appended lines only update it.
+            self.journal.start(filename)
+            #Go to the last line, while the cursor is on it the view stays pinned to the bottom.
+            self.cursor.move_to_line(self.buffer.get_line_count() - 1, self.buffer)
+            self.cursor.cursor_start()
+            self.prompt.change_prompt(f"Following {filename}, {self.keymap.describe('follow file')} to stop")
+
+        else:
+            self.prompt.change_prompt("Failed to open the file to follow it")
+
+
+    #Adds the lines appended to the followed file, if the cursor was on the last line it's moved to the new last line, keeping the view at the
+    #bottom. If the user moved away from the last line the view isn't changed.
+    def tail_follow_handler(self) -> None:
+        at_bottom = self.cursor.get_y() == self.buffer.get_line_count() - 1
+        dirty = self.io.get_dirty()
+
+        #The appended lines are already in the file, they aren't unsaved changes and don't need to be journaled. Only the new lines are added to
+        #the saved file, and the journal is only told about the new version of the file.
+        if not dirty:
+            self.io.set_appending_saved(True)
+            self.journal.set_paused(True)
+
+        try:
+            added = self.tail_follow.follow_handler(self.buffer)
+        finally:
+            self.io.set_appending_saved(False)
+            self.journal.set_paused(False)
+
+        if added > 0:
+            if at_bottom:
+                self.cursor.move_to_line(self.buffer.get_line_count() - 1, self.buffer)
+                self.cursor.cursor_start()
+
+            if not dirty:
+                self.journal.file_grew(self.io.get_filename())
+
+
+    #Checks if the given file, which has just been opened, has a journal with unsaved edits from a previous session. If so the user is asked
+    #whether to replay it. Journaling of the file is then started.
+    def recover_journal(self, filename: str) -> None:
+        if self.journal.has_journal(filename):
+            self.basic_input.start("Recover unsaved changes to this file? (y/n): ", lambda answer: self.journal_answered(filename, answer))
+        else:
+            self.journal.start(filename)
+
+
+    #Replays the journal of the file if the answer is yes, then starts journaling the file.
+    def journal_answered(self, filename: str, answer: Optional[str]) -> None:
+        if answer != None and answer.lower().startswith("y") and self.journal.replay(filename):
+            #The recovered edits aren't saved, the buffer is dirty. New edits are appended to the same journal.
+            self.journal.start(filename, True)
+            self.prompt.change_prompt("Unsaved changes recovered")
+        else:
+            self.journal.start(filename)
 
 
     #Gets a line number using basic input and then goes to it.
     def goto_line(self) -> None:
-        #Disable the prompt, get input and then re-enable the prompt.
-        self.prompt.toggle_enabled()
-        line = self.basic_input.basic_input(self.y_size - 1, 0, "Line number: ")
-        self.prompt.toggle_enabled()
+        self.basic_input.start("Line number: ", self.go_to_entered_line)
+
 
+    #Moves the cursor to the entered line.
+    def go_to_entered_line(self, line: Optional[str]) -> None:
         #The escape key was pressed, therefore no line was entered.
         if line == None:
             return
@@ -295,8 +1272,11 @@ class TextEditor(CursesUtils):
             #If an invalid value was entered show an error in the prompt and exit.
             self.prompt.change_prompt("Invalid line entered")
         else:
-            #Check if the jump was successful, i.e. if the line exists.
-            if self.cursor.change_y_pos((line - self.cursor.get_y() - 1), self.buffer):
+            previous = (self.cursor.get_y(), self.cursor.get_x())
+
+            #Check if the jump was successful, i.e. if the line exists. If the line is folded the display unfolds it.
+            if self.cursor.move_to_line(line - 1, self.buffer):
+                self.mark_index.set_mark(MarkIndex.PREVIOUS_POSITION, *previous)
                 #Set the cursor to the beginning of the new line.
                 self.cursor.cursor_start()
             else:
@@ -316,41 +1296,211 @@ class TextEditor(CursesUtils):
         self.prompt.change_prompt(f"There are {words} words in the current file")
 
 
-    #Finds all the matches for the given regex, then highlights the matches.
+    #Finds all the matches for the given regex, then highlights the matches. The search runs in the background, the matches are highlighted as
+    #they are found and it can be cancelled with Esc.
     def find(self) -> None:
-        #Disable the prompt, get input and then re-enable the prompt.
-        self.prompt.toggle_enabled()
-        regex_to_find = self.basic_input.basic_input(self.y_size - 1, 0, "Regex to find: ")
-        self.prompt.toggle_enabled()
+        if self.current_job != None:
+            self.prompt.change_prompt(f"Another command is running, press {self.keymap.describe('cancel')} to cancel it")
+            return
+
+        self.basic_input.start("Regex to find: ", self.start_find)
 
+
+    #Starts finding the entered regex.
+    def start_find(self, regex_to_find: Optional[str]) -> None:
         #In case the user pressed "esc".
         if regex_to_find == None:
             return
 
-        matches = self.find_in_buffer.find_in_buffer(regex_to_find)
+        if self.find_in_buffer == None:
+            from actions.find import FindInBuffer
+            self.find_in_buffer = FindInBuffer(self.buffer, self.editor_config.find_time_limit)
 
-        if matches != None:
-            #Calculate the number of matches and display it.
-            match_count = sum([len(a) for a in matches.values()])
-            self.prompt.change_prompt(f"Found {match_count} matches for \"{regex_to_find}\"")
+        #The matches are added to the highlighted text as they arrive.
+        matches = {}
+        version = self.buffer.get_version()
+        job = self.find_in_buffer.start(regex_to_find, lambda found: self.add_find_matches(matches, found, version),
+            lambda match_count: self.find_done(regex_to_find, match_count))
+
+        #If the regex is invalid we get an error message.
+        if isinstance(job, str):
+            self.prompt.change_prompt(job)
+            return
+
+        #Set the display mode.
+        self.display.display_mode_handler.set_highlight_display_mode(matches)
+        if self.overview_index != None:
+            self.overview_index.set_matches(matches)
+        self.current_job = job
 
-            #Set the display mode.
-            self.display.display_mode_handler.set_highlight_display_mode(matches)
 
+    #Adds the matches found by the running find to the highlighted ones. If the buffer was modified the matches are no longer valid, the find is
+    #cancelled.
+    def add_find_matches(self, matches: dict[int, list[tuple[int, int]]], found: list[tuple[int, list[tuple[int, int]]]], version: int) -> None:
+        if self.buffer.get_version() != version:
+            self.current_job.cancel()
+            return
+
+        matches.update(found)
+        if self.overview_index != None:
+            self.overview_index.add_matches(found)
+
+
+    #Called when the find finishes, shows the number of matches.
+    def find_done(self, regex_to_find: str, match_count: int) -> None:
+        if match_count > 0:
+            self.prompt.change_prompt(f"Found {match_count} matches for \"{regex_to_find}\"")
         else:
+            self.display.display_mode_handler.set_normal_display_mode()
             self.prompt.change_prompt(f"No matches found for \"{regex_to_find}\"")
 
 
+    #Starts or stops recording a macro.
+    def toggle_macro_recording(self) -> None:
+        if self.macro.get_recording():
+            self.prompt.change_prompt(f"Macro recorded, {self.macro.stop_recording()} keys, {self.keymap.describe('replay macro')} to replay it")
+        else:
+            self.macro.start_recording()
+            self.prompt.change_prompt(f"Recording macro, {self.keymap.describe('record macro')} to stop")
+
+
+    #Replays the recorded macro the given number of times, or until the end of the file. The keys are passed straight to "get_input", the screen
+    #isn't drawn until the replay ends, so the replay is only limited by the speed of editing the buffer. The whole replay is a single undo.
+    def replay_macro(self) -> None:
+        if self.macro.get_recording():
+            self.prompt.change_prompt(f"Stop recording the macro with {self.keymap.describe('record macro')} before replaying it")
+            return
+
+        if self.macro.get_keys() == []:
+            self.prompt.change_prompt(f"There's no recorded macro, use {self.keymap.describe('record macro')} to record one")
+            return
+
+        self.basic_input.start("Replay macro how many times (number or \"end\"): ", self.replay_macro_times)
+
+
+    #Replays the macro the entered number of times.
+    def replay_macro_times(self, answer: Optional[str]) -> None:
+        keys = self.macro.get_keys()
+
+        #The escape key was pressed, therefore nothing was entered.
+        if answer == None:
+            return
+
+        #When replaying until the end of the file the replay stops once the macro no longer moves the cursor down, at most once per line, so a
+        #macro that adds lines can't replay forever.
+        if answer.strip().lower() == "end":
+            count = self.buffer.get_line_count() - self.cursor.get_y()
+            until_end = True
+        else:
+            until_end = False
+
+            try:
+                count = int(answer)
+            except ValueError:
+                count = 0
+
+            if count <= 0:
+                self.prompt.change_prompt("Invalid number of times entered")
+                return
+
+        start_time = time.perf_counter()
+        times = 0
+
+        while times < count:
+            start_y = self.cursor.get_y()
+
+            for key in keys:
+                self.key = key
+                self.get_input()
+
+            times += 1
+
+            if until_end and self.cursor.get_y() <= start_y:
+                break
+
+        self.key = -1
+        self.undo_handler.set_separate_undo()
+        self.prompt.change_prompt(f"Replayed the macro {times} times in {(time.perf_counter() - start_time) * 1000:.0f} ms")
+
+
+    #Enables or disables soft wrapping of long lines.
+    def toggle_soft_wrap(self) -> None:
+        if self.display.toggle_soft_wrap():
+            #Folding isn't available with soft wrapping, the wrapped rows are counted for every line.
+            self.fold_index.unfold_all()
+            self.prompt.change_prompt("Soft wrap enabled")
+        else:
+            self.prompt.change_prompt("Soft wrap disabled")
+
+
+    #Folds the region at the cursor, or unfolds it if the cursor is on the header of a folded region. The region is the one between fold markers
+    #or the one formed by the indentation, see "FoldIndex.find_region".
+    def toggle_fold(self) -> None:
+        if self.display.wrap_index != None:
+            self.prompt.change_prompt("Folding isn't available with soft wrap")
+            return
+
+        if self.fold_index.unfold(self.cursor.get_y()):
+            return
+
+        region = self.fold_index.find_region(self.cursor.get_y())
+
+        if region == None or not self.fold_index.fold(*region):
+            self.prompt.change_prompt("There's nothing to fold here")
+            return
+
+        #If the cursor was inside the region it's moved to the header.
+        self.cursor.move_to_line(region[0], self.buffer)
+
+
+    #Folds every region whose header has the same indentation as the cursor's line, like all the top levels of a JSON or YAML file.
+    def fold_level(self) -> None:
+        if self.display.wrap_index != None:
+            self.prompt.change_prompt("Folding isn't available with soft wrap")
+            return
+
+        indent = self.fold_index.get_indent(self.cursor.get_y())
+
+        if indent == None:
+            self.prompt.change_prompt("The cursor's line is blank, there's no level to fold")
+            return
+
+        folded = self.fold_index.fold_regions(self.fold_index.find_level_regions(indent))
+        #The cursor may be inside a folded region, it's moved to its header.
+        self.cursor.move_to_line(self.fold_index.line_at_visible(self.fold_index.visible_index(self.cursor.get_y())), self.buffer)
+        self.prompt.change_prompt(f"Folded {folded} regions")
+
+
+    def unfold_all(self) -> None:
+        self.fold_index.unfold_all()
+        self.prompt.change_prompt("Unfolded every region")
+
+
     #Reverts the editor to the last snapshot, undos the last actions.
     def undo(self) -> None:
         undo_result = self.undo_handler.get_undo()
 
         if undo_result != None:
-            #Sets the buffer and cursor from the undo results.
+            #Sets the buffer and cursor from the undo results, the additional cursors may no longer be valid so they are removed.
             self.buffer.set_buffer(undo_result[0])
             self.cursor.set_cursor_value(undo_result[1])
+            self.cursor.clear_extra_cursors()
+
+
+
+#With "--server" the editor runs in server mode, it waits for a client to attach its terminal before starting, see "actions/server.py".
+if sys.argv[1:] == ["--server"]:
+    from actions.server import EditorServer, get_socket_path
+
+    server = EditorServer(get_socket_path())
+    request = server.wait_client()
 
+    if request == None:
+        server.close()
+        quit()
 
+    editor = TextEditor(startup_timer, server, request)
+else:
+    editor = TextEditor(startup_timer)
 
-editor = TextEditor()
 editor.text_editor()
\ No newline at end of file
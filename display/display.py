@@ -1,38 +1,60 @@
-import math, re
-from typing import Any
+import math
+from typing import Any, Optional
 
 from buffer.buffer import TextBuffer
 from buffer.cursor import Cursor
+from buffer.wrap_index import WrapIndex
+from buffer.fold_index import FoldIndex
+from buffer.bracket_index import BracketIndex
+from buffer.overview_index import OverviewIndex
+from buffer.columns import cell_text
 from display.status_bar_functions import StatusbarFunctions
 from display.display_modes import DisplayModeHandler
+from display.render_cache import RenderCache
 from actions.prompt import Prompt
 from actions.input_output import IOHandler
 from configuration.config import DisplayConfig, DisplayColourConfig
 
 
 class Display:
-    #Any is used in the "editor" variable type to avoid circular referencing.
-    def __init__(self, editor: Any, buffer: type[TextBuffer], cursor: type[Cursor], prompt: type[Prompt], io: type[IOHandler], display_config: type[DisplayConfig], colour_config: type[DisplayColourConfig]) -> None:
+    #Any is used in the "editor" variable type to avoid circular referencing. The display mode handler, the render cache and the overview index
+    #belong to the buffer, every display of the buffer shares them, see "RenderCache". The overview index is "None" if the overview is disabled.
+    def __init__(self, editor: Any, buffer: type[TextBuffer], cursor: type[Cursor], fold_index: type[FoldIndex], bracket_index: type[BracketIndex], prompt: type[Prompt], io: type[IOHandler], display_config: type[DisplayConfig], colour_config: type[DisplayColourConfig], display_mode_handler: type[DisplayModeHandler], render_cache: type[RenderCache], overview_index: Optional[OverviewIndex]) -> None:
         self.editor = editor
         self.buffer = buffer
         self.cursor = cursor
+        self.fold_index = fold_index
+        self.bracket_index = bracket_index
         self.prompt = prompt
         self.io = io
 
         #Configuration dataclasses for the display function.
         self.display_config = display_config
         self.colour_config = colour_config
+        #Display mode, determines how the text is displayed.
+        self.display_mode_handler = display_mode_handler
+        #The rendered lines of the buffer.
+        self.render_cache = render_cache
+        #The summaries of the buffer the overview column is drawn from.
+        self.overview_index = overview_index
         #This class contains all the functions for the status-bar.
-        self.status_bar_functions = StatusbarFunctions(self.buffer, self.cursor, self.io)
+        self.status_bar_functions = StatusbarFunctions(self.buffer, self.cursor, self.io, self.display_mode_handler)
 
-        #Display mode, determines how the text is displayed.
-        self.display_mode_handler = DisplayModeHandler(self.colour_config, self.editor)
 
+        #The part of the console the display uses, as a tuple of its first row, its first column, its height and its width. Its last row is the
+        #status-bar. When it's "None" the display uses the whole console except the prompt line.
+        self.region = None
 
         #These two variables determine the scroll of the buffer. What this does is determine at which index the contents of the editor should
         #start being printed. For example a "buffer_y_scroll" of 5 means that the first 5 lines would not be displayed.
         self.buffer_y_scroll = 0
         self.buffer_x_scroll = 0
+        #The first and last lines that were displayed, shown in the overview column.
+        self.displayed_lines = (0, 0)
+
+        #When soft wrapping is enabled this is the index of the screen rows each line occupies, otherwise it's "None". With soft wrapping the
+        #vertical scroll is measured in screen rows instead of lines, and there's no horizontal scroll.
+        self.wrap_index = None
 
         #The reason for these to be class variables instead of just function variables is so that they are only calculated once, not every call
         #to the "display" function.
@@ -45,84 +67,382 @@ class Display:
 
     #Gets the value of variables that won't change during runtime and configures initial values for others.
     def setup(self) -> None:
-        self.statusbar_elements = re.split(f"[{self.display_config.statusbar_separators_definitions}]", self.display_config.statusbar_config)
-        self.statusbar_separators = re.findall(f"[{self.display_config.statusbar_separators_definitions}]", self.display_config.statusbar_config)
+        self.statusbar_elements = [""]
+        self.statusbar_separators = []
+
+        #We split the status-bar configuration into elements and separators. Since separators are single characters a simple scan is enough, that
+        #way we don't need to import and compile a regex during startup.
+        for char in self.display_config.statusbar_config:
+            if char in self.display_config.statusbar_separators_definitions:
+                self.statusbar_separators.append(char)
+                self.statusbar_elements.append("")
+            else:
+                self.statusbar_elements[-1] += char
+
         self.display_mode_handler.set_normal_display_mode()
 
+        #The overview column is the last column of the display, after the text.
+        if self.overview_index != None:
+            self.display_config.x_end = -1
+
+        if self.display_config.soft_wrap:
+            self.toggle_soft_wrap()
+
+
+    #Enables or disables soft wrapping, returns whether it's enabled after the change.
+    def toggle_soft_wrap(self) -> bool:
+        if self.wrap_index == None:
+            self.calculate_x_start()
+            self.wrap_index = WrapIndex(self.buffer, self.get_text_width())
+            self.buffer.add_change_callback(self.wrap_index.buffer_changed)
+
+            #The vertical scroll is now measured in screen rows.
+            self.buffer_y_scroll = self.wrap_index.row_of(self.buffer_y_scroll, 0)
+            self.buffer_x_scroll = 0
+        else:
+            #The vertical scroll goes back to being measured in lines.
+            self.buffer_y_scroll = self.wrap_index.line_at_row(self.buffer_y_scroll)[0]
+
+            self.buffer.remove_change_callback(self.wrap_index.buffer_changed)
+            self.wrap_index = None
+
+        return self.wrap_index != None
+
+
+    #Sets the part of the console the display uses, see "region".
+    def set_region(self, region: Optional[tuple[int, int, int, int]]) -> None:
+        self.region = region
+
+
+    #Returns the part of the console the display uses, see "region".
+    def get_region(self) -> tuple[int, int, int, int]:
+        if self.region == None:
+            return (0, 0, self.editor.y_size - 1, self.editor.x_size)
+
+        return self.region
+
+
+    #Returns the first row and column where the text is displayed, after the line numbers.
+    def get_text_y(self) -> int:
+        return self.get_region()[0] + self.display_config.y_start
+
+
+    def get_text_x(self) -> int:
+        return self.get_region()[1] + self.display_config.x_start
+
+
+    #Returns the row after the last row of text, which is the status-bar, and the column after the last column of text.
+    def get_end_y(self) -> int:
+        (top, _, height, _) = self.get_region()
+        return top + height + self.display_config.y_end
+
+
+    def get_end_x(self) -> int:
+        (_, left, _, width) = self.get_region()
+        return left + width + self.display_config.x_end
+
+
+    #Returns the number of rows available for displaying the text.
+    def get_text_height(self) -> int:
+        return self.get_end_y() - self.get_text_y()
+
+
+    #This function calls all the different display functions, it's the one that should be called from the editor. The cursor is only displayed
+    #if the display is the active one. The prompt is displayed separately, with "display_prompt", since it's shared by every display.
+    def display(self, active: bool = True) -> None:
+        #In hex mode the file's bytes are shown instead of the buffer.
+        if self.display_mode_handler.get_hex_view() != None:
+            self.display_hex()
+            self.display_statusbar()
+            return
 
-    #This function calls all the different display functions, it's the one that should be called from the editor.
-    def display(self) -> None:
         #We calculate the x start of the buffer, for now equal to the line number width, that value is then used to print the buffer and
         #cursor. We can call this function before calculating the scroll because the scroll calculation uses the x start.
         self.calculate_x_start()
+        #The width available for the text may have changed, if so the wrap index has to be updated.
+        if self.wrap_index != None:
+            self.wrap_index.set_width(self.get_text_width())
         #Before printing anything we update the scroll variables.
         self.scroll_handler()
 
         self.display_buffer()
-        self.display_cursor()
+        if active:
+            self.display_cursor()
         self.display_line_nums()
+        self.display_overview()
         self.display_statusbar()
-        self.display_prompt()
 
 
     #Displays the buffer.
     def display_buffer(self) -> None:
-        display_y = self.display_config.y_start
+        if self.wrap_index != None:
+            self.display_buffer_wrapped()
+            return
 
-        end_y = self.editor.y_size + self.display_config.y_end
-        end_x = self.editor.x_size + self.display_config.x_end
+        display_y = self.get_text_y()
+        text_x = self.get_text_x()
+
+        end_y = self.get_end_y()
+        end_x = self.get_end_x()
 
         #We iterate through every line between the scroll and the end of the buffer, we do the same in each line with the characters. Every
         #iteration we check if the printing indexes we are using have exceeded the ones specified in the buffer configuration to avoid printing
-        #out of bounds.
-        for y in range(self.buffer_y_scroll, self.buffer.get_line_count()):
-            display_x = self.display_config.x_start
-            current_line = self.buffer.get_line(y)
-
-            for x in range(self.buffer_x_scroll, len(current_line)):
-                self.display_mode_handler.display_char(display_y, display_x, y, x, current_line[x])
-    
-                #X printing index check.
-                display_x += 1
-                if display_x >= end_x:
-                    break
+        #out of bounds. Folded regions are skipped in a single step from their header, the hidden lines are never visited.
+        y = self.buffer_y_scroll
+        self.displayed_lines = (y, y)
+
+        while y < self.buffer.get_line_count():
+            #The status-bar is drawn over the row after the last one.
+            if display_y < end_y:
+                self.displayed_lines = (self.displayed_lines[0], y)
+
+            #The horizontal scroll is measured in columns, the runs of the line are already limited to the visible ones.
+            for (column, text, colour) in self.render_cache.get_runs(y, self.buffer_x_scroll, self.buffer_x_scroll + end_x - text_x):
+                self.editor.addstrex(display_y, text_x + column, text, colour)
+
+            if self.fold_index.get_fold_end(y) != None:
+                self.display_fold_marker(display_y, y, end_x)
 
             #Y printing index check.
             display_y += 1
             if display_y > end_y:
                 break
 
+            y = self.fold_index.next_visible(y)
+
+
+    #Displays the number of hidden lines after the header of a folded region.
+    def display_fold_marker(self, display_y: int, y_pos: int, end_x: int) -> None:
+        marker = f" ... {self.fold_index.get_fold_end(y_pos) - y_pos} lines"
+        display_x = self.get_text_x() + max(self.buffer.get_columns(y_pos)[-1] + 1 - self.buffer_x_scroll, 0)
+
+        if display_x < end_x:
+            self.editor.addstrex(display_y, display_x, marker[:end_x - display_x], self.editor.get_colour(self.colour_config.line_number_colour))
+
+
+    #Displays the rows of the hex view that fit in the console, with their offsets in place of the line numbers. Only the bytes of the displayed
+    #rows are read.
+    def display_hex(self) -> None:
+        hex_view = self.display_mode_handler.get_hex_view()
+        (_, left, _, width) = self.get_region()
+        start_y = self.get_text_y()
+        end_y = self.get_end_y()
+        end_x = left + width
+        text_x = left + hex_view.get_offset_width() + 1
+
+        hex_view.set_width(width)
+        hex_view.scroll_to_cursor(end_y - start_y)
+        cursor_row = hex_view.get_cursor() // hex_view.get_row_size()
+
+        for display_y in range(start_y, end_y):
+            row = hex_view.scroll + display_y - start_y
+
+            if row >= hex_view.get_row_count():
+                self.editor.addstrex(display_y, left, "~", self.editor.get_colour(self.colour_config.empty_line_number_colour))
+                continue
+
+            offset, text = hex_view.get_row(row)
+            self.editor.addstrex(display_y, left, offset[:width], self.editor.get_colour(self.colour_config.line_number_colour))
+            self.editor.addstrex(display_y, text_x, text[:max(end_x - text_x, 0)], self.editor.get_colour(self.colour_config.text_colour))
+
+            #The byte under the cursor is marked in both columns.
+            if row == cursor_row and hex_view.get_size() > 0:
+                hex_column, ascii_column = hex_view.get_cursor_columns()
+
+                for (column, length) in ((hex_column, 2), (ascii_column, 1)):
+                    if text_x + column + length <= end_x:
+                        self.editor.addstrex(display_y, text_x + column, text[column:column + length], self.editor.get_colour(self.colour_config.cursor_colour))
+
+
+    #Displays the buffer with soft wrapping, each line is split into rows of the text width.
+    def display_buffer_wrapped(self) -> None:
+        end_y = self.get_end_y()
+        text_x = self.get_text_x()
+        width = self.wrap_index.width
+
+        #We get the line that contains the first displayed row and which of its rows it is, in O(log n).
+        y, row = self.wrap_index.line_at_row(self.buffer_y_scroll)
+        self.displayed_lines = (y, y)
+
+        for display_y in range(self.get_text_y(), end_y):
+            if y >= self.buffer.get_line_count():
+                break
+
+            self.displayed_lines = (self.displayed_lines[0], y)
+
+            row_start = row * width
+
+            for (column, text, colour) in self.render_cache.get_runs(y, row_start, row_start + width):
+                self.editor.addstrex(display_y, text_x + column, text, colour)
+
+            #Once all the rows of a line have been displayed we go to the next line.
+            row += 1
+            if row >= self.wrap_index.get_line_rows(y):
+                y += 1
+                row = 0
+
 
     #Displays line numbers.
     def display_line_nums(self) -> None:
-        end_y = self.editor.y_size + self.display_config.y_end
+        if self.wrap_index != None:
+            self.display_line_nums_wrapped()
+            return
 
-        for y in range(self.display_config.y_start, end_y):
+        left = self.get_region()[1]
+        end_y = self.get_end_y()
+        #The line displayed in the current row, starting from the scroll. Folded regions are skipped, like in "display_buffer".
+        buffer_y = self.buffer_y_scroll
+
+        for y in range(self.get_text_y(), end_y):
             #In case we are at the very end of the buffer, and there's empty space before the status-bar.
-            if y + self.buffer_y_scroll < self.buffer.get_line_count():
-                #To calculate the current line number we add the buffer scroll to the y counter, that way it remains correct even when the
-                #buffer is scrolled vertically. Finally we add 1 to account for the fact that line numbers start at 1, not 0.
-                line_number = y + self.buffer_y_scroll + 1
+            if buffer_y < self.buffer.get_line_count():
+                #We add 1 to account for the fact that line numbers start at 1, not 0.
+                line_number = buffer_y + 1
                 num_width = int(math.log10(line_number)) + 1
                 padding = " " * (self.display_config.x_start - num_width)
 
-                self.editor.stdscr.addstr(y, 0, f"{padding}{line_number}", self.editor.get_colour(self.colour_config.line_number_colour))
+                self.editor.stdscr.addstr(y, left, f"{padding}{line_number}", self.get_line_number_colour(buffer_y))
+                buffer_y = self.fold_index.next_visible(buffer_y)
+            else:
+                self.editor.stdscr.addstr(y, left, "~", self.editor.get_colour(self.colour_config.empty_line_number_colour))
+
+
+    #Displays line numbers with soft wrapping, the number is only displayed in the first row of each line.
+    def display_line_nums_wrapped(self) -> None:
+        left = self.get_region()[1]
+        end_y = self.get_end_y()
+        y, row = self.wrap_index.line_at_row(self.buffer_y_scroll)
+
+        for display_y in range(self.get_text_y(), end_y):
+            if y < self.buffer.get_line_count():
+                line_number = (str(y + 1) if row == 0 else "")
+                padding = " " * (self.display_config.x_start - len(line_number))
+
+                self.editor.stdscr.addstr(display_y, left, f"{padding}{line_number}", self.get_line_number_colour(y))
+
+                row += 1
+                if row >= self.wrap_index.get_line_rows(y):
+                    y += 1
+                    row = 0
+            else:
+                self.editor.stdscr.addstr(display_y, left, "~", self.editor.get_colour(self.colour_config.empty_line_number_colour))
+
+
+    #Returns the colour of the line number of the given line, lines that were changed since the file was saved are marked with a different colour.
+    def get_line_number_colour(self, y_pos: int) -> int:
+        if self.io.is_line_changed(y_pos):
+            return self.editor.get_colour(self.colour_config.changed_line_number_colour)
+
+        return self.editor.get_colour(self.colour_config.line_number_colour)
+
+
+    #Displays the overview column, each of its rows stands for an equal part of the buffer. The rows of the displayed lines are marked, the rows
+    #with find matches show how many they have compared to the row with most, "-", "=" or "#", and the rows with changed lines show a "+". The
+    #counts of each row come from the summaries of the overview index, so the cost doesn't depend on the size of the buffer.
+    def display_overview(self) -> None:
+        if self.overview_index == None:
+            return
+
+        self.overview_index.update()
+        #The matches are only shown while they are highlighted.
+        if self.overview_index.get_matches() is not self.display_mode_handler.get_highlight_text():
+            self.overview_index.clear_matches()
+
+        column = self.get_end_x()
+        start_y = self.get_text_y()
+        line_count = self.buffer.get_line_count()
+        #When there are fewer lines than rows each line has its own row.
+        rows = min(self.get_text_height(), line_count)
+        (first_displayed, last_displayed) = self.displayed_lines
+
+        summaries = []
+        for row in range(rows):
+            start = row * line_count // rows
+            end = (row + 1) * line_count // rows
+            summaries.append((start <= last_displayed and end > first_displayed,) + self.overview_index.get_summary(start, end))
+
+        max_matches = max([matches for (_, _, matches) in summaries], default = 0)
+
+        for (row, (displayed, changed, matches)) in enumerate(summaries):
+            if matches > 0:
+                char = ("-" if matches * 3 <= max_matches else "=" if matches * 3 <= max_matches * 2 else "#")
+                colour = self.colour_config.highlight_colour
+            elif changed > 0:
+                char = "+"
+                colour = self.colour_config.changed_line_number_colour
             else:
-                self.editor.stdscr.addstr(y, 0, "~", self.editor.get_colour(self.colour_config.empty_line_number_colour))
+                char = " "
+                colour = self.colour_config.overview_colour
+
+            if displayed:
+                colour = self.colour_config.overview_viewport_colour
+
+            self.editor.addstrex(start_y + row, column, char, self.editor.get_colour(colour))
+
+        for display_y in range(start_y + rows, self.get_end_y()):
+            self.editor.addstrex(display_y, column, " ", self.editor.get_colour(self.colour_config.overview_colour))
 
 
     #Displays the cursor
     def display_cursor(self) -> None:
-        cursor_char = " "
+        self.display_matching_brackets()
+
+        #Additional cursors are only displayed if they are inside the visible part of the buffer.
+        for (cursor_y, cursor_x) in self.cursor.get_all_positions()[1:]:
+            self.display_cursor_at(cursor_y, cursor_x)
+
+        #The main cursor is displayed last, so it's always on top.
+        self.display_cursor_at(self.cursor.get_y(), self.cursor.get_x())
+
+
+    #Highlights the bracket at the main cursor and the one that matches it. The match is only looked for in the lines near the cursor, a match
+    #further away wouldn't be on the screen.
+    def display_matching_brackets(self) -> None:
         cursor_y = self.cursor.get_y()
-        cursor_x = self.cursor.get_x()
+        match = self.bracket_index.find_match(cursor_y, self.cursor.get_x(), use_tree = False)
+
+        if match == None:
+            return
+
+        colour = self.editor.get_colour(self.colour_config.matching_bracket_colour)
+        self.display_char_at(cursor_y, self.bracket_index.get_bracket_at(cursor_y, self.cursor.get_x()), colour)
+        self.display_char_at(match[0], match[1], colour)
+
+
+    #Displays a cursor in the given buffer position, if it's visible.
+    def display_cursor_at(self, cursor_y: int, cursor_x: int) -> None:
+        self.display_char_at(cursor_y, cursor_x, self.editor.get_colour(self.colour_config.cursor_colour))
+
+
+    #Displays the character in the given buffer position with the given colour, or a space at the end of the line, if it's visible.
+    def display_char_at(self, y_pos: int, x_pos: int, colour: int) -> None:
+        #Characters in folded regions aren't displayed.
+        if self.fold_index.is_hidden(y_pos):
+            return
+
+        char = " "
+        current_line = self.buffer.get_line(y_pos)
+        #The column of the character comes from the line's column map.
+        column = self.buffer.get_columns(y_pos)[x_pos]
+
+        #If there's a character in the position we have to print it.
+        if x_pos != len(current_line) and len(current_line) != 0:
+            char = cell_text(current_line, self.buffer.get_columns(y_pos), x_pos)[0]
 
-        #If there's a character under the cursor we have to print it under it.
-        if cursor_x != len(self.buffer.get_line(cursor_y)) and len(self.buffer.get_line(cursor_y)) != 0:
-            cursor_char = self.buffer.get_char(cursor_y, cursor_x)
+        text_y = self.get_text_y()
+        text_x = self.get_text_x()
 
-        #When calculating the position of the cursor we must consider the current scroll of the buffer.
-        self.editor.stdscr.addstr(cursor_y - self.buffer_y_scroll, cursor_x + self.display_config.x_start - self.buffer_x_scroll, cursor_char, self.editor.get_colour(self.colour_config.cursor_colour))
+        #With soft wrapping the row comes from the wrap index, and the column is the position in the row.
+        if self.wrap_index != None:
+            display_y = self.wrap_index.row_of(y_pos, x_pos) - self.buffer_y_scroll + text_y
+            display_x = column % self.wrap_index.width + text_x
+        #When calculating the position we must consider the current scroll of the buffer, and the folded lines between them.
+        else:
+            display_y = self.fold_index.visible_index(y_pos) - self.fold_index.visible_index(self.buffer_y_scroll) + text_y
+            display_x = column + text_x - self.buffer_x_scroll
+
+        if text_y <= display_y < self.get_end_y() and text_x <= display_x < self.get_end_x():
+            self.editor.addstrex(display_y, display_x, char, colour)
 
 
     #Assembles and displays the status-bar.
@@ -167,17 +487,19 @@ class Display:
         #We add one space of right padding to the right side of the status-bar to make it look better.
         statusbar_right += " "
         #We put both sides of the status-bar together padding the space in the middle with spaces.
-        separating_spaces = " " * (self.editor.x_size - len(statusbar_left) - len(statusbar_right))
+        (_, left, _, width) = self.get_region()
+        separating_spaces = " " * (width - len(statusbar_left) - len(statusbar_right))
         assembled_statusbar = f"{statusbar_left}{separating_spaces}{statusbar_right}"
 
-        #We print the status-bar.
-        self.editor.stdscr.addstr(self.editor.y_size + self.display_config.y_end, 0, assembled_statusbar, self.editor.get_colour(self.colour_config.status_bar_colour))
+        #We print the status-bar, it's cut to the width of the display.
+        self.editor.addstrex(self.get_end_y(), left, assembled_statusbar[:width], self.editor.get_colour(self.colour_config.status_bar_colour))
 
 
     #Displays the prompt.
     def display_prompt(self) -> None:
+        #Prompts longer than the console are shortened, the lower right corner can't be written to.
         if self.prompt.get_enabled():
-            self.editor.stdscr.addstr(self.editor.y_size - 1, 0, self.prompt.get_prompt(), self.editor.get_colour(self.colour_config.prompt_colour))
+            self.editor.stdscr.addstr(self.editor.y_size - 1, 0, self.prompt.get_prompt()[:self.editor.x_size - 1], self.editor.get_colour(self.colour_config.prompt_colour))
 
 
     #Calculates the start position for printing the buffer.
@@ -188,28 +510,61 @@ class Display:
         self.display_config.x_start = line_number_width
 
 
+    #Returns the width available for displaying the text, the width of the display minus the line numbers.
+    def get_text_width(self) -> int:
+        return self.get_end_x() - self.get_text_x()
+
+
     #Handles the horizontal and vertical scroll for printing the appropriate part of the buffer depending on the position of the cursor. 
     def scroll_handler(self) -> None:
-        end_y = self.editor.y_size + self.display_config.y_end
-        end_x = self.editor.x_size + self.display_config.x_end
+        end_y = self.get_text_height()
+        text_width = self.get_text_width()
         cursor_y = self.cursor.get_y()
         cursor_x = self.cursor.get_x()
 
-        #First we check if the cursor has gone beneath the printed part of the buffer. For this we check the Y position of the cursor against
-        #the final size of the printed buffer, "end_y", added to the current Y scroll minus 1, to account for the index. In case it's true we
-        #set the scroll to be enough so the cursor appears on the last line.
-        if cursor_y > end_y + self.buffer_y_scroll - 1:
-            self.buffer_y_scroll = cursor_y - end_y + 1
+        #The cursor can be moved into a folded region by a search or a jump, the region is unfolded so the cursor is visible.
+        self.fold_index.reveal(cursor_y)
+
+        #With soft wrapping the same checks are done with the cursor's screen row, there's no horizontal scroll.
+        if self.wrap_index != None:
+            cursor_row = self.wrap_index.row_of(cursor_y, cursor_x)
+
+            if cursor_row > end_y + self.buffer_y_scroll - 1:
+                self.buffer_y_scroll = cursor_row - end_y + 1
+            elif cursor_row < self.buffer_y_scroll:
+                self.buffer_y_scroll = cursor_row
+
+            self.buffer_x_scroll = 0
+            return
+
+        #The checks are done with visible rows, so folded regions count as a single line. A scroll line that was folded is moved to the header
+        #of its region. Without folds the rows are the lines.
+        cursor_row = self.fold_index.visible_index(cursor_y)
+        scroll_row = self.fold_index.visible_index(self.buffer_y_scroll)
+
+        #First we check if the cursor has gone beneath the printed part of the buffer. For this we check the row of the cursor against the final
+        #size of the printed buffer, "end_y", added to the current scroll minus 1, to account for the index. In case it's true we set the scroll
+        #to be enough so the cursor appears on the last line.
+        if cursor_row > end_y + scroll_row - 1:
+            scroll_row = cursor_row - end_y + 1
         #If the cursor goes above the printed part of the buffer we set the scroll to the cursor's position, which is just enough for the cursor
         #to appear on the first line.
-        elif cursor_y < self.buffer_y_scroll:
-            self.buffer_y_scroll = cursor_y
+        elif cursor_row < scroll_row:
+            scroll_row = cursor_row
+
+        self.buffer_y_scroll = self.fold_index.line_at_visible(scroll_row)
+
+        #The horizontal scroll is measured in columns, so we get the column where the cursor starts and the one where it ends, the character under
+        #the cursor may be wider than one cell.
+        columns = self.buffer.get_columns(cursor_y)
+        cursor_column = columns[cursor_x]
+        cursor_end_column = (columns[cursor_x + 1] if cursor_x < len(columns) - 1 else cursor_column + 1)
 
         #Same concept except in the X axis, except that we also take into account the fact that "start_x" can be not zero, when the line
         #numbers are enabled.
-        if cursor_x > end_x - self.display_config.x_start + self.buffer_x_scroll - 1:
-            self.buffer_x_scroll = cursor_x - end_x + self.display_config.x_start + 1 
+        if cursor_end_column > text_width + self.buffer_x_scroll:
+            self.buffer_x_scroll = cursor_end_column - text_width
         #If the cursor goes above the printed part of the buffer we set the scroll to the cursor's position, which is just enough for the cursor
         #to appear on the first line.
-        elif cursor_x < self.buffer_x_scroll:
-            self.buffer_x_scroll = cursor_x
\ No newline at end of file
+        elif cursor_column < self.buffer_x_scroll:
+            self.buffer_x_scroll = cursor_column
\ No newline at end of file
@@ -1,9 +1,12 @@
+import curses
 from enum import Enum, auto
+from typing import Any, Optional
 
 
 class DisplayModesEnum(Enum):
     NORMAL = auto(),
-    HIGHLIGHT = auto()
+    HIGHLIGHT = auto(),
+    HEX = auto()
 
 
 class DisplayModeHandler:
@@ -16,26 +19,66 @@ class DisplayModeHandler:
 
         #Highlighted text in highlight mode.
         self.highlight_text = None
+        #The file shown in hex mode, a "HexView". "display.hex_view" isn't imported here, it loads "mmap" and is only needed once hex mode is
+        #used, it's imported when the hex view is created.
+        self.hex_view = None
+        #The spell checker whose misspellings are underlined in every mode, "None" while spell checking is off.
+        self.spell_checker = None
 
 
-    #Displays a character in the given position.
-    def display_char(self, display_y: int, display_x: int, actual_y: int, actual_x: int, char: str) -> None:
-        match self.current_display_mode:
-            case DisplayModesEnum.NORMAL:
-                colour = self.editor.get_colour(self.colour_config.text_colour)
+    #Returns the style of a line, the ranges of its characters that are highlighted and the ones that are underlined, as tuples of tuples with
+    #their start and end. Lines are rendered again when their style changes, see "RenderCache".
+    def get_line_style(self, y_pos: int) -> tuple[tuple, tuple]:
+        highlighted = ()
+        underlined = ()
 
-            case DisplayModesEnum.HIGHLIGHT:
-                #Initially we set the characters colour to the normal colour.
-                colour = self.editor.get_colour(self.colour_config.text_colour)
+        if self.current_display_mode == DisplayModesEnum.HIGHLIGHT:
+            highlighted = tuple(self.highlight_text.get(y_pos, ()))
 
-                #We check if there are any characters to highlight in the current line, then we check if the character is in the correct index. If so
-                #change the character colour the one for highlighted characters.
-                if actual_y in self.highlight_text:
-                    for (start, end) in self.highlight_text[actual_y]:
-                        if start <= actual_x < end:
-                            colour = self.editor.get_colour(self.colour_config.highlight_colour)
+        #Misspelled words are underlined in every mode.
+        if self.spell_checker != None:
+            underlined = tuple(self.spell_checker.get_misspellings(y_pos))
 
-        self.editor.stdscr.addstr(display_y, display_x, char, colour)
+        return (highlighted, underlined)
+
+
+    #Returns the colour of the character in the given position of a line with the given style, see "get_line_style".
+    def get_char_colour(self, x_pos: int, style: tuple[tuple, tuple]) -> int:
+        (highlighted, underlined) = style
+        #Initially we set the characters colour to the normal colour.
+        colour = self.editor.get_colour(self.colour_config.text_colour)
+
+        #If the character is in a highlighted section we change its colour to the one for highlighted characters.
+        for (start, end) in highlighted:
+            if start <= x_pos < end:
+                colour = self.editor.get_colour(self.colour_config.highlight_colour)
+
+        for (start, end) in underlined:
+            if start <= x_pos < end:
+                colour |= curses.A_UNDERLINE
+
+        return colour
+
+
+    #Returns the highlighted text if the display mode is highlight mode, otherwise returns "None".
+    def get_highlight_text(self) -> Optional[dict[int, list[tuple[int, int]]]]:
+        if self.current_display_mode == DisplayModesEnum.HIGHLIGHT:
+            return self.highlight_text
+
+        return None
+
+
+    #Returns the hex view if the display mode is hex mode, otherwise returns "None".
+    def get_hex_view(self) -> Optional[Any]:
+        if self.current_display_mode == DisplayModesEnum.HEX:
+            return self.hex_view
+
+        return None
+
+
+    #Sets the spell checker whose misspellings are underlined, or "None" to stop underlining them.
+    def set_spell_checker(self, spell_checker) -> None:
+        self.spell_checker = spell_checker
 
 
     #Sets display mode to normal.
@@ -46,4 +89,9 @@ class DisplayModeHandler:
     #highlight, and the values to each key should be a list of tuples indicating when the character sections starts and ends.
     def set_highlight_display_mode(self, highlight_text: [dict[int, list[tuple[int, int]]]]) -> None:
         self.current_display_mode = DisplayModesEnum.HIGHLIGHT
-        self.highlight_text = highlight_text
\ No newline at end of file
+        self.highlight_text = highlight_text
+
+    #Sets display mode to hex mode, in which the buffer isn't shown, instead the display shows the bytes of the file in the given hex view.
+    def set_hex_display_mode(self, hex_view: Any) -> None:
+        self.current_display_mode = DisplayModesEnum.HEX
+        self.hex_view = hex_view
@@ -0,0 +1,161 @@
+import mmap, os
+from typing import Optional
+
+
+#A read-only view of the bytes of a file, shown by the display in hex mode. The file is memory mapped, so only the pages of the displayed rows are
+#read from disk and files of any size open instantly. Each row shows the offset of its first byte, its bytes in hex and its bytes as ASCII.
+class HexView:
+    #How many bytes at the start of a file are checked for null bytes to know if it's binary.
+    BINARY_CHECK_SIZE = 8192
+    #The possible number of bytes in a row, the largest one that fits in the console is used.
+    ROW_SIZES = (16, 8, 4)
+    #Converts each byte to the character shown in the ASCII column, non printable bytes are shown as dots.
+    ASCII_TABLE = bytes(byte if 0x20 <= byte < 0x7f else ord(".") for byte in range(256))
+
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+
+        self.file = open(filename, "rb")
+        self.size = os.fstat(self.file.fileno()).st_size
+        #Empty files can't be mapped, but there's nothing to read from them anyway.
+        self.data = (mmap.mmap(self.file.fileno(), 0, access = mmap.ACCESS_READ) if self.size > 0 else b"")
+
+        #The offset of the byte under the cursor, and the first displayed row.
+        self.cursor = 0
+        self.scroll = 0
+        self.row_size = self.ROW_SIZES[0]
+        #The offsets are padded to the same width, at least eight hex digits.
+        self.offset_width = max(len(f"{max(self.size - 1, 0):x}"), 8)
+
+
+    #Returns whether a file looks binary, because it has null bytes at its start.
+    @staticmethod
+    def is_binary(filename: str) -> bool:
+        try:
+            with open(filename, "rb") as file:
+                return b"\0" in file.read(HexView.BINARY_CHECK_SIZE)
+        except OSError:
+            return False
+
+
+    def close(self) -> None:
+        if self.size > 0:
+            self.data.close()
+
+        self.file.close()
+
+
+    def get_filename(self) -> str:
+        return self.filename
+
+
+    def get_size(self) -> int:
+        return self.size
+
+
+    def get_cursor(self) -> int:
+        return self.cursor
+
+
+    def get_offset_width(self) -> int:
+        return self.offset_width
+
+
+    def get_row_size(self) -> int:
+        return self.row_size
+
+
+    #Returns the number of rows, an empty file has a single empty row.
+    def get_row_count(self) -> int:
+        return max((self.size + self.row_size - 1) // self.row_size, 1)
+
+
+    #Uses the largest row size that fits in the given width, the row keeps the cursor's byte in the first displayed row.
+    def set_width(self, width: int) -> None:
+        for row_size in self.ROW_SIZES:
+            if self.offset_width + 2 + row_size * 4 <= width:
+                break
+
+        if row_size != self.row_size:
+            self.scroll = self.scroll * self.row_size // row_size
+            self.row_size = row_size
+
+
+    #Moves the cursor by the given number of bytes, it stays inside the file.
+    def move_cursor(self, bytes_count: int) -> None:
+        self.cursor = min(max(self.cursor + bytes_count, 0), max(self.size - 1, 0))
+
+
+    #Moves the cursor to the given offset, returns "False" if it isn't in the file.
+    def set_cursor(self, offset: int) -> bool:
+        if not 0 <= offset < max(self.size, 1):
+            return False
+
+        self.cursor = offset
+        return True
+
+
+    #Moves the cursor to the first or last byte of its row.
+    def cursor_row_start(self) -> None:
+        self.cursor -= self.cursor % self.row_size
+
+    def cursor_row_end(self) -> None:
+        self.move_cursor(self.row_size - 1 - self.cursor % self.row_size)
+
+
+    #Scrolls so the cursor's row is between the first and the last of the given number of displayed rows.
+    def scroll_to_cursor(self, rows: int) -> None:
+        cursor_row = self.cursor // self.row_size
+
+        if cursor_row >= self.scroll + rows:
+            self.scroll = cursor_row - rows + 1
+        elif cursor_row < self.scroll:
+            self.scroll = cursor_row
+
+
+    #Returns the offset and the bytes of a row as text, the bytes are the hex column followed by the ASCII column. Only the bytes of the row are
+    #read from the file.
+    def get_row(self, row: int) -> tuple[str, str]:
+        start = row * self.row_size
+        chunk = self.data[start:start + self.row_size]
+
+        hex_text = chunk.hex(" ").ljust(self.row_size * 3 - 1)
+        ascii_text = chunk.translate(self.ASCII_TABLE).decode("ascii")
+
+        return (f"{start:0{self.offset_width}x}", f"{hex_text}  {ascii_text}")
+
+
+    #Returns the columns of the cursor in the text of its row, in the hex column and in the ASCII column.
+    def get_cursor_columns(self) -> tuple[int, int]:
+        position = self.cursor % self.row_size
+        return (position * 3, self.row_size * 3 + 1 + position)
+
+
+    #Turns the text of a byte pattern into bytes, text in quotes is searched as is and anything else as hex bytes, spaces between them are
+    #ignored. Returns "None" if the pattern is invalid.
+    @staticmethod
+    def parse_pattern(text: str) -> Optional[bytes]:
+        if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+            pattern = text[1:-1].encode()
+        else:
+            try:
+                pattern = bytes.fromhex(text)
+            except ValueError:
+                return None
+
+        return (pattern if pattern != b"" else None)
+
+
+    #Moves the cursor to the next occurrence of the pattern after it, wrapping around at the end of the file. The search runs in C over the
+    #mapped file. Returns "False" if the pattern isn't in the file.
+    def find(self, pattern: bytes) -> bool:
+        offset = self.data.find(pattern, self.cursor + 1)
+
+        if offset < 0:
+            offset = self.data.find(pattern, 0, self.cursor + len(pattern))
+
+        if offset < 0:
+            return False
+
+        self.cursor = offset
+        return True
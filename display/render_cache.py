@@ -0,0 +1,111 @@
+from bisect import bisect_left
+from typing import Iterator
+
+from buffer.buffer import TextBuffer
+from buffer.columns import cell_text
+from display.display_modes import DisplayModeHandler
+
+
+#Keeps the rendered cells of the displayed lines, shared by every window that shows the buffer, so two windows showing the same lines render them
+#once. A rendered line is the list of its cells with their columns, text and colour, which includes the highlighted and underlined characters.
+#Lines are rendered again when they are edited or when their highlights change, the highlights each line was rendered with are stored with it.
+#Consecutive cells with the same colour are displayed together as a single run, instead of one call to curses per character.
+class RenderCache:
+    #The maximum number of rendered lines kept, the cache is emptied when it's reached.
+    MAX_LINES = 4096
+    #Lines longer than this aren't kept, only their visible part is rendered.
+    MAX_LINE_LENGTH = 4096
+
+    def __init__(self, buffer: type[TextBuffer], display_mode_handler: type[DisplayModeHandler]) -> None:
+        self.buffer = buffer
+        self.display_mode_handler = display_mode_handler
+
+        #The rendered lines, by line, as tuples of the style they were rendered with, the columns of their cells and the cells, see "render".
+        self.lines = {}
+
+
+    #Change callback for the buffer. Edited lines are dropped and the lines after them are moved.
+    def buffer_changed(self, start: int, old_count: int, new_count: int) -> None:
+        if self.lines == {}:
+            return
+
+        end = start + old_count
+        delta = new_count - old_count
+
+        if delta == 0:
+            for y in range(start, end):
+                self.lines.pop(y, None)
+        else:
+            self.lines = {(y if y < start else y + delta) : line for (y, line) in self.lines.items() if y < start or y >= end}
+
+
+    #Renders the cells of a line, as tuples of their first character, their column, the column after them, their text and their colour. Only the
+    #cells between "start_column" and "end_column" are rendered.
+    def render(self, y_pos: int, style: tuple, start_column: int, end_column: int) -> list[tuple[int, int, int, str, int]]:
+        current_line = self.buffer.get_line(y_pos)
+        columns = self.buffer.get_columns(y_pos)
+        x = bisect_left(columns, start_column, 0, len(current_line))
+        cells = []
+
+        #If the first visible character is a zero width one its base character isn't visible, it's skipped.
+        while x < len(current_line) and columns[x + 1] == columns[x]:
+            x += 1
+
+        while x < len(current_line):
+            #The character doesn't fit in the visible part.
+            if columns[x + 1] > end_column:
+                break
+
+            text, next_x = cell_text(current_line, columns, x)
+            cells.append((x, columns[x], columns[next_x], text, self.display_mode_handler.get_char_colour(x, style)))
+            x = next_x
+
+        return cells
+
+
+    #Returns the runs of cells of a line that are completely between the columns "start_column" and "end_column", as tuples of the column of the
+    #first cell, counting from "start_column", the text of the cells and their colour. Lines are rendered whole the first time they are displayed.
+    def get_runs(self, y_pos: int, start_column: int, end_column: int) -> Iterator[tuple[int, str, int]]:
+        style = self.display_mode_handler.get_line_style(y_pos)
+        rendered = self.lines.get(y_pos)
+
+        if rendered != None and rendered[0] == style:
+            (_, cell_columns, cells) = rendered
+            first = bisect_left(cell_columns, start_column)
+        elif len(self.buffer.get_line(y_pos)) > self.MAX_LINE_LENGTH:
+            cells = self.render(y_pos, style, start_column, end_column)
+            first = 0
+        else:
+            cells = self.render(y_pos, style, 0, self.buffer.get_columns(y_pos)[-1])
+            cell_columns = [cell[1] for cell in cells]
+            first = bisect_left(cell_columns, start_column)
+
+            if len(self.lines) >= self.MAX_LINES:
+                self.lines = {}
+            self.lines[y_pos] = (style, cell_columns, cells)
+
+        run_column = None
+        run_text = []
+        run_colour = None
+        next_column = None
+
+        for i in range(first, len(cells)):
+            (x, column, cell_end, text, colour) = cells[i]
+
+            if cell_end > end_column:
+                break
+
+            #A cell continues the run if it has the same colour and it's right after it, zero width characters are in the cell before them.
+            if colour != run_colour or column != next_column:
+                if run_text != []:
+                    yield (run_column - start_column, "".join(run_text), run_colour)
+
+                run_column = column
+                run_text = []
+                run_colour = colour
+
+            run_text.append(text)
+            next_column = cell_end
+
+        if run_text != []:
+            yield (run_column - start_column, "".join(run_text), run_colour)
@@ -4,14 +4,17 @@ from typing import Callable
 from buffer.buffer import TextBuffer
 from buffer.cursor import Cursor
 from actions.input_output import IOHandler
+from display.display_modes import DisplayModeHandler
 
 
 #The status-bar functions are in another class to avoid cluttering the "Display" class with too many functions.
 class StatusbarFunctions:
-    def __init__(self, buffer: type[TextBuffer], cursor: type[Cursor], io: type[IOHandler]) -> None:
+    def __init__(self, buffer: type[TextBuffer], cursor: type[Cursor], io: type[IOHandler], display_mode_handler: type[DisplayModeHandler]) -> None:
             self.buffer = buffer
             self.cursor = cursor
             self.io = io
+            #In hex mode the elements describe the file in the hex view instead of the buffer.
+            self.display_mode_handler = display_mode_handler
 
     #Returns a dictionary that contains the name of the element in the configuration as keys and the function that gets that information as
     #elements.
@@ -29,12 +32,20 @@ class StatusbarFunctions:
 
     #Returns the name of the current filename.
     def statusbar_filename(self) -> str:
+        hex_view = self.display_mode_handler.get_hex_view()
+        if hex_view != None:
+            return f"{hex_view.get_filename()} (hex)"
+
         filename = self.io.get_filename()
         return (filename if filename != None else "[No filename]")
 
 
     #Returns the number of lines in the current buffer.
     def statusbar_lines(self) -> str:
+        hex_view = self.display_mode_handler.get_hex_view()
+        if hex_view != None:
+            return f"{hex_view.get_size()} bytes"
+
         lines = self.buffer.get_line_count()
         s_str = ("" if lines == 1 else "s")
         return f"{lines} line{s_str}"
@@ -42,6 +53,10 @@ class StatusbarFunctions:
 
     #Returns whether or not the buffer has been modified since it was saved.
     def statusbar_modified(self) -> str:
+        #The hex view is read only.
+        if self.display_mode_handler.get_hex_view() != None:
+            return ""
+
         return ("(modified)" if self.io.get_dirty() else "")
 
 
@@ -53,4 +68,11 @@ class StatusbarFunctions:
 
     #Returns the position of the cursor, first vertical the horizontal. We add 1 to both so they start counting from one.
     def statusbar_cursor(self) -> str:
-        return f"{self.cursor.get_y() + 1},{self.cursor.get_x() + 1}"
\ No newline at end of file
+        #In hex mode the offset of the byte under the cursor is shown.
+        hex_view = self.display_mode_handler.get_hex_view()
+        if hex_view != None:
+            return f"0x{hex_view.get_cursor():x}"
+
+        #If there are additional cursors their number is also shown.
+        extra_cursors = (f" +{self.cursor.get_extra_cursor_count()}" if self.cursor.has_extra_cursors() else "")
+        return f"{self.cursor.get_y() + 1},{self.cursor.get_x() + 1}{extra_cursors}"
\ No newline at end of file
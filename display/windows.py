@@ -0,0 +1,175 @@
+from dataclasses import dataclass
+from typing import Optional, Union
+
+from buffer.buffer import TextBuffer
+from buffer.cursor import Cursor
+from display.display import Display
+
+
+#A window shows the buffer in a part of the console, with its own cursor and display, so each window has its own cursor position and scroll.
+@dataclass
+class Window:
+    cursor: Cursor
+    display: Display
+
+
+#A part of the console split between two windows, or other splits. Vertical splits are side by side, separated by a column, horizontal ones are
+#one above the other.
+@dataclass
+class Split:
+    vertical: bool
+    first: Union[Window, "Split"]
+    second: Union[Window, "Split"]
+
+
+#Keeps the windows the console is split into, as a tree of splits whose leaves are the windows, and which one is active, the one that gets the
+#keys. Every window shows the same buffer, the lines they render are shared, see "RenderCache".
+class WindowLayout:
+    #The smallest height and width a window can be split to, a window needs a row of text and its status-bar.
+    MIN_HEIGHT = 2
+    MIN_WIDTH = 10
+
+    def __init__(self, buffer: type[TextBuffer], window: Window) -> None:
+        self.buffer = buffer
+        self.root = window
+        self.active = window
+        #The columns that separate side by side windows, as tuples of their first row, their column and their height. They are calculated by
+        #"arrange".
+        self.separators = []
+
+
+    def get_active(self) -> Window:
+        return self.active
+
+
+    def set_active(self, window: Window) -> None:
+        self.active = window
+
+
+    #Returns every window, from the top left one.
+    def get_windows(self) -> list[Window]:
+        windows = []
+        pending = [self.root]
+
+        while pending != []:
+            node = pending.pop()
+
+            if isinstance(node, Window):
+                windows.append(node)
+            else:
+                pending.extend((node.second, node.first))
+
+        return windows
+
+
+    #Returns the window after the active one, going back to the first one after the last.
+    def get_next(self) -> Window:
+        windows = self.get_windows()
+        return windows[(windows.index(self.active) + 1) % len(windows)]
+
+
+    #Splits the active window, the new window goes after it, below it or to its right. Returns "False" if the active window is too small to be
+    #split.
+    def split(self, window: Window, vertical: bool) -> bool:
+        (_, _, height, width) = self.active.display.get_region()
+
+        if (vertical and width < 2 * self.MIN_WIDTH + 1) or (not vertical and height < 2 * self.MIN_HEIGHT):
+            return False
+
+        self.root = self._replace(self.root, self.active, Split(vertical, self.active, window))
+        self.active = window
+
+        return True
+
+
+    #Closes the active window, the window that shared the split with it takes its place. Returns the closed window, or "None" if it's the only one.
+    def close(self) -> Optional[Window]:
+        if self.root is self.active:
+            return None
+
+        closed = self.active
+        parent = self._find_parent(self.root, closed)
+        sibling = (parent.second if parent.first is closed else parent.first)
+        self.root = self._replace(self.root, parent, sibling)
+
+        #The first window of the part that took its place becomes the active one.
+        while isinstance(sibling, Split):
+            sibling = sibling.first
+        self.active = sibling
+
+        return closed
+
+
+    #Returns the tree with a node replaced by another one.
+    def _replace(self, node: Union[Window, Split], old: Union[Window, Split], new: Union[Window, Split]) -> Union[Window, Split]:
+        if node is old:
+            return new
+
+        if isinstance(node, Split):
+            node.first = self._replace(node.first, old, new)
+            node.second = self._replace(node.second, old, new)
+
+        return node
+
+
+    #Returns the split that contains the given node.
+    def _find_parent(self, node: Union[Window, Split], child: Union[Window, Split]) -> Optional[Split]:
+        if isinstance(node, Window):
+            return None
+
+        if node.first is child or node.second is child:
+            return node
+
+        return self._find_parent(node.first, child) or self._find_parent(node.second, child)
+
+
+    #Gives each window its part of the console, starting at the given row and column and with the given size, and calculates the separators.
+    def arrange(self, top: int, left: int, height: int, width: int) -> None:
+        self.separators = []
+        self._arrange(self.root, top, left, height, width)
+
+
+    def _arrange(self, node: Union[Window, Split], top: int, left: int, height: int, width: int) -> None:
+        if isinstance(node, Window):
+            node.display.set_region((top, left, height, width))
+        elif node.vertical:
+            first_width = (width - 1) // 2
+            self._arrange(node.first, top, left, height, first_width)
+            self.separators.append((top, left + first_width, height))
+            self._arrange(node.second, top, left + first_width + 1, height, width - first_width - 1)
+        else:
+            first_height = height // 2
+            self._arrange(node.first, top, left, first_height, width)
+            self._arrange(node.second, top + first_height, left, height - first_height, width)
+
+
+    #Change callback for the buffer. The cursors and scroll of the windows that aren't active are moved with the lines they are on, the active
+    #window's cursor is moved by the edit itself.
+    def buffer_changed(self, start: int, old_count: int, new_count: int) -> None:
+        end = start + old_count
+        delta = new_count - old_count
+        line_count = self.buffer.get_line_count()
+
+        #Positions after the edit are moved, positions in the edited lines stay in them.
+        def move_line(y_pos: int) -> int:
+            if y_pos >= end:
+                return y_pos + delta
+            if y_pos >= start:
+                return min(y_pos, start + max(new_count, 1) - 1, line_count - 1)
+
+            return y_pos
+
+        for window in self.get_windows():
+            if window is self.active:
+                continue
+
+            positions = []
+            for (y, x) in window.cursor.get_all_positions():
+                y = move_line(y)
+                positions.append((y, min(x, len(self.buffer.get_line(y)))))
+
+            window.cursor.set_all_positions(positions)
+
+            #With soft wrapping the scroll is measured in rows, it's corrected when the window is displayed.
+            if window.display.wrap_index == None:
+                window.display.buffer_y_scroll = move_line(window.display.buffer_y_scroll)
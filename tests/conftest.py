@@ -0,0 +1,19 @@
+import os, sys
+
+import pytest
+
+#The tests import the editor's modules the same way the editor does, from the repository's root.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from buffer.buffer import TextBuffer
+
+
+#Returns a function that creates a buffer with the given lines, with no lines it has a single empty line like a new buffer.
+@pytest.fixture
+def make_buffer():
+    def make(lines: list[str]) -> TextBuffer:
+        buffer = TextBuffer()
+        buffer.replace_lines(0, 1, lines)
+        return buffer
+
+    return make
@@ -0,0 +1,136 @@
+import random
+
+from buffer.buffer import TextBuffer
+from buffer.bracket_index import BracketIndex
+
+
+def make_bracket_index(buffer: TextBuffer) -> BracketIndex:
+    bracket_index = BracketIndex(buffer)
+    buffer.add_change_callback(bracket_index.buffer_changed)
+    return bracket_index
+
+
+def random_line(rng: random.Random) -> str:
+    return "".join(rng.choice("()[]{}x") for _ in range(rng.randint(0, 4)))
+
+
+#Returns the match of the bracket in the given position by looking at every bracket of the buffer, or "None".
+def brute_force_match(lines: list[str], y_pos: int, x_pos: int) -> tuple[int, int]:
+    brackets = [(y, x, char) for (y, line) in enumerate(lines) for (x, char) in enumerate(line) if char in "()[]{}"]
+    index = brackets.index((y_pos, x_pos, lines[y_pos][x_pos]))
+    bracket = lines[y_pos][x_pos]
+
+    if bracket in BracketIndex.PAIRS:
+        depth = 0
+        for (y, x, char) in brackets[index + 1:]:
+            depth += (1 if char in BracketIndex.PAIRS else -1)
+            if depth < 0:
+                return ((y, x) if char == BracketIndex.PAIRS[bracket] else None)
+    else:
+        depth = 0
+        for (y, x, char) in reversed(brackets[:index]):
+            depth += (1 if char in BracketIndex.OPENING else -1)
+            if depth < 0:
+                return ((y, x) if char == BracketIndex.OPENING[bracket] else None)
+
+    return None
+
+
+#Checks the match of every bracket and the depth of every line against looking at every bracket of the buffer.
+def check_matches(bracket_index: BracketIndex, buffer: TextBuffer) -> None:
+    lines = [buffer.get_line(y) for y in range(buffer.get_line_count())]
+    depth = 0
+
+    for (y, line) in enumerate(lines):
+        assert bracket_index.get_depth(y) == depth
+        depth += sum(1 if char in BracketIndex.PAIRS else -1 for char in line if char in "()[]{}")
+
+        for x in range(len(line)):
+            if line[x] in "()[]{}":
+                assert bracket_index.find_match(y, x) == brute_force_match(lines, y, x), (y, x)
+
+
+def test_empty_buffer(make_buffer):
+    buffer = make_buffer([])
+    bracket_index = make_bracket_index(buffer)
+
+    assert bracket_index.find_match(0, 0) == None
+    assert bracket_index.get_depth(0) == 0
+
+    buffer.add_char("()", 0, 0)
+    assert bracket_index.find_match(0, 0) == (0, 1)
+    check_matches(bracket_index, buffer)
+
+
+#With small blocks and no nearby lines the tree is used for every match in another line.
+def test_edits_at_last_line(make_buffer, monkeypatch):
+    monkeypatch.setattr(BracketIndex, "BLOCK_SIZE", 2)
+    monkeypatch.setattr(BracketIndex, "NEARBY_LINES", 0)
+    buffer = make_buffer(["{"] + ["x"] * 8 + ["}"])
+    bracket_index = make_bracket_index(buffer)
+    assert bracket_index.find_match(0, 0) == (9, 0)
+
+    buffer.newline(9, 0)
+    assert bracket_index.find_match(0, 0) == (10, 0)
+    buffer.replace_lines(11, 0, ["[", "]"])
+    check_matches(bracket_index, buffer)
+    buffer.delete_char(10, 0)
+    assert bracket_index.find_match(0, 0) == (9, 0)
+    buffer.replace_lines(9, 3, [])
+    assert bracket_index.find_match(0, 0) == None
+    check_matches(bracket_index, buffer)
+
+
+def test_whole_buffer_replace(make_buffer, monkeypatch):
+    monkeypatch.setattr(BracketIndex, "BLOCK_SIZE", 2)
+    monkeypatch.setattr(BracketIndex, "NEARBY_LINES", 0)
+    buffer = make_buffer(["(", "x", ")"])
+    bracket_index = make_bracket_index(buffer)
+    check_matches(bracket_index, buffer)
+
+    buffer.replace_lines(0, 3, ["[", "(", "x", ")", "]", "{"])
+    check_matches(bracket_index, buffer)
+    buffer.set_buffer(make_buffer(["}"]).get_buffer())
+    assert bracket_index.find_match(0, 0) == None
+    check_matches(bracket_index, buffer)
+
+
+#Random edits with small blocks and few nearby lines, so the tree is used and blocks are split and merged, checked against matching every
+#bracket of the buffer.
+def test_random_edits_match_brute_force(make_buffer, monkeypatch):
+    monkeypatch.setattr(BracketIndex, "BLOCK_SIZE", 4)
+    monkeypatch.setattr(BracketIndex, "NEARBY_LINES", 2)
+
+    for seed in range(150):
+        rng = random.Random(seed)
+        buffer = make_buffer([random_line(rng) for _ in range(rng.randint(1, 40))])
+        bracket_index = make_bracket_index(buffer)
+
+        for _ in range(40):
+            line_count = buffer.get_line_count()
+            y = rng.randrange(line_count)
+            x = rng.randint(0, len(buffer.get_line(y)))
+            operation = rng.randrange(4)
+
+            if operation == 0:
+                buffer.newline(y, x)
+            elif operation == 1:
+                buffer.delete_char(y, x)
+            elif operation == 2:
+                buffer.add_char(rng.choice("()[]{}x"), y, x)
+            else:
+                old_count = rng.randint(0, min(10, line_count - y))
+                new_count = rng.randint(0 if old_count < line_count else 1, 10)
+                buffer.replace_lines(y, old_count, [random_line(rng) for _ in range(new_count)])
+
+            lines = [buffer.get_line(y) for y in range(buffer.get_line_count())]
+            depth = 0
+
+            for (y, line) in enumerate(lines):
+                if rng.random() < 0.2:
+                    assert bracket_index.get_depth(y) == depth, seed
+                depth += sum(1 if char in BracketIndex.PAIRS else -1 for char in line if char in "()[]{}")
+
+                for x in range(len(line)):
+                    if line[x] in "()[]{}" and rng.random() < 0.3:
+                        assert bracket_index.find_match(y, x) == brute_force_match(lines, y, x), (seed, y, x)
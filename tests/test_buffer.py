@@ -0,0 +1,108 @@
+import random
+
+from buffer.buffer import EditOperationsEnum, TextBuffer
+
+
+def get_text(buffer: TextBuffer) -> str:
+    return "\n".join(buffer.get_line(y) for y in range(buffer.get_line_count()))
+
+
+#Returns the position of an offset of the given text.
+def get_position(text: str, offset: int) -> tuple[int, int]:
+    return (text.count("\n", 0, offset), offset - (text.rfind("\n", 0, offset) + 1))
+
+
+def test_empty_buffer(make_buffer):
+    buffer = make_buffer([])
+    assert buffer.get_line_count() == 1
+
+    #Deleting in an empty buffer does nothing.
+    assert buffer.multi_edit([(0, 0)], EditOperationsEnum.BACKSPACE, None) == [(0, 0)]
+    assert buffer.multi_edit([(0, 0)], EditOperationsEnum.DELETE, None) == [(0, 0)]
+    assert get_text(buffer) == ""
+
+    assert buffer.multi_edit([(0, 0), (0, 0)], EditOperationsEnum.INSERT, ["a\nb", "c"]) == [(1, 1), (1, 1)]
+    assert get_text(buffer) == "a\nb"
+
+
+def test_edits_at_last_line(make_buffer):
+    buffer = make_buffer(["ab", "cd"])
+
+    assert buffer.multi_edit([(1, 2), (0, 2)], EditOperationsEnum.DELETE, None) == [(0, 4), (0, 2)]
+    assert get_text(buffer) == "abcd"
+    assert buffer.multi_edit([(0, 4), (0, 0)], EditOperationsEnum.INSERT, ["\n", "x"]) == [(1, 0), (0, 1)]
+    assert get_text(buffer) == "xabcd\n"
+    assert buffer.multi_edit([(1, 0)], EditOperationsEnum.BACKSPACE, None) == [(0, 5)]
+    assert get_text(buffer) == "xabcd"
+
+
+#Replacing the whole buffer is reported as a change of every line, without the edits inside them.
+def test_whole_buffer_replace(make_buffer):
+    buffer = make_buffer(["ab", "cd", "ef"])
+    changes = []
+    buffer.add_change_callback(lambda start, old_count, new_count: changes.append((start, old_count, new_count, buffer.get_text_edits())))
+
+    buffer.set_buffer(make_buffer(["x"]).get_buffer())
+    assert changes == [(0, 3, 1, None)]
+    assert buffer.get_text_edits() == None
+    assert buffer.multi_edit([(0, 1), (0, 0)], EditOperationsEnum.INSERT, ["y", "z"]) == [(0, 3), (0, 1)]
+    assert get_text(buffer) == "zxy"
+
+
+#Random multi-position edits, checked against applying the edit at each position of the joined text one by one, from the last one.
+def test_random_multi_edits_match_edits_one_by_one(make_buffer):
+    for seed in range(500):
+        rng = random.Random(seed)
+        buffer = make_buffer(["".join(rng.choice("ab") for _ in range(rng.randint(0, 4))) for _ in range(rng.randint(1, 8))])
+        changes = []
+        buffer.add_change_callback(lambda start, old_count, new_count: changes.append(buffer.get_text_edits()))
+
+        for _ in range(10):
+            text = get_text(buffer)
+            line_starts = [0] + [i + 1 for (i, char) in enumerate(text) if char == "\n"]
+            positions = []
+
+            for _ in range(rng.randint(1, 5)):
+                y = rng.randrange(buffer.get_line_count())
+                positions.append((y, rng.randint(0, len(buffer.get_line(y)))))
+
+            offsets = [line_starts[y] + x for (y, x) in positions]
+            #Repeated positions are only edited once, with the text of the first one.
+            distinct = sorted(set(offsets))
+            operation = rng.choice(list(EditOperationsEnum))
+            texts = None
+
+            if operation == EditOperationsEnum.INSERT:
+                texts = [rng.choice(["c", "\n", "cd\ne", ""]) for _ in positions]
+                first_texts = {}
+                for (offset, insert) in zip(offsets, texts):
+                    first_texts.setdefault(offset, insert)
+
+                expected_text = text
+                for offset in reversed(distinct):
+                    expected_text = expected_text[:offset] + first_texts[offset] + expected_text[offset:]
+
+                expected_offsets = [offset + sum(len(first_texts[other]) for other in distinct if other <= offset) for offset in offsets]
+
+            elif operation == EditOperationsEnum.BACKSPACE:
+                deleted = [offset - 1 for offset in distinct if offset > 0]
+                expected_text = "".join(char for (i, char) in enumerate(text) if i not in deleted)
+                expected_offsets = [offset - sum(1 for other in deleted if other < offset) for offset in offsets]
+
+            else:
+                deleted = [offset for offset in distinct if offset < len(text)]
+                expected_text = "".join(char for (i, char) in enumerate(text) if i not in deleted)
+                expected_offsets = [offset - sum(1 for other in deleted if other < offset) for offset in offsets]
+
+            changes.clear()
+            new_positions = buffer.multi_edit(positions, operation, texts)
+
+            assert get_text(buffer) == expected_text, seed
+            assert new_positions == [get_position(expected_text, offset) for offset in expected_offsets], seed
+
+            #The edits reported to the change callbacks, applied to the old lines from the last one, give the new lines.
+            lines = text.split("\n")
+            for (y, x, end_y, end_x, edit_text) in reversed(changes[0]):
+                joined = "\n".join(lines)
+                lines = (joined[:line_starts[y] + x] + edit_text + joined[line_starts[end_y] + end_x:]).split("\n")
+            assert "\n".join(lines) == expected_text, seed
@@ -0,0 +1,46 @@
+import pytest
+
+from actions import compression
+from actions.compression import FORMATS, detect_format, is_supported, open_text, write_lines
+
+
+#Every format is written through the worker thread in several chunks and read back line by line.
+@pytest.mark.parametrize("format", list(FORMATS))
+def test_round_trip(format, tmp_path, monkeypatch):
+    if not is_supported(format):
+        pytest.skip(f"{format} isn't supported without its module")
+
+    monkeypatch.setattr(compression, "WRITE_CHUNK_SIZE", 100)
+    filename = str(tmp_path / f"file{FORMATS[format][1]}")
+    lines = [f"line {i} " + "x" * (i % 7) + "\n" for i in range(1000)] + ["last"]
+
+    write_lines(filename, format, lines)
+
+    assert detect_format(filename) == format
+    with open_text(filename, format) as file:
+        assert list(file) == lines
+
+
+def test_empty_file_round_trip(tmp_path):
+    filename = str(tmp_path / "file.gz")
+
+    write_lines(filename, "gzip", [])
+
+    assert detect_format(filename) == "gzip"
+    with open_text(filename, "gzip") as file:
+        assert file.read() == ""
+
+
+#Text that starts like a bzip2 file isn't taken as compressed, even with a block size after "BZh".
+@pytest.mark.parametrize("text", ["BZh", "BZh is a prefix\n", "BZh9 is a block size\n", "BZh91AY is almost a block\n"])
+def test_text_starting_with_bzip2_magic_isnt_compressed(text, tmp_path):
+    filename = tmp_path / "file.bz2"
+    filename.write_text(text)
+
+    assert detect_format(str(filename)) == None
+
+
+#A file that doesn't exist gets the format of its extension.
+def test_missing_file_uses_extension(tmp_path):
+    assert detect_format(str(tmp_path / "new.xz")) == "xz"
+    assert detect_format(str(tmp_path / "new.txt")) == None
@@ -0,0 +1,31 @@
+import re
+
+import pytest
+
+from actions.file_search import FileSearch
+
+
+LINES = ["foo", "foo bar", "  foobar", "bar foo", "", "x = foo  "]
+
+
+#Searches a file with and without the prefilter, the prefilter must never skip a file with matching lines.
+@pytest.mark.parametrize("regex", [r"foo(?!\s)", r"(?<=\s)foo", r"(?<!^)foo", r"foo$", r"^\s*foo", r"foo\s*$", r"bar\b", r"o\Z", r"\Afoo", r"^$"])
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_prefilter_never_skips_matching_files(regex, newline, tmp_path):
+    file_search = FileSearch([], 1)
+    (tmp_path / "file.txt").write_bytes(newline.join(LINES).encode("utf-8"))
+    pattern = re.compile(regex)
+
+    expected = [f"file.txt:{y + 1}:{line}" for (y, line) in enumerate(LINES) if pattern.search(line) != None]
+
+    assert file_search.search_file(str(tmp_path), "file.txt", pattern, None) == expected
+    assert file_search.search_file(str(tmp_path), "file.txt", pattern, file_search.get_prefilter(regex)) == expected
+
+
+def test_prefilter_skips_files_without_matches(tmp_path):
+    file_search = FileSearch([], 1)
+    (tmp_path / "file.txt").write_text("\n".join(LINES))
+
+    assert file_search.get_prefilter(r"baz") != None
+    assert file_search.search_file(str(tmp_path), "file.txt", re.compile(r"baz"), file_search.get_prefilter(r"baz")) == []
+    assert file_search.get_prefilter(r"foo(?!\s)") == None
@@ -0,0 +1,134 @@
+import random
+
+from buffer.fold_index import FoldIndex
+
+
+#Checks every query of the index against the lines hidden by its folds, found by going through every fold.
+def check_queries(fold_index: FoldIndex, line_count: int) -> None:
+    hidden = set()
+    for (start, end) in fold_index.get_folds():
+        assert 0 <= start < end < line_count
+        hidden.update(range(start + 1, end + 1))
+
+    visible = [y for y in range(line_count) if y not in hidden]
+    assert fold_index.get_visible_count() == len(visible)
+
+    for (row, y) in enumerate(visible):
+        assert fold_index.line_at_visible(row) == y
+        assert fold_index.visible_index(y) == row
+        assert fold_index.next_visible(y) == (visible[row + 1] if row + 1 < len(visible) else line_count)
+
+        fold_end = (visible[row + 1] - 1 if row + 1 < len(visible) else line_count - 1)
+        assert fold_index.get_fold_end(y) == (fold_end if fold_end > y else None)
+
+    for y in range(line_count):
+        assert fold_index.is_hidden(y) == (y in hidden)
+
+        #A hidden line is counted as the header of its fold.
+        if y in hidden:
+            assert fold_index.visible_index(y) == fold_index.visible_index(max(line for line in visible if line < y))
+
+
+def make_fold_index(buffer) -> FoldIndex:
+    fold_index = FoldIndex(buffer)
+    buffer.add_change_callback(fold_index.buffer_changed)
+    return fold_index
+
+
+def test_empty_buffer(make_buffer):
+    buffer = make_buffer([])
+    fold_index = make_fold_index(buffer)
+
+    assert not fold_index.fold(0, 0)
+    buffer.replace_lines(0, 1, [""])
+    check_queries(fold_index, buffer.get_line_count())
+    assert fold_index.get_visible_count() == 1
+
+
+#Lines added or removed after the folds, or between them, only shift the folds after the edit.
+def test_edits_outside_folds_shift_later_folds(make_buffer):
+    buffer = make_buffer(["x"] * 20)
+    fold_index = make_fold_index(buffer)
+    fold_index.fold_regions([(2, 4), (2, 6), (10, 12), (15, 19)])
+
+    buffer.replace_lines(8, 1, ["x"] * 3)
+    assert fold_index.get_folds() == [(2, 6), (2, 4), (12, 14), (17, 21)]
+    check_queries(fold_index, buffer.get_line_count())
+
+    buffer.replace_lines(0, 2, [])
+    assert fold_index.get_folds() == [(0, 4), (0, 2), (10, 12), (15, 19)]
+    check_queries(fold_index, buffer.get_line_count())
+
+
+def test_edits_at_last_line(make_buffer):
+    buffer = make_buffer(["x"] * 10)
+    fold_index = make_fold_index(buffer)
+    fold_index.fold_regions([(1, 3), (5, 9)])
+
+    #The last line is hidden, editing it removes its fold.
+    buffer.replace_lines(9, 1, ["y", "y"])
+    assert fold_index.get_folds() == [(1, 3)]
+    check_queries(fold_index, buffer.get_line_count())
+
+    fold_index.fold(6, 9)
+    buffer.newline(10, 1)
+    assert fold_index.get_folds() == [(1, 3), (6, 9)]
+    check_queries(fold_index, buffer.get_line_count())
+
+    buffer.replace_lines(10, 2, [])
+    assert fold_index.get_folds() == [(1, 3), (6, 9)]
+    check_queries(fold_index, buffer.get_line_count())
+
+
+def test_whole_buffer_replace(make_buffer):
+    buffer = make_buffer(["x"] * 10)
+    fold_index = make_fold_index(buffer)
+    fold_index.fold_regions([(0, 2), (4, 9)])
+
+    buffer.set_buffer(make_buffer(["y"] * 5).get_buffer())
+    assert not fold_index.has_folds()
+    check_queries(fold_index, buffer.get_line_count())
+
+
+#Random folds, unfolds and edits, checked against the lines hidden by the folds.
+def test_random_folds_and_edits_match_hidden_lines(make_buffer):
+    for seed in range(300):
+        rng = random.Random(seed)
+        buffer = make_buffer(["x"] * rng.randint(1, 30))
+        fold_index = make_fold_index(buffer)
+        edits = []
+        buffer.add_change_callback(lambda start, old_count, new_count: edits.append((start, new_count)))
+
+        for _ in range(30):
+            line_count = buffer.get_line_count()
+            y = rng.randrange(line_count)
+            operation = rng.randrange(7)
+
+            if operation <= 1:
+                regions = []
+                for _ in range(rng.randint(1, 3)):
+                    start = rng.randrange(line_count)
+                    regions.append((start, rng.randint(start, min(start + 8, line_count - 1))))
+                fold_index.fold_regions(regions)
+            elif operation == 2:
+                fold_index.unfold(y)
+            elif operation == 3:
+                fold_index.reveal(y)
+            elif operation == 4:
+                buffer.newline(y, rng.randint(0, 1))
+            elif operation == 5:
+                buffer.delete_char(y, 0)
+            else:
+                old_count = rng.randint(0, min(3, line_count - y))
+                new_count = rng.randint(0 if old_count < line_count else 1, 3)
+                buffer.replace_lines(y, old_count, ["x"] * new_count)
+
+            check_queries(fold_index, buffer.get_line_count())
+
+            #No fold hides an edited line.
+            for (start, new_count) in edits:
+                assert not any(fold_start < y <= fold_end for (fold_start, fold_end) in fold_index.get_folds() for y in range(start, start + new_count))
+            edits.clear()
+
+            if operation == 3:
+                assert not fold_index.is_hidden(y)
@@ -0,0 +1,88 @@
+from actions.journal import EditJournal
+
+
+#The journal is only written by calling "flush", the background thread waits longer than any test.
+def make_journal(buffer) -> EditJournal:
+    return EditJournal(buffer, 3600)
+
+
+def write_file(path, lines: list[str]) -> str:
+    path.write_text("\n".join(lines))
+    return str(path)
+
+
+#Edits to a file are recovered by replaying its journal over the file's lines.
+def test_replay_recovers_edits(make_buffer, tmp_path):
+    filename = write_file(tmp_path / "a.txt", ["a", "b", "c"])
+    buffer = make_buffer(["a", "b", "c"])
+    journal = make_journal(buffer)
+    journal.start(filename)
+
+    buffer.replace_lines(1, 1, ["x", "y"])
+    buffer.replace_lines(3, 1, [])
+    journal.flush()
+    journal.stop(False)
+    assert journal.has_journal(filename)
+
+    recovered = make_buffer(["a", "b", "c"])
+    assert make_journal(recovered).replay(filename)
+    assert recovered.get_buffer() == buffer.get_buffer()
+
+
+#Replaying the journal isn't journaled again, otherwise recovering twice would apply the edits twice.
+def test_replay_is_not_journaled(make_buffer, tmp_path):
+    filename = write_file(tmp_path / "a.txt", ["a", "b"])
+    buffer = make_buffer(["a", "b"])
+    journal = make_journal(buffer)
+    journal.start(filename)
+    buffer.replace_lines(0, 0, ["x"])
+    journal.flush()
+    journal.stop(False)
+
+    buffer = make_buffer(["a", "b"])
+    journal = make_journal(buffer)
+    assert journal.replay(filename)
+    journal.start(filename, True)
+    assert journal.pending == []
+    journal.stop(False)
+
+    recovered = make_buffer(["a", "b"])
+    assert make_journal(recovered).replay(filename)
+    assert recovered.get_buffer() == make_buffer(["x", "a", "b"]).get_buffer()
+
+
+#Edits that weren't written yet when another file is journaled are dropped, they are never written into the new file's journal or the old one.
+def test_start_another_file_drops_pending_edits(make_buffer, tmp_path):
+    first = write_file(tmp_path / "a.txt", ["a"])
+    second = write_file(tmp_path / "b.txt", ["b"])
+    buffer = make_buffer(["a"])
+    journal = make_journal(buffer)
+    journal.start(first)
+    buffer.replace_lines(0, 1, ["edited"])
+
+    buffer.set_buffer(make_buffer(["b"]).get_buffer())
+    journal.start(second)
+    assert journal.pending == []
+    journal.flush()
+
+    assert not journal.has_journal(first)
+    assert not journal.has_journal(second)
+    journal.stop(True)
+
+
+#Replacing the whole buffer drops the pending edits, the new lines replace their result.
+def test_whole_buffer_replace_drops_pending_edits(make_buffer, tmp_path):
+    filename = write_file(tmp_path / "a.txt", ["a", "b"])
+    buffer = make_buffer(["a", "b"])
+    journal = make_journal(buffer)
+    journal.start(filename)
+
+    buffer.replace_lines(0, 1, ["x"])
+    buffer.set_buffer(make_buffer(["y", "z"]).get_buffer())
+    assert len(journal.pending) == 1
+    journal.flush()
+    journal.stop(False)
+
+    recovered = make_buffer(["a", "b"])
+    assert make_journal(recovered).replay(filename)
+    assert recovered.get_buffer() == make_buffer(["y", "z"]).get_buffer()
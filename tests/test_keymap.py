@@ -0,0 +1,91 @@
+import curses, curses.ascii
+
+import pytest
+
+from actions.keymap import Keymap
+
+
+ACTIONS = {"save", "quit", "open", "newline", "chord"}
+
+
+def make_keymap(bindings: dict[str, str | list[str]], chord_timeout: float = 2) -> Keymap:
+    return Keymap(bindings, ACTIONS, chord_timeout)
+
+
+def test_parse_key():
+    keymap = make_keymap({})
+
+    assert keymap.parse_key("a") == ["a"]
+    assert keymap.parse_key("+") == ["+"]
+    assert keymap.parse_key("Ctrl+S") == [19]
+    assert keymap.parse_key("ctrl+s") == [19]
+    assert keymap.parse_key("Enter") == [curses.ascii.CR, curses.ascii.LF]
+    assert keymap.parse_key("F5") == [curses.KEY_F0 + 5]
+    assert keymap.parse_key("Space") == [" "]
+
+    for name in ["Ctrl+1", "Ctrl+SS", "Ctrl+é", "Hyper"]:
+        with pytest.raises(ValueError):
+            keymap.parse_key(name)
+
+
+def test_chords_and_alternative_codes():
+    keymap = make_keymap({"save" : "Ctrl+X Ctrl+S", "newline" : "Enter", "quit" : ["Ctrl+Q", "F10"]})
+
+    assert keymap.get_errors() == []
+    assert keymap.feed(24) == None
+    assert keymap.get_pending_keys() == [24]
+    assert keymap.feed(19) == "save"
+    assert keymap.get_pending_keys() == []
+
+    assert keymap.feed(curses.ascii.CR) == "newline"
+    assert keymap.feed(curses.ascii.LF) == "newline"
+    assert keymap.feed(curses.KEY_F0 + 10) == "quit"
+    assert keymap.describe("quit") == "Ctrl+Q"
+
+    #A key that doesn't continue the chord discards it.
+    assert keymap.feed(24) == None
+    assert keymap.feed("a") == None
+    assert keymap.get_pending_keys() == []
+
+
+#A binding that is the start of another one, or starts with another one, is rejected and the trie isn't changed.
+def test_prefix_conflicts():
+    keymap = make_keymap({"save" : "Ctrl+X Ctrl+S", "quit" : "Ctrl+X", "open" : "Ctrl+X Ctrl+S Ctrl+O"})
+
+    assert len(keymap.get_errors()) == 2
+    assert not keymap.is_bound("quit")
+    assert not keymap.is_bound("open")
+    assert keymap.feed(24) == None
+    assert keymap.feed(19) == "save"
+
+    keymap = make_keymap({"quit" : "Ctrl+X", "save" : "Ctrl+X Ctrl+S"})
+    assert len(keymap.get_errors()) == 1
+    assert keymap.feed(24) == "quit"
+
+
+#When only some of the codes of a key conflict, none of them is bound. "Ctrl+J" is sent as a line feed, like "Enter".
+def test_conflicting_binding_is_not_partially_added():
+    keymap = make_keymap({"quit" : "Ctrl+J", "newline" : "Enter", "save" : "Ctrl+J Ctrl+S", "chord" : "Enter Ctrl+S"})
+
+    assert len(keymap.get_errors()) == 3
+    assert keymap.root == {curses.ascii.LF : "quit"}
+    assert keymap.feed(curses.ascii.CR) == None
+    assert keymap.get_pending_keys() == []
+
+
+def test_chord_timeout(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("actions.keymap.time.time", lambda: now[0])
+    keymap = make_keymap({"save" : "Ctrl+X Ctrl+S"}, 2)
+
+    keymap.feed(24)
+    now[0] += 1
+    keymap.chord_handler()
+    assert keymap.get_pending_keys() == [24]
+    assert keymap.feed(19) == "save"
+
+    keymap.feed(24)
+    now[0] += 2
+    keymap.chord_handler()
+    assert keymap.get_pending_keys() == []
+    assert keymap.feed(19) == None
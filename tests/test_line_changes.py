@@ -0,0 +1,129 @@
+import random
+
+from buffer.buffer import TextBuffer
+from buffer.line_changes import LineChanges
+
+
+def get_lines(buffer: TextBuffer) -> list[str]:
+    return [buffer.get_line(y) for y in range(buffer.get_line_count())]
+
+
+def test_empty_buffer(make_buffer):
+    buffer = make_buffer([])
+    line_changes = LineChanges(buffer)
+    assert not line_changes.is_dirty()
+
+    buffer.add_char("a", 0, 0)
+    assert line_changes.is_dirty() and line_changes.is_changed(0)
+
+    buffer.delete_char(0, 1)
+    assert not line_changes.is_dirty() and not line_changes.is_changed(0)
+
+
+def test_edits_at_last_line(make_buffer):
+    buffer = make_buffer(["a", "b"])
+    line_changes = LineChanges(buffer)
+
+    buffer.newline(1, 1)
+    assert line_changes.is_dirty()
+    assert [line_changes.is_changed(y) for y in range(3)] == [False, False, True]
+
+    buffer.delete_char_forward(1, 1)
+    assert not line_changes.is_dirty()
+
+    buffer.replace_lines(2, 0, ["c"])
+    buffer.replace_lines(2, 1, [])
+    assert not line_changes.is_dirty()
+
+
+def test_whole_buffer_replace(make_buffer):
+    buffer = make_buffer(["a", "b", "c"])
+    line_changes = LineChanges(buffer)
+
+    buffer.replace_lines(0, 3, ["a", "x", "c"])
+    assert [line_changes.is_changed(y) for y in range(3)] == [False, True, False]
+
+    #Undoing replaces the whole buffer with the saved lines.
+    buffer.set_buffer(make_buffer(["a", "b", "c"]).get_buffer())
+    assert not line_changes.is_dirty()
+
+    buffer.set_buffer(make_buffer([]).get_buffer())
+    assert line_changes.is_dirty()
+
+
+#A line added and then joined with the line above leaves the buffer as it was saved.
+def test_newline_then_join_is_unmodified(make_buffer):
+    buffer = make_buffer(["foo", ""])
+    line_changes = LineChanges(buffer)
+    line_changes.mark_saved()
+
+    buffer.newline(1, 0)
+    assert line_changes.is_dirty()
+
+    buffer.delete_char(1, 0)
+    assert not line_changes.is_dirty()
+    assert not any(line_changes.is_changed(y) for y in range(buffer.get_line_count()))
+
+
+#Random edits with few different lines, so lines often have the same text as their neighbours, checked against comparing the whole buffer.
+def test_random_edits_match_saved_contents(make_buffer):
+    for seed in range(300):
+        rng = random.Random(seed)
+        buffer = make_buffer([rng.choice(["", "a", "b"]) for _ in range(rng.randint(1, 6))])
+        line_changes = LineChanges(buffer)
+        saved = get_lines(buffer)
+
+        for _ in range(60):
+            line_count = buffer.get_line_count()
+            y = rng.randrange(line_count)
+            x = rng.randint(0, len(buffer.get_line(y)))
+            operation = rng.randrange(5)
+
+            if operation == 0:
+                buffer.newline(y, x)
+            elif operation == 1:
+                buffer.delete_char(y, x)
+            elif operation == 2:
+                buffer.delete_char_forward(y, x)
+            elif operation == 3:
+                buffer.add_char(rng.choice("ab"), y, x)
+            else:
+                old_count = rng.randint(0, min(2, line_count - y))
+                new_count = rng.randint(0 if old_count < line_count else 1, 2)
+                buffer.replace_lines(y, old_count, [rng.choice(["", "a", "b"]) for _ in range(new_count)])
+
+            lines = get_lines(buffer)
+            assert line_changes.is_dirty() == (lines != saved), (seed, saved, lines)
+
+            #A line that isn't marked as changed always has the text of a saved line.
+            for y in range(len(lines)):
+                assert line_changes.is_changed(y) or lines[y] in saved
+
+
+#Lines appended while appending to the saved file, like the lines of a followed file, are unchanged, edits to the buffer before it are kept.
+def test_appending_saved(make_buffer):
+    buffer = make_buffer(["a", "b"])
+    line_changes = LineChanges(buffer)
+
+    line_changes.set_appending_saved(True)
+    buffer.replace_lines(2, 0, ["c", "d"])
+    buffer.replace_lines(3, 1, ["d e", "f"])
+    line_changes.set_appending_saved(False)
+    assert not line_changes.is_dirty()
+
+    buffer.add_char("x", 0, 0)
+    line_changes.set_appending_saved(True)
+    buffer.replace_lines(5, 0, ["g"])
+    line_changes.set_appending_saved(False)
+    assert line_changes.is_dirty()
+    assert [line_changes.is_changed(y) for y in range(6)] == [True] + [False] * 5
+
+    buffer.delete_char(0, 1)
+    assert not line_changes.is_dirty()
+
+    #The last line is changed, so it can't be replaced in the saved file.
+    buffer.add_char("x", 5, 0)
+    line_changes.set_appending_saved(True)
+    buffer.replace_lines(5, 1, ["xg h"])
+    line_changes.set_appending_saved(False)
+    assert line_changes.is_dirty() and line_changes.is_changed(5)
@@ -0,0 +1,170 @@
+import random
+
+from buffer.buffer import EditOperationsEnum, TextBuffer
+from buffer.mark_index import MarkIndex
+
+
+def make_mark_index(buffer: TextBuffer) -> MarkIndex:
+    mark_index = MarkIndex(buffer)
+    buffer.add_change_callback(mark_index.buffer_changed)
+    return mark_index
+
+
+def test_typing_before_mark_moves_it(make_buffer):
+    buffer = make_buffer(["abcd"])
+    mark_index = make_mark_index(buffer)
+    mark_index.set_mark("a", 0, 2)
+
+    buffer.add_char("xy", 0, 1)
+    assert mark_index.get_mark("a") == (0, 4)
+
+    buffer.delete_char(0, 2)
+    assert mark_index.get_mark("a") == (0, 3)
+
+    #Typing after the mark doesn't move it.
+    buffer.add_char("z", 0, 4)
+    assert mark_index.get_mark("a") == (0, 3)
+
+
+def test_splitting_line_before_mark_moves_it_to_new_line(make_buffer):
+    buffer = make_buffer(["first", "abcdef", "last"])
+    mark_index = make_mark_index(buffer)
+    mark_index.set_mark("a", 1, 4)
+    mark_index.set_mark("b", 2, 1)
+
+    buffer.newline(1, 2)
+    assert mark_index.get_mark("a") == (2, 2)
+    assert mark_index.get_mark("b") == (3, 1)
+
+    #The indentation of the new line is taken into account.
+    buffer.newline(2, 1, "    ")
+    assert mark_index.get_mark("a") == (3, 5)
+
+
+def test_joining_line_moves_mark_to_previous_line(make_buffer):
+    buffer = make_buffer(["abc", "defg", "last"])
+    mark_index = make_mark_index(buffer)
+    mark_index.set_mark("a", 1, 2)
+    mark_index.set_mark("b", 2, 3)
+
+    buffer.delete_char(1, 0)
+    assert mark_index.get_mark("a") == (0, 5)
+    assert mark_index.get_mark("b") == (1, 3)
+
+    buffer.delete_char_forward(0, 7)
+    assert mark_index.get_mark("a") == (0, 5)
+    assert mark_index.get_mark("b") == (0, 10)
+
+
+def test_empty_buffer(make_buffer):
+    buffer = make_buffer([])
+    mark_index = make_mark_index(buffer)
+    mark_index.set_mark("a", 0, 0)
+
+    buffer.add_char("ab", 0, 0)
+    assert mark_index.get_mark("a") == (0, 2)
+    buffer.newline(0, 0)
+    assert mark_index.get_mark("a") == (1, 2)
+
+
+def test_edits_at_last_line(make_buffer):
+    buffer = make_buffer(["first", "abc", "last"])
+    mark_index = make_mark_index(buffer)
+    mark_index.set_mark("a", 1, 1)
+    mark_index.set_mark("b", 2, 3)
+
+    buffer.newline(2, 4)
+    assert mark_index.get_mark("b") == (2, 3)
+    buffer.add_char("x", 3, 0)
+    assert mark_index.get_mark("b") == (2, 3)
+
+    #Lines removed without knowing the edit inside them leave their marks in the last line that remains.
+    buffer.replace_lines(1, 3, [])
+    assert mark_index.get_mark("a") == (0, 1)
+    assert mark_index.get_mark("b") == (0, 3)
+
+
+def test_whole_buffer_replace(make_buffer):
+    buffer = make_buffer(["first", "abcdef", "last"])
+    mark_index = make_mark_index(buffer)
+    mark_index.set_mark("a", 0, 4)
+    mark_index.set_mark("b", 1, 5)
+    mark_index.set_mark("c", 2, 2)
+
+    #The marks stay in their lines if they are still there, in the last line otherwise, and never past the end of their line.
+    buffer.set_buffer(make_buffer(["xy", "z"]).get_buffer())
+    assert mark_index.get_mark("a") == (0, 2)
+    assert mark_index.get_mark("b") == (1, 1)
+    assert mark_index.get_mark("c") == (1, 1)
+    assert mark_index.get_marks() == sorted(mark_index.get_marks(), key = lambda mark: mark[:2])
+
+
+#Random edits checked against following every mark in the text of the buffer joined by newlines.
+def test_random_edits_match_joined_text(make_buffer):
+    for seed in range(300):
+        rng = random.Random(seed)
+        buffer = make_buffer(["".join(rng.choice("ab ") for _ in range(rng.randint(0, 5))) for _ in range(rng.randint(1, 6))])
+        mark_index = make_mark_index(buffer)
+        text = "\n".join(buffer.get_line(y) for y in range(buffer.get_line_count()))
+        offsets = {}
+
+        for name in "abcde":
+            offset = rng.randint(0, len(text))
+            offsets[name] = offset
+            y = text.count("\n", 0, offset)
+            mark_index.set_mark(name, y, offset - (text.rfind("\n", 0, offset) + 1))
+
+        for _ in range(40):
+            line_count = buffer.get_line_count()
+            line_starts = [0]
+            for y in range(line_count - 1):
+                line_starts.append(line_starts[-1] + len(buffer.get_line(y)) + 1)
+
+            y = rng.randrange(line_count)
+            x = rng.randint(0, len(buffer.get_line(y)))
+            offset = line_starts[y] + x
+            operation = rng.randrange(5)
+
+            #The edit as the replaced offsets of the joined text and the new text.
+            if operation == 0:
+                indent = rng.choice([None, "", "  "])
+                removed = (len(text[offset:]) - len(text[offset:].lstrip(" ")) if indent != None else 0)
+                removed = min(removed, len(buffer.get_line(y)) - x)
+                edit = (offset, offset + removed, "\n" + (indent or ""))
+                buffer.newline(y, x, indent)
+            elif operation == 1:
+                edit = (max(offset - 1, 0), offset, "")
+                buffer.delete_char(y, x)
+            elif operation == 2:
+                edit = (offset, min(offset + 1, len(text)), "")
+                buffer.delete_char_forward(y, x)
+            elif operation == 3:
+                edit = (offset, offset, "ab")
+                buffer.add_char("ab", y, x)
+            else:
+                positions = [(y, x)] + [(rng.randrange(line_count), 0) for _ in range(2)]
+                positions = [(y, min(x, len(buffer.get_line(y)))) for (y, x) in positions]
+                edit = None
+                buffer.multi_edit(positions, EditOperationsEnum.INSERT, ["a\nb"] * len(positions))
+
+                for position in sorted(set(line_starts[y] + x for (y, x) in positions), reverse = True):
+                    for name in offsets:
+                        if offsets[name] >= position:
+                            offsets[name] += 3
+
+            if edit != None:
+                start, end, new_text = edit
+                for name in offsets:
+                    if offsets[name] >= end:
+                        offsets[name] += len(new_text) - (end - start)
+                    elif offsets[name] >= start:
+                        offsets[name] = start
+
+            text = "\n".join(buffer.get_line(y) for y in range(buffer.get_line_count()))
+
+            for name in offsets:
+                offset = offsets[name]
+                expected = (text.count("\n", 0, offset), offset - (text.rfind("\n", 0, offset) + 1))
+                assert mark_index.get_mark(name) == expected, (seed, name)
+
+            assert mark_index.get_marks() == sorted(mark_index.get_marks(), key = lambda mark: mark[:2])
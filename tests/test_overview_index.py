@@ -0,0 +1,118 @@
+import random
+
+from buffer.line_changes import LineChanges
+from buffer.overview_index import OverviewIndex
+
+
+def make_overview_index(buffer) -> tuple[LineChanges, OverviewIndex]:
+    line_changes = LineChanges(buffer)
+    overview_index = OverviewIndex(buffer, line_changes)
+    buffer.add_change_callback(overview_index.buffer_changed)
+    return (line_changes, overview_index)
+
+
+#Checks the blocks cover every line and the summaries of every range against the changed lines.
+def check_summaries(overview_index: OverviewIndex, line_changes: LineChanges, line_count: int) -> None:
+    overview_index.update()
+    assert sum(overview_index.block_lines) == line_count
+    assert all(0 < block_lines <= 2 * overview_index.BLOCK_SIZE for block_lines in overview_index.block_lines) or overview_index.block_lines == [0]
+
+    for start in range(line_count + 1):
+        for end in range(start, line_count + 1):
+            changed = sum(line_changes.is_changed(y) for y in range(start, end))
+            assert overview_index.get_summary(start, end) == (changed, 0)
+
+
+def test_empty_buffer(make_buffer):
+    buffer = make_buffer([])
+    line_changes, overview_index = make_overview_index(buffer)
+    check_summaries(overview_index, line_changes, buffer.get_line_count())
+
+    buffer.add_char("a", 0, 0)
+    check_summaries(overview_index, line_changes, buffer.get_line_count())
+    assert overview_index.get_summary(0, 1) == (1, 0)
+
+
+def test_edits_at_last_line(make_buffer, monkeypatch):
+    monkeypatch.setattr(OverviewIndex, "BLOCK_SIZE", 2)
+    buffer = make_buffer(["a"] * 9)
+    line_changes, overview_index = make_overview_index(buffer)
+
+    buffer.replace_lines(8, 1, ["b"] * 4)
+    check_summaries(overview_index, line_changes, buffer.get_line_count())
+    buffer.newline(11, 1)
+    check_summaries(overview_index, line_changes, buffer.get_line_count())
+    buffer.replace_lines(6, 7, [])
+    check_summaries(overview_index, line_changes, buffer.get_line_count())
+    assert overview_index.get_summary(0, buffer.get_line_count()) == (0, 0)
+
+
+def test_whole_buffer_replace(make_buffer, monkeypatch):
+    monkeypatch.setattr(OverviewIndex, "BLOCK_SIZE", 2)
+    buffer = make_buffer(["a"] * 9)
+    line_changes, overview_index = make_overview_index(buffer)
+
+    buffer.set_buffer(make_buffer(["b"] * 3).get_buffer())
+    check_summaries(overview_index, line_changes, buffer.get_line_count())
+    buffer.set_buffer(make_buffer(["a"] * 12).get_buffer())
+    check_summaries(overview_index, line_changes, buffer.get_line_count())
+
+
+#Random edits, saves and find matches with small blocks, checked against counting the changed lines and the matches of every line in the range.
+def test_random_edits_match_counted_summaries(make_buffer, monkeypatch):
+    monkeypatch.setattr(OverviewIndex, "BLOCK_SIZE", 4)
+
+    for seed in range(200):
+        rng = random.Random(seed)
+        buffer = make_buffer([rng.choice(["", "a", "b"]) for _ in range(rng.randint(1, 30))])
+        line_changes, overview_index = make_overview_index(buffer)
+        matches = None
+
+        for _ in range(40):
+            line_count = buffer.get_line_count()
+            y = rng.randrange(line_count)
+            x = rng.randint(0, len(buffer.get_line(y)))
+            operation = rng.randrange(7)
+
+            if operation == 0:
+                buffer.newline(y, x)
+            elif operation == 1:
+                buffer.delete_char(y, x)
+            elif operation == 2:
+                buffer.add_char(rng.choice("ab"), y, x)
+            elif operation == 3:
+                old_count = rng.randint(0, min(6, line_count - y))
+                new_count = rng.randint(0 if old_count < line_count else 1, 6)
+                buffer.replace_lines(y, old_count, [rng.choice(["", "a", "b"]) for _ in range(new_count)])
+            elif operation == 4:
+                line_changes.mark_saved()
+            elif operation == 5:
+                line_changes.set_appending_saved(True)
+                buffer.replace_lines(line_count, 0, ["a"] * rng.randint(1, 5))
+                line_changes.set_appending_saved(False)
+            else:
+                #The matches of a find are counted in batches, like they are found.
+                matches = {y : [(0, 1)] * rng.randint(1, 3) for y in range(line_count) if rng.random() < 0.3}
+                overview_index.set_matches(matches)
+                found = list(matches.items())
+                while found != []:
+                    batch = rng.randint(1, len(found))
+                    overview_index.add_matches(found[:batch])
+                    found = found[batch:]
+
+            #The matches are no longer counted once the buffer is edited.
+            if overview_index.get_matches() != matches:
+                assert overview_index.get_matches() == None
+                matches = None
+
+            overview_index.update()
+            line_count = buffer.get_line_count()
+            assert sum(overview_index.block_lines) == line_count
+
+            for _ in range(10):
+                start = rng.randint(0, line_count)
+                end = rng.randint(start, line_count)
+                changed = sum(line_changes.is_changed(y) for y in range(start, end))
+                match_count = (sum(len(matches.get(y, [])) for y in range(start, end)) if matches != None else 0)
+
+                assert overview_index.get_summary(start, end) == (changed, match_count), seed
@@ -0,0 +1,100 @@
+import random
+
+from buffer.buffer import TextBuffer
+from buffer.wrap_index import WrapIndex
+
+
+def make_wrap_index(buffer: TextBuffer, width: int) -> WrapIndex:
+    wrap_index = WrapIndex(buffer, width)
+    buffer.add_change_callback(wrap_index.buffer_changed)
+    return wrap_index
+
+
+#Checks every query of the index against measuring every line.
+def check_rows(wrap_index: WrapIndex, buffer: TextBuffer) -> None:
+    rows = [buffer.get_line_width(y) // wrap_index.width + 1 for y in range(buffer.get_line_count())]
+    assert wrap_index.get_total_rows() == sum(rows)
+    assert [wrap_index.get_line_rows(y) for y in range(len(rows))] == rows
+
+    row = 0
+    for y in range(len(rows)):
+        assert wrap_index.row_of(y, 0) == row
+
+        for line_row in range(rows[y]):
+            assert wrap_index.line_at_row(row) == (y, line_row)
+            row += 1
+
+    #Rows after the last one are in the last line.
+    assert wrap_index.line_at_row(row) == (len(rows) - 1, rows[-1])
+
+
+def test_empty_buffer(make_buffer):
+    buffer = make_buffer([])
+    wrap_index = make_wrap_index(buffer, 5)
+    check_rows(wrap_index, buffer)
+
+    buffer.add_char("x" * 12, 0, 0)
+    assert wrap_index.get_line_rows(0) == 3
+    check_rows(wrap_index, buffer)
+
+
+def test_edits_at_last_line(make_buffer, monkeypatch):
+    monkeypatch.setattr(WrapIndex, "BLOCK_SIZE", 2)
+    buffer = make_buffer(["x" * y for y in range(9)])
+    wrap_index = make_wrap_index(buffer, 3)
+
+    buffer.newline(8, 4)
+    check_rows(wrap_index, buffer)
+    buffer.replace_lines(9, 1, ["x" * 7, "", "x" * 3])
+    check_rows(wrap_index, buffer)
+    buffer.replace_lines(12, 0, ["x"] * 6)
+    check_rows(wrap_index, buffer)
+    buffer.delete_char(17, 0)
+    check_rows(wrap_index, buffer)
+    buffer.replace_lines(10, 7, [])
+    check_rows(wrap_index, buffer)
+
+
+def test_whole_buffer_replace(make_buffer, monkeypatch):
+    monkeypatch.setattr(WrapIndex, "BLOCK_SIZE", 2)
+    buffer = make_buffer(["x" * y for y in range(9)])
+    wrap_index = make_wrap_index(buffer, 3)
+
+    buffer.set_buffer(buffer.get_buffer()[:3])
+    check_rows(wrap_index, buffer)
+    buffer.replace_lines(0, 3, ["x" * 10] * 20)
+    check_rows(wrap_index, buffer)
+    assert len(wrap_index.blocks) == 10
+    buffer.replace_lines(0, 20, [])
+    check_rows(wrap_index, buffer)
+
+
+#Random edits with a small block size, so blocks are often split and merged, checked against measuring every line.
+def test_random_edits_match_measured_rows(make_buffer, monkeypatch):
+    monkeypatch.setattr(WrapIndex, "BLOCK_SIZE", 4)
+
+    for seed in range(200):
+        rng = random.Random(seed)
+        buffer = make_buffer(["x" * rng.randint(0, 12) for _ in range(rng.randint(1, 30))])
+        wrap_index = make_wrap_index(buffer, 5)
+
+        for _ in range(80):
+            line_count = buffer.get_line_count()
+            y = rng.randrange(line_count)
+            x = rng.randint(0, len(buffer.get_line(y)))
+            operation = rng.randrange(5)
+
+            if operation == 0:
+                buffer.newline(y, x)
+            elif operation == 1:
+                buffer.delete_char(y, x)
+            elif operation == 2:
+                buffer.add_char("x" * rng.randint(1, 6), y, x)
+            elif operation == 3:
+                old_count = rng.randint(0, min(12, line_count - y))
+                new_count = rng.randint(0 if old_count < line_count else 1, 12)
+                buffer.replace_lines(y, old_count, ["x" * rng.randint(0, 12) for _ in range(new_count)])
+            else:
+                buffer.set_buffer(buffer.get_buffer()[:rng.randint(1, line_count)])
+
+            check_rows(wrap_index, buffer)